@@ -278,7 +278,7 @@ export const GameBoard: React.FC<GameBoardProps> = ({ state, onMove }) => {
                                             {isSelected && (
                                                 <>
                                                     {/* Meeple Hotspots */}
-                                                    {state.meeples[state.current_player] > 0 && state.meeple_choices && state.meeple_choices.map((choice) => {
+                                                    {state.meeples[state.current_player] > 0 && state.meeple_choices && state.meeple_choices.filter(c => !move.meeples || move.meeples.includes(c.index)).map((choice) => {
                                                         const pos = getMeeplePosition(choice.nodes, choice.type);
                                                         const isThisSelected = selectedMeepleIdx === choice.index;
                                                         return (
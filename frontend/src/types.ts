@@ -15,6 +15,7 @@ export interface LegalMove {
     x: number;
     y: number;
     r: number;
+    meeples?: number[];  // segment indices where a meeple may go with this placement
 }
 
 export interface MeepleChoice {
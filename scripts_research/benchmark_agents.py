@@ -0,0 +1,227 @@
+"""
+benchmark_agents.py
+──────────────────────────────────────────────────────────────────────────────
+Search statistics and head-to-head strength of the search agents
+(`src/logic/agents.py`), played locally without the server.
+
+    python scripts_research/benchmark_agents.py mcts [--games 10] [--time 0.2]
+    python scripts_research/benchmark_agents.py mcts-parallel [--time 2.0]
+    python scripts_research/benchmark_agents.py star [--games 6] [--time 0.3] [--budget 3.0]
+    python scripts_research/benchmark_agents.py selfplay [--games 500] [--repeat 5]
+    python scripts_research/benchmark_agents.py batch [--games 1000]
+
+mcts
+    Runs `MCTSAgent` on a fixed mid-game position at several time budgets
+    (iterations per second, tree size, visits of the chosen move, subtree
+    reused on the next turn), then plays it against `GreedyAgent` (random
+    placements) with seats alternating and reports wins and average scores.
+
+mcts-parallel
+    Scaling curve of root-parallel MCTS (`ParallelMCTS`): total playouts per
+    second on the same position with 1, 2, 4 and 8 worker processes, each
+    searching for the same wall-clock budget. The pool is warmed up first, so
+    process start-up is not counted. Speed-up is bounded by the CPU cores
+    available (`os.cpu_count()` is printed with the results).
+
+star
+    Depth against latency for the Star2.5 search (`StarAgent`): iterative
+    deepening on the same mid-game position for `--budget` seconds, with and
+    without probing, printing the time and nodes at which every depth
+    completed plus chance-node and alpha-beta cutoff rates. Then plays
+    `StarAgent` against `GreedyAgent` like the mcts benchmark.
+
+selfplay
+    Throughput of the headless simulator (`src/logic/simulator.py`): seeded
+    games between two `RandomPolicy` agents, reported as games per second on
+    one core (the median of `--repeat` runs of the same games, with their
+    range: single runs vary by a quarter on a shared machine), with the seat
+    balance and average scores as a sanity check.
+
+batch
+    The vectorized lockstep simulator (`src/logic/batch.py`) against looping
+    the scalar simulator: the same number of random-policy games played once
+    with `run_games` and once as one `BatchSimulator` batch, then batches of
+    growing size to show where the per-turn NumPy overhead is amortised, and
+    the greedy-by-delta policy against the random one.
+──────────────────────────────────────────────────────────────────────────────
+"""
+
+import argparse
+import copy
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logic.engine import PLAYERS
+from src.logic.agents import GreedyAgent, MCTSAgent, StarAgent
+from src.logic.mcts import ParallelMCTS
+from src.logic.star import StarSearch
+from src.logic.simulator import RandomPolicy, new_game, play_game, play_turn, run_games
+from src.logic.batch import BatchSimulator
+
+
+def play_match(agents: dict, seed: int) -> dict:
+    result = play_game([agents[p] for p in PLAYERS], seed)
+    return dict(zip(PLAYERS, result.scores))
+
+
+def midgame_position(turns: int = 30):
+    board, deck = new_game(0)
+    filler = [GreedyAgent(p) for p in PLAYERS]
+    random.seed(0)
+    for _ in range(turns):
+        play_turn(board, deck, filler)
+    return board, deck, filler
+
+
+def bench_mcts(games: int, time_limit: float):
+    board, deck, filler = midgame_position()
+
+    print(f"mcts search  ·  position after {len(board.grid)} tiles")
+    print(f"  {'budget s':>8} {'iter':>6} {'iter/s':>8} {'tree':>7} {'best visits':>12} {'reused':>7}")
+    for budget in (0.1, 0.5, 2.0):
+        agent = MCTSAgent(PLAYERS[board.to_move], time_limit=budget, seed=1)
+        agents = list(filler)
+        agents[board.to_move] = agent
+        scratch, rest = copy.deepcopy(board), deck.clone()
+        play_turn(scratch, rest, agents)
+        stats = agent.last_stats
+        # The opponent replies, then the next search starts from the matching subtree
+        play_turn(scratch, rest, agents)
+        play_turn(scratch, rest, agents)
+        best = stats["visit_distribution"][0]
+        print(f"  {budget:>8.1f} {stats['iterations']:>6} {stats['iterations_per_second']:>8.0f} {stats['tree_size']:>7} "
+              f"{best['visits']:>5} ({best['visits'] / stats['root_visits']:>4.0%}) {agent.last_stats['reused_visits']:>7}")
+
+    wins, totals = 0, [0, 0]
+    for game in range(games):
+        random.seed(game)
+        mcts_seat = PLAYERS[game % 2]
+        agents = {p: GreedyAgent(p) for p in PLAYERS}
+        agents[mcts_seat] = MCTSAgent(mcts_seat, time_limit=time_limit, seed=game)
+        scores = play_match(agents, 1000 + game)
+        other = PLAYERS[1 - game % 2]
+        wins += scores[mcts_seat] > scores[other]
+        totals[0] += scores[mcts_seat]
+        totals[1] += scores[other]
+    print(f"mcts ({time_limit}s/move) vs greedy  ·  {games} games")
+    print(f"  wins {wins}/{games}  ·  avg score {totals[0] / games:.1f} vs {totals[1] / games:.1f}")
+
+
+def bench_mcts_parallel(time_limit: float):
+    board, deck, _ = midgame_position()
+    player, tile = PLAYERS[board.to_move], deck.draw()
+    print(f"root-parallel mcts  ·  position after {len(board.grid)} tiles  ·  {time_limit}s per search  ·  {os.cpu_count()} CPU(s)")
+    print(f"  {'workers':>7} {'playouts':>9} {'playouts/s':>11} {'speed-up':>9}")
+    base = None
+    for workers in (1, 2, 4, 8):
+        search = ParallelMCTS(workers, time_limit=time_limit, seed=0)
+        search.search(board, tile, player, deck)  # warm-up: starts the pool
+        search.search(board, tile, player, deck)
+        rate = search.stats["iterations"] / search.stats["seconds"]
+        base = base or rate
+        print(f"  {workers:>7} {search.stats['iterations']:>9} {rate:>11.0f} {rate / base:>8.2f}x")
+        search.close()
+
+
+def bench_star(games: int, time_limit: float, budget: float):
+    board, deck, _ = midgame_position()
+    player, tile = PLAYERS[board.to_move], deck.draw()
+    print(f"star2.5 search  ·  position after {len(board.grid)} tiles  ·  {budget}s budget")
+    print(f"  {'probing':>7} {'depth':>5} {'done at s':>9} {'nodes':>7} {'evals':>7} {'chance cut':>10} {'a-b cut':>8}")
+    for probing in (False, True):
+        search = StarSearch(time_limit=budget, probing=probing)
+        search.search(board, tile, player, deck)
+        stats = search.stats
+        for row in stats["iterations"]:
+            print(f"  {'on' if probing else 'off':>7} {row['depth']:>5} {row['seconds']:>9.3f} {row['nodes']:>7}")
+        print(f"  {'on' if probing else 'off':>7} {'total':>5} {stats['seconds']:>9.3f} {stats['nodes']:>7} {stats['evaluations']:>7} "
+              f"{stats['chance_cutoff_rate']:>10.0%} {stats['alpha_beta_cutoff_rate']:>8.0%}")
+
+    wins, totals = 0, [0, 0]
+    for game in range(games):
+        random.seed(game)
+        star_seat = PLAYERS[game % 2]
+        agents = {p: GreedyAgent(p) for p in PLAYERS}
+        agents[star_seat] = StarAgent(star_seat, time_limit=time_limit)
+        scores = play_match(agents, 1000 + game)
+        other = PLAYERS[1 - game % 2]
+        wins += scores[star_seat] > scores[other]
+        totals[0] += scores[star_seat]
+        totals[1] += scores[other]
+    print(f"star2.5 ({time_limit}s/move) vs greedy  ·  {games} games")
+    print(f"  wins {wins}/{games}  ·  avg score {totals[0] / games:.1f} vs {totals[1] / games:.1f}")
+
+
+def bench_selfplay(games: int, repeat: int):
+    rates = []
+    for _ in range(repeat):
+        report = run_games(lambda game: [RandomPolicy(p, seed=game * len(PLAYERS) + i) for i, p in enumerate(PLAYERS)], games)
+        rates.append(report.games_per_second)
+    rates.sort()
+    median = rates[len(rates) // 2]
+    p1, p2, draws = report.wins()
+    avg = [sum(r.scores[i] for r in report.results) / games for i in range(len(PLAYERS))]
+    print(f"selfplay  ·  {games} random-policy games, {repeat} runs")
+    print(f"  {1e3 / median:.2f} ms/game  ·  median {median:.0f} games/s (runs {rates[0]:.0f}-{rates[-1]:.0f})")
+    print(f"  wins {p1}/{p2} (draws {draws})  ·  avg score {avg[0]:.1f} vs {avg[1]:.1f}")
+
+
+def bench_batch(games: int):
+    scalar_games = min(games, 200)
+    scalar = run_games(lambda game: [RandomPolicy(p, seed=game * len(PLAYERS) + i) for i, p in enumerate(PLAYERS)], scalar_games)
+    print(f"batch  ·  random policies, scalar loop over {scalar_games} games: {scalar.games_per_second:.0f} games/s")
+    print(f"  {'batch':>6} {'seconds':>8} {'games/s':>9} {'speed-up':>9} {'avg score':>12}")
+    for size in sorted({10, 100, games}):
+        report = BatchSimulator(size).run()
+        avg = [sum(r.scores[i] for r in report.results) / size for i in range(len(PLAYERS))]
+        print(f"  {size:>6} {report.seconds:>8.2f} {report.games_per_second:>9.0f} "
+              f"{report.games_per_second / scalar.games_per_second:>8.1f}x {avg[0]:>5.1f} / {avg[1]:<5.1f}")
+    for policies in [("greedy", "random"), ("random", "greedy")]:
+        report = BatchSimulator(games, policies=policies).run()
+        p1, p2, draws = report.wins()
+        avg = [sum(r.scores[i] for r in report.results) / games for i in range(len(PLAYERS))]
+        print(f"  {policies[0]} vs {policies[1]}: wins {p1}/{p2} (draws {draws})  ·  avg score {avg[0]:.1f} vs {avg[1]:.1f}"
+              f"  ·  {report.games_per_second:.0f} games/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("mcts", help="MCTS search statistics and strength against GreedyAgent")
+    p.add_argument("--games", type=int, default=10)
+    p.add_argument("--time", type=float, default=0.2, help="seconds per move in the match games")
+
+    p = sub.add_parser("mcts-parallel", help="playouts/s of root-parallel MCTS for 1-8 workers")
+    p.add_argument("--time", type=float, default=2.0, help="seconds per search")
+
+    p = sub.add_parser("star", help="Star2.5 depth/latency/cutoff statistics and strength against GreedyAgent")
+    p.add_argument("--games", type=int, default=6)
+    p.add_argument("--time", type=float, default=0.3, help="seconds per move in the match games")
+    p.add_argument("--budget", type=float, default=3.0, help="seconds for the iterative-deepening search")
+
+    p = sub.add_parser("selfplay", help="games/s of the headless simulator with random policies")
+    p.add_argument("--games", type=int, default=500)
+    p.add_argument("--repeat", type=int, default=5, help="runs of the same games; the median is reported")
+
+    p = sub.add_parser("batch", help="games/s of the vectorized batch simulator vs the scalar loop")
+    p.add_argument("--games", type=int, default=1000)
+
+    args = parser.parse_args()
+    if args.bench == "mcts":
+        bench_mcts(args.games, args.time)
+    elif args.bench == "mcts-parallel":
+        bench_mcts_parallel(args.time)
+    elif args.bench == "star":
+        bench_star(args.games, args.time, args.budget)
+    elif args.bench == "selfplay":
+        bench_selfplay(args.games, args.repeat)
+    elif args.bench == "batch":
+        bench_batch(args.games)
+
+
+if __name__ == "__main__":
+    main()
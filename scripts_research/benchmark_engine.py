@@ -0,0 +1,717 @@
+"""
+benchmark_engine.py
+──────────────────────────────────────────────────────────────────────────────
+Micro-benchmarks for the core game engine (`src/logic/engine.py`).
+
+    python scripts_research/benchmark_engine.py legal-moves
+    python scripts_research/benchmark_engine.py memory
+    python scripts_research/benchmark_engine.py simulate
+    python scripts_research/benchmark_engine.py completion
+    python scripts_research/benchmark_engine.py apply-undo
+    python scripts_research/benchmark_engine.py transpositions
+    python scripts_research/benchmark_engine.py snapshot
+    python scripts_research/benchmark_engine.py grid
+    python scripts_research/benchmark_engine.py score-move
+    python scripts_research/benchmark_engine.py evaluate
+    python scripts_research/benchmark_engine.py planes
+    python scripts_research/benchmark_engine.py fits
+    python scripts_research/benchmark_engine.py deck
+
+legal-moves
+    Plays seeded random games and times `Board.get_legal_moves` at every turn.
+    Move generation only visits the open frontier, so the cost per frontier
+    cell stays flat from turn 1 to turn 71; the last column shows the
+    full-grid neighbour walk it replaced, which grows with the board.
+
+memory
+    Allocation cost of `create_deck()` and of copying a finished board. Tiles
+    are small per-placement records pointing at shared `TileType`s, so neither
+    duplicates segment geometry.
+
+simulate
+    Full random games with meeples, completion scoring after every move and
+    final scoring; reports games per second for the whole engine.
+
+completion
+    Per-turn cost of `Board.get_completed_features`. Completion checks only
+    follow the features the last placement touched, so the cost should stay
+    flat as the board fills up.
+
+apply-undo
+    Cost of exploring one move in place with `Board.apply`/`Board.undo`
+    versus copying the board with `copy.deepcopy` and playing it there.
+
+transpositions
+    Two-ply search over the next two tiles in both orders, evaluating every
+    leaf with `project_final_scores`. Placing the same two tiles in either
+    order reaches the same position, so a `TranspositionTable` keyed by
+    `Board.zobrist` skips the duplicate evaluations.
+
+snapshot
+    Size and encode/decode time of the binary snapshot format
+    (`src/logic/snapshot.py`) against `pickle` and `copy.deepcopy`, for a
+    finished board and for a mid-game board plus remaining deck.
+
+grid
+    Full-game simulation throughput (as in `simulate`) with the `DictGrid`
+    and `DenseGrid` storage backends for `Board.grid`, plus the cost of the
+    neighbour lookup both backends serve to `place_tile`.
+
+score-move
+    Cost of rating every full action of a turn (placements times valid
+    meeple choices) with `Board.score_move` at several points of a game,
+    against playing each action on a `copy.deepcopy` of the board and
+    projecting the final scores there. The per-turn total is what an agent
+    spends to look at all of its moves.
+
+evaluate
+    Rating every full action of a turn in one batch with the NumPy move
+    evaluator (`src/logic/evaluator.py`): feature extraction into a single
+    matrix plus one vectorized model call, against the per-move loop with
+    `Board.score_move`. The matrix columns and a sample of rows are printed
+    for the last position.
+
+planes
+    Cost of encoding a board as feature planes (`src/logic/planes.py`) at
+    several points of a game: a first encode (cold per-board cache), a
+    repeated encode, one apply/encode/undo step as a search would do it, and
+    the per-board cost of `encode_batch` over all sampled boards.
+
+fits
+    The deck-aware fit index (`src/logic/fits.py`) at several points of a
+    game: "does this tile have a legal move" for every tile kind through
+    `FitIndex.has_move` against `Board.get_legal_moves`, the cost of keeping
+    the index in step with one placement, and the fill probability of every
+    open cell.
+
+deck
+    The counts-based `Deck` against the list of `Tile` objects it replaces
+    in `GameSession`: dealing a seeded game, copying the remaining pile for
+    a chance node, drawing one known tile kind and putting it back, and
+    listing the remaining kinds for a search.
+──────────────────────────────────────────────────────────────────────────────
+"""
+
+import argparse
+import copy
+import pickle
+import tracemalloc
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logic.engine import Board
+from src.logic.deck import TILE_KINDS, Deck, create_deck, remaining_kinds
+from src.logic.models import Tile
+from src.logic.transposition import TranspositionTable
+from src.logic.grid import DictGrid, DenseGrid
+from src.logic.evaluator import FEATURE_NAMES, MoveEvaluator, action_features
+from src.logic.planes import PlaneEncoder, N_PLANES
+from src.logic.fits import FitIndex
+from src.logic.snapshot import GameSnapshot, encode_board, decode_board, encode_game, decode_game
+
+
+def new_game(seed: int, grid_backend: type = DictGrid):
+    """Returns a board with the starter placed and the shuffled remaining deck."""
+    rng = random.Random(seed)
+    board = Board(grid_backend)
+    deck = create_deck()
+    rng.shuffle(deck)
+    starter = deck.pop(next(i for i, t in enumerate(deck) if t.name == "Tile_Starter"))
+    board.place_tile(0, 0, starter)
+    return board, deck, rng
+
+
+def grid_scan_candidates(board: Board) -> set:
+    """The empty-neighbour scan `get_legal_moves` used before the frontier existed (reference only)."""
+    candidates = set()
+    for (x, y) in board.grid:
+        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
+            if (x + dx, y + dy) not in board.grid:
+                candidates.add((x + dx, y + dy))
+    return candidates
+
+
+def bench_legal_moves(games: int, repeats: int):
+    per_turn: dict[int, list[tuple[float, float, int]]] = {}
+    for seed in range(games):
+        board, deck, rng = new_game(seed)
+        turn = 0
+        for tile in deck:
+            start = time.perf_counter()
+            for _ in range(repeats):
+                legal = board.get_legal_moves(tile)
+            elapsed = (time.perf_counter() - start) / repeats
+            if not legal:
+                continue
+            start = time.perf_counter()
+            for _ in range(repeats):
+                grid_scan_candidates(board)
+            scan = (time.perf_counter() - start) / repeats
+            turn += 1
+            per_turn.setdefault(turn, []).append((elapsed, scan, len(board.open_cells())))
+            x, y, rot = rng.choice(legal)
+            while tile.rotation != rot:
+                tile.rotate(1)
+            board.place_tile(x, y, tile)
+
+    print(f"get_legal_moves  ·  {games} games  ·  {repeats} calls per turn")
+    print(f"  {'turn':>4} {'frontier':>9} {'µs/call':>9} {'µs/cell':>9} {'grid scan µs':>13}")
+    for turn in sorted(per_turn):
+        if turn == 1 or turn % 10 == 0 or turn == max(per_turn):
+            samples = per_turn[turn]
+            call = sum(s[0] for s in samples) / len(samples)
+            scan = sum(s[1] for s in samples) / len(samples)
+            cells = sum(s[2] for s in samples) / len(samples)
+            print(f"  {turn:>4} {cells:>9.1f} {call * 1e6:>9.1f} {call / cells * 1e6:>9.2f} {scan * 1e6:>13.1f}")
+    print("  (grid scan = cost of only the full-grid neighbour walk the frontier replaces)")
+
+
+def play_random_game(seed: int) -> Board:
+    board, deck, rng = new_game(seed)
+    for tile in deck:
+        legal = board.get_legal_moves(tile)
+        if not legal:
+            continue
+        x, y, rot = rng.choice(legal)
+        while tile.rotation != rot:
+            tile.rotate(1)
+        board.place_tile(x, y, tile)
+    return board
+
+
+def measure(fn, repeats: int) -> tuple[float, int]:
+    """Returns (µs per call, bytes still allocated by one call)."""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeats
+    tracemalloc.start()
+    result = fn()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed * 1e6, size
+
+
+def bench_memory(repeats: int):
+    board = play_random_game(0)
+    print(f"memory  ·  {repeats} repeats  ·  board with {len(board.grid)} tiles")
+    print(f"  {'operation':<22} {'µs/call':>9} {'KiB':>8}")
+    for label, fn in [
+        ("create_deck()", create_deck),
+        ("copy.deepcopy(board)", lambda: copy.deepcopy(board)),
+    ]:
+        us, size = measure(fn, repeats)
+        print(f"  {label:<22} {us:>9.1f} {size / 1024:>8.1f}")
+
+
+def play_scored_game(seed: int, grid_backend: type = DictGrid) -> Board:
+    board, deck, rng = new_game(seed, grid_backend)
+    players = ("Player1", "Player2")
+    turn = 0
+    for tile in deck:
+        legal = board.get_legal_moves(tile)
+        if not legal:
+            continue
+        x, y, rot = rng.choice(legal)
+        while tile.rotation != rot:
+            tile.rotate(1)
+        board.place_tile(x, y, tile)
+        if rng.random() < 0.5:
+            board.place_meeple(x, y, rng.randrange(len(tile.segments)), players[turn % 2])
+        board.get_completed_features()
+        turn += 1
+    board.calculate_final_scores()
+    return board
+
+
+def bench_simulate(games: int):
+    start = time.perf_counter()
+    for seed in range(games):
+        play_scored_game(seed)
+    elapsed = time.perf_counter() - start
+    print(f"simulate  ·  {games} random games with scoring")
+    print(f"  {elapsed / games * 1e3:.2f} ms/game  ·  {games / elapsed:.1f} games/s")
+
+
+def bench_completion(games: int):
+    per_turn: dict[int, list[float]] = {}
+    players = ("Player1", "Player2")
+    for seed in range(games):
+        board, deck, rng = new_game(seed)
+        turn = 0
+        for tile in deck:
+            legal = board.get_legal_moves(tile)
+            if not legal:
+                continue
+            x, y, rot = rng.choice(legal)
+            while tile.rotation != rot:
+                tile.rotate(1)
+            board.place_tile(x, y, tile)
+            if rng.random() < 0.5:
+                board.place_meeple(x, y, rng.randrange(len(tile.segments)), players[turn % 2])
+            turn += 1
+            start = time.perf_counter()
+            board.get_completed_features()
+            per_turn.setdefault(turn, []).append(time.perf_counter() - start)
+
+    print(f"get_completed_features  ·  {games} games")
+    print(f"  {'turns':>7} {'µs/call':>9}")
+    for first in range(1, max(per_turn) + 1, 10):
+        samples = [t for turn in range(first, first + 10) for t in per_turn.get(turn, [])]
+        print(f"  {first:>3}-{first + 9:<3} {sum(samples) / len(samples) * 1e6:>9.1f}")
+
+
+def bench_apply_undo(repeats: int):
+    board, deck, rng = new_game(0)
+    for tile in deck[:35]:
+        legal = board.get_legal_moves(tile)
+        if legal:
+            x, y, rot = rng.choice(legal)
+            tile.rotation = rot
+            board.place_tile(x, y, tile)
+    tile = deck[35]
+    actions = [(x, y, rot, 0) for x, y, rot in board.get_legal_moves(tile)]
+
+    def in_place():
+        for action in actions:
+            board.apply(tile, action, "Player1")
+            board.undo()
+
+    def copied():
+        for x, y, rot, meeple in actions:
+            scratch = copy.deepcopy(board)
+            tile.rotation = rot
+            scratch.place_tile(x, y, tile)
+            scratch.place_meeple(x, y, meeple, "Player1")
+            scratch.get_completed_features()
+
+    print(f"apply-undo  ·  {len(board.grid)} tiles on board  ·  {len(actions)} candidate moves")
+    for label, fn in [("apply + undo", in_place), ("deepcopy + place", copied)]:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn()
+        elapsed = (time.perf_counter() - start) / repeats / len(actions)
+        print(f"  {label:<18} {elapsed * 1e6:>9.1f} µs/move")
+
+
+def bench_transpositions(positions: int):
+    visited = evaluated = 0
+    plain_time = cached_time = 0.0
+    for seed in range(positions):
+        board, deck, rng = new_game(seed)
+        for tile in deck[:30]:
+            legal = board.get_legal_moves(tile)
+            if legal:
+                x, y, rot = rng.choice(legal)
+                meeple = rng.randrange(len(tile.segments)) if rng.random() < 0.5 else None
+                board.apply(tile, (x, y, rot, meeple), "Player1" if board.to_move == 0 else "Player2")
+        first, second = deck[30], deck[31]
+
+        def search(evaluate):
+            leaves = 0
+            for a, b in ((first, second), (second, first)):
+                for x, y, rot in board.get_legal_moves(a):
+                    board.apply(a, (x, y, rot, None), "Player1")
+                    for bx, by, brot in board.get_legal_moves(b):
+                        board.apply(b, (bx, by, brot, None), "Player2")
+                        evaluate()
+                        leaves += 1
+                        board.undo()
+                    board.undo()
+            return leaves
+
+        def plain():
+            scores = board.project_final_scores()
+            return scores["Player1"] - scores["Player2"]
+
+        table = TranspositionTable()
+
+        def cached():
+            entry = table.get(board.zobrist)
+            if entry is None:
+                table.store(board.zobrist, 0, plain())
+
+        start = time.perf_counter()
+        search(plain)
+        plain_time += time.perf_counter() - start
+        start = time.perf_counter()
+        visited += search(cached)
+        cached_time += time.perf_counter() - start
+        evaluated += table.misses
+
+    print(f"transpositions  ·  {positions} positions after 30 tiles  ·  next two tiles in both orders")
+    print(f"  leaves visited     {visited:>9}")
+    print(f"  distinct positions {evaluated:>9}  ({1 - evaluated / visited:.0%} of evaluations skipped)")
+    print(f"  without table      {plain_time / visited * 1e6:>9.1f} µs/leaf")
+    print(f"  with table         {cached_time / visited * 1e6:>9.1f} µs/leaf")
+
+
+def bench_snapshot(repeats: int):
+    def timed(fn) -> float:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn()
+        return (time.perf_counter() - start) / repeats * 1e6
+
+    finished = play_scored_game(0)
+    board, deck, rng = new_game(1)
+    for tile in deck[:35]:
+        legal = board.get_legal_moves(tile)
+        if legal:
+            x, y, rot = rng.choice(legal)
+            tile.rotation = rot
+            board.place_tile(x, y, tile)
+    game = GameSnapshot(board, deck[36:], deck[35], "Player1", False, (0, 0), ("Human", "Star2.5"))
+
+    print(f"snapshot  ·  {repeats} repeats")
+    print(f"  {'state':<22} {'format':<10} {'bytes':>7} {'encode µs':>10} {'decode µs':>10}")
+    for label, state, encode, decode in [
+        (f"board, {len(finished.grid)} tiles", finished, encode_board, decode_board),
+        (f"game, {len(board.grid)} tiles + deck", game, encode_game, decode_game),
+    ]:
+        data = encode(state)
+        blob = pickle.dumps(state, pickle.HIGHEST_PROTOCOL)
+        print(f"  {label:<22} {'snapshot':<10} {len(data):>7} {timed(lambda: encode(state)):>10.1f} {timed(lambda: decode(data)):>10.1f}")
+        print(f"  {'':<22} {'pickle':<10} {len(blob):>7} {timed(lambda: pickle.dumps(state, pickle.HIGHEST_PROTOCOL)):>10.1f} {timed(lambda: pickle.loads(blob)):>10.1f}")
+        print(f"  {'':<22} {'deepcopy':<10} {'-':>7} {timed(lambda: copy.deepcopy(state)):>21.1f}")
+
+
+def bench_grid(games: int, repeats: int):
+    print(f"grid backends  ·  {games} random games with scoring")
+    print(f"  {'backend':<10} {'ms/game':>8} {'games/s':>8} {'neighbors µs':>13} {'final scores':>13}")
+    for backend in (DictGrid, DenseGrid):
+        start = time.perf_counter()
+        finals = [play_scored_game(seed, backend).scores for seed in range(games)]
+        elapsed = time.perf_counter() - start
+        board = play_scored_game(0, backend)
+        cells = list(board.frontier)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for x, y in cells:
+                board.grid.neighbors(x, y)
+        lookup = (time.perf_counter() - start) / repeats / len(cells)
+        checksum = sum(s["Player1"] * 1000 + s["Player2"] for s in finals)
+        print(f"  {backend.__name__:<10} {elapsed / games * 1e3:>8.2f} {games / elapsed:>8.1f} {lookup * 1e6:>13.2f} {checksum:>13}")
+
+
+def bench_score_move(games: int):
+    print(f"score-move  ·  {games} games  ·  every full action of the turn")
+    print(f"  {'turn':>4} {'actions':>8} {'score_move µs':>14} {'per turn ms':>12} {'deepcopy µs':>12}")
+    rows: dict[int, list[tuple[int, float, float]]] = {}
+    for seed in range(games):
+        board, deck, rng = new_game(seed)
+        turn = 0
+        for tile in deck:
+            legal = board.get_legal_moves(tile)
+            if not legal:
+                continue
+            turn += 1
+            player = "Player1" if board.to_move == 0 else "Player2"
+            if turn in (10, 30, 50, 70):
+                actions = [(x, y, rot, None) for x, y, rot in legal]
+                actions += [(x, y, rot, i) for x, y, rot in legal for i in board.meeple_options(tile, x, y, rot)]
+                start = time.perf_counter()
+                projected = board.project_final_scores()
+                for action in actions:
+                    board.score_move(tile, action, player, projected)
+                scored = time.perf_counter() - start
+                start = time.perf_counter()
+                for x, y, rot, meeple in actions[:10]:
+                    scratch = copy.deepcopy(board)
+                    scratch.apply(copy.deepcopy(tile), (x, y, rot, meeple), player)
+                    scratch.project_final_scores()
+                copied = (time.perf_counter() - start) / min(10, len(actions))
+                rows.setdefault(turn, []).append((len(actions), scored, copied))
+            x, y, rot = rng.choice(legal)
+            tile.rotation = rot
+            board.place_tile(x, y, tile)
+            if rng.random() < 0.3:
+                board.place_meeple(x, y, rng.randrange(len(tile.segments)), player)
+            board.get_completed_features()
+            board.end_turn(player)
+    for turn in sorted(rows):
+        samples = rows[turn]
+        actions = sum(s[0] for s in samples) / len(samples)
+        per_turn = sum(s[1] for s in samples) / len(samples)
+        copied = sum(s[2] for s in samples) / len(samples)
+        print(f"  {turn:>4} {actions:>8.1f} {per_turn / actions * 1e6:>14.1f} {per_turn * 1e3:>12.2f} {copied * 1e6:>12.1f}")
+
+
+def bench_evaluate(games: int, repeats: int):
+    print(f"evaluate  ·  {games} games  ·  every full action of the turn, {repeats} repeats")
+    print(f"  {'turn':>4} {'actions':>8} {'features ms':>12} {'model ms':>9} {'batch ms':>9} {'loop ms':>8} {'speed-up':>9}")
+    evaluator = MoveEvaluator.default()
+    rows: dict[int, list[tuple[int, float, float, float]]] = {}
+    sample = None
+    for seed in range(games):
+        board, deck, rng = new_game(seed)
+        turn = 0
+        for tile in deck:
+            legal = board.get_legal_moves(tile)
+            if not legal:
+                continue
+            turn += 1
+            player = "Player1" if board.to_move == 0 else "Player2"
+            if turn in (10, 30, 50, 70):
+                actions = list(board.legal_actions(tile, player))
+                start = time.perf_counter()
+                for _ in range(repeats):
+                    features = action_features(board, tile, actions, player)
+                extracted = (time.perf_counter() - start) / repeats
+                start = time.perf_counter()
+                for _ in range(repeats):
+                    evaluator.score(features)
+                scored = (time.perf_counter() - start) / repeats
+                start = time.perf_counter()
+                projected = board.project_final_scores()
+                for action in actions:
+                    board.score_move(tile, action, player, projected)
+                looped = time.perf_counter() - start
+                rows.setdefault(turn, []).append((len(actions), extracted, scored, looped))
+                sample = (actions, features)
+            x, y, rot = rng.choice(legal)
+            tile.rotation = rot
+            board.place_tile(x, y, tile)
+            if rng.random() < 0.3:
+                board.place_meeple(x, y, rng.randrange(len(tile.segments)), player)
+            board.get_completed_features()
+            board.end_turn(player)
+    for turn in sorted(rows):
+        samples = rows[turn]
+        actions, extracted, scored, looped = (sum(s[i] for s in samples) / len(samples) for i in range(4))
+        batch = extracted + scored
+        print(f"  {turn:>4} {actions:>8.1f} {extracted * 1e3:>12.3f} {scored * 1e3:>9.3f} {batch * 1e3:>9.3f} "
+              f"{looped * 1e3:>8.2f} {looped / batch:>8.1f}x")
+    if sample is not None:
+        actions, features = sample
+        print(f"  {len(FEATURE_NAMES)} features: {', '.join(FEATURE_NAMES)}")
+        for action, row in list(zip(actions, features))[:3]:
+            print(f"  {str(action):<22} {' '.join(f'{v:g}' for v in row)}")
+
+
+def bench_planes(games: int, repeats: int):
+    print(f"planes  ·  {games} games  ·  {N_PLANES} planes of 24x24, {repeats} repeats")
+    print(f"  {'turn':>4} {'tiles':>6} {'first µs':>9} {'cached µs':>10} {'apply+encode+undo µs':>21}")
+    rows: dict[int, list[tuple[int, float, float, float]]] = {}
+    boards = []
+    for seed in range(games):
+        board, deck, rng = new_game(seed)
+        turn = 0
+        for i, tile in enumerate(deck):
+            legal = board.get_legal_moves(tile)
+            if not legal:
+                continue
+            turn += 1
+            player = "Player1" if board.to_move == 0 else "Player2"
+            if turn in (10, 30, 50, 70) and i + 1 < len(deck):
+                start = time.perf_counter()
+                for _ in range(repeats):
+                    PlaneEncoder().encode(board)
+                first = (time.perf_counter() - start) / repeats
+                encoder = PlaneEncoder()
+                encoder.encode(board)
+                start = time.perf_counter()
+                for _ in range(repeats):
+                    encoder.encode(board)
+                cached = (time.perf_counter() - start) / repeats
+                nxt = deck[i + 1]
+                actions = list(board.legal_actions(nxt, player))[:repeats] or [None]
+                start = time.perf_counter()
+                for action in actions:
+                    if action is None: break
+                    board.apply(copy.copy(nxt), action, player)
+                    encoder.encode(board)
+                    board.undo()
+                step = (time.perf_counter() - start) / len(actions)
+                rows.setdefault(turn, []).append((len(board.grid), first, cached, step))
+                if turn == 50:
+                    boards.append(board)
+            x, y, rot = rng.choice(legal)
+            tile.rotation = rot
+            board.place_tile(x, y, tile)
+            if rng.random() < 0.3:
+                board.place_meeple(x, y, rng.randrange(len(tile.segments)), player)
+            board.get_completed_features()
+            board.end_turn(player)
+    for turn in sorted(rows):
+        samples = rows[turn]
+        tiles, first, cached, step = (sum(s[i] for s in samples) / len(samples) for i in range(4))
+        print(f"  {turn:>4} {tiles:>6.1f} {first * 1e6:>9.1f} {cached * 1e6:>10.1f} {step * 1e6:>21.1f}")
+    encoder = PlaneEncoder()
+    encoder.encode_batch(boards)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        batch = encoder.encode_batch(boards)
+    elapsed = (time.perf_counter() - start) / repeats
+    print(f"  encode_batch {batch.shape}: {elapsed / len(boards) * 1e6:.1f} µs per board")
+
+
+def bench_fits(games: int, repeats: int):
+    kinds = list(TILE_KINDS.values())
+    print(f"fits  ·  {games} games  ·  all {len(kinds)} tile kinds per query, {repeats} repeats")
+    print(f"  {'turn':>4} {'open':>5} {'legal-moves µs':>15} {'has_move µs':>12} {'update µs':>10} {'fill-prob µs':>13}")
+    rows: dict[int, list[tuple[int, float, float, float, float]]] = {}
+    for seed in range(games):
+        board, deck, rng = new_game(seed)
+        index = FitIndex(board, [t.kind.id for t in deck])
+        probe = [Tile(kind) for kind in kinds]
+        turn = 0
+        for i, tile in enumerate(deck):
+            index.draw(tile)
+            legal = board.get_legal_moves(tile)
+            if not legal:
+                continue
+            turn += 1
+            player = "Player1" if board.to_move == 0 else "Player2"
+            if turn in (10, 30, 50, 70):
+                start = time.perf_counter()
+                for _ in range(repeats):
+                    for t in probe: board.get_legal_moves(t)
+                scan = (time.perf_counter() - start) / repeats
+                start = time.perf_counter()
+                for _ in range(repeats):
+                    for t in probe: index.has_move(t)
+                lookup = (time.perf_counter() - start) / repeats
+                cells = list(index.cells)
+                start = time.perf_counter()
+                for _ in range(repeats):
+                    for pos in cells: index.fill_probability(pos)
+                fill = (time.perf_counter() - start) / repeats
+                x, y, rot = legal[0]
+                start = time.perf_counter()
+                for _ in range(repeats):
+                    board.apply(Tile(tile.kind), (x, y, rot, None), player)
+                    index.sync()
+                    board.undo()
+                    index.sync()
+                update = (time.perf_counter() - start) / repeats / 2
+                rows.setdefault(turn, []).append((len(cells), scan, lookup, update, fill))
+            x, y, rot = rng.choice(legal)
+            tile.rotation = rot
+            board.place_tile(x, y, tile)
+            if rng.random() < 0.3:
+                board.place_meeple(x, y, rng.randrange(len(tile.segments)), player)
+            board.get_completed_features()
+            board.end_turn(player)
+    for turn in sorted(rows):
+        samples = rows[turn]
+        cells, scan, lookup, update, fill = (sum(s[i] for s in samples) / len(samples) for i in range(5))
+        print(f"  {turn:>4} {cells:>5.1f} {scan * 1e6:>15.1f} {lookup * 1e6:>12.1f} {update * 1e6:>10.1f} {fill * 1e6:>13.1f}")
+
+
+def bench_deck(repeats: int):
+    def timed(fn) -> float:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn()
+        return (time.perf_counter() - start) / repeats * 1e6
+
+    tiles = create_deck()
+    random.Random(0).shuffle(tiles)
+    deck = Deck.shuffled(0)
+    kind = tiles[len(tiles) // 2].kind
+
+    def list_take():
+        i = next(i for i, t in enumerate(tiles) if t.kind is kind)
+        tiles.insert(i, tiles.pop(i))
+
+    def deck_take():
+        deck.take(kind)
+        deck.undo()
+
+    print(f"deck  ·  {len(tiles)} tiles, {repeats} repeats  ·  µs per operation")
+    print(f"  {'operation':<28} {'list of Tile':>13} {'Deck':>9}")
+    rows = [
+        ("deal a seeded game", timed(lambda: random.Random(0).shuffle(create_deck())), timed(lambda: Deck.shuffled(0))),
+        ("copy for a chance node", timed(lambda: copy.deepcopy(tiles)), timed(deck.unordered)),
+        ("take kind t and undo", timed(list_take), timed(deck_take)),
+        ("remaining kinds", timed(lambda: remaining_kinds(None, tiles[0], tiles)), timed(lambda: remaining_kinds(None, tiles[0], deck))),
+    ]
+    for name, before, after in rows:
+        print(f"  {name:<28} {before:>13.2f} {after:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("legal-moves", help="per-turn cost of Board.get_legal_moves")
+    p.add_argument("--games", type=int, default=20)
+    p.add_argument("--repeats", type=int, default=20)
+
+    p = sub.add_parser("memory", help="allocation cost of decks and board copies")
+    p.add_argument("--repeats", type=int, default=50)
+
+    p = sub.add_parser("simulate", help="full-game simulation throughput")
+    p.add_argument("--games", type=int, default=200)
+
+    p = sub.add_parser("completion", help="per-turn cost of completion scoring")
+    p.add_argument("--games", type=int, default=200)
+
+    p = sub.add_parser("apply-undo", help="in-place move exploration vs deepcopy")
+    p.add_argument("--repeats", type=int, default=20)
+
+    p = sub.add_parser("transpositions", help="duplicate positions skipped by the transposition table")
+    p.add_argument("--positions", type=int, default=20)
+
+    p = sub.add_parser("snapshot", help="binary snapshot size and speed vs pickle and deepcopy")
+    p.add_argument("--repeats", type=int, default=200)
+
+    p = sub.add_parser("grid", help="simulation throughput with the dict vs dense grid backend")
+    p.add_argument("--games", type=int, default=200)
+    p.add_argument("--repeats", type=int, default=200)
+
+    p = sub.add_parser("score-move", help="cost of rating every full action with Board.score_move vs deepcopy")
+    p.add_argument("--games", type=int, default=10)
+
+    p = sub.add_parser("evaluate", help="batched NumPy rating of every full action vs the Board.score_move loop")
+    p.add_argument("--games", type=int, default=10)
+    p.add_argument("--repeats", type=int, default=20)
+
+    p = sub.add_parser("planes", help="cost of encoding boards as feature planes, single, incremental and batched")
+    p.add_argument("--games", type=int, default=10)
+    p.add_argument("--repeats", type=int, default=50)
+
+    p = sub.add_parser("fits", help="tile playability and fill probabilities from the fit index vs move generation")
+    p.add_argument("--games", type=int, default=10)
+    p.add_argument("--repeats", type=int, default=50)
+
+    p = sub.add_parser("deck", help="counts-based Deck vs a list of Tile objects")
+    p.add_argument("--repeats", type=int, default=2000)
+
+    args = parser.parse_args()
+    if args.bench == "legal-moves":
+        bench_legal_moves(args.games, args.repeats)
+    elif args.bench == "memory":
+        bench_memory(args.repeats)
+    elif args.bench == "simulate":
+        bench_simulate(args.games)
+    elif args.bench == "completion":
+        bench_completion(args.games)
+    elif args.bench == "apply-undo":
+        bench_apply_undo(args.repeats)
+    elif args.bench == "transpositions":
+        bench_transpositions(args.positions)
+    elif args.bench == "snapshot":
+        bench_snapshot(args.repeats)
+    elif args.bench == "grid":
+        bench_grid(args.games, args.repeats)
+    elif args.bench == "score-move":
+        bench_score_move(args.games)
+    elif args.bench == "evaluate":
+        bench_evaluate(args.games, args.repeats)
+    elif args.bench == "planes":
+        bench_planes(args.games, args.repeats)
+    elif args.bench == "fits":
+        bench_fits(args.games, args.repeats)
+    elif args.bench == "deck":
+        bench_deck(args.repeats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+build_opening_book.py
+──────────────────────────────────────────────────────────────────────────────
+Builds the opening book (`src/logic/book.py`) the server memory-maps at
+startup from self-play.
+
+    python scripts_research/build_opening_book.py [--games 400] [--plies 4]
+        [--agent star] [--time 2.0] [--workers 4] [--min-visits 1]
+        [--seed 0] [--out assets/opening_book.bin]
+
+Plays the first `--plies` turns of `--games` seeded games between two copies
+of the search agent, with a longer think time than the server gives it, and
+records every position reached (with the tile drawn) under its canonical
+key. Each position's book move is the move the agent chose most often there;
+positions seen fewer than `--min-visits` times are left out. Games run in
+`--workers` processes.
+
+Prints the positions per ply, how many of them the book merged by symmetry
+and, for fresh seeds after the training ones played from the book alone,
+how often each ply is still in the book.
+──────────────────────────────────────────────────────────────────────────────
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logic.engine import PLAYERS
+from src.logic.agents import MCTSAgent, StarAgent
+from src.logic.book import BookBuilder, OpeningBook, canonical_key, canonical_action
+from src.logic.simulator import new_game
+
+AGENTS = {"star": StarAgent, "mcts": MCTSAgent}
+
+
+def opening(seed: int, plies: int, agent: str, think: float) -> list:
+    """(ply, key, canonical move, tiles on the board, raw position id) of the first `plies` turns of
+    one self-play game."""
+    board, deck = new_game(seed)
+    agents = [AGENTS[agent](p, time_limit=think) for p in PLAYERS]
+    records = []
+    for ply in range(plies):
+        while deck:
+            tile = deck.draw()
+            legal = board.get_legal_moves(tile)
+            if legal: break
+        else:
+            break
+        player = PLAYERS[board.to_move]
+        action = agents[board.to_move].select_move(board, tile, legal, board.meeple_counts[player], len(deck), deck=deck)
+        key, t = canonical_key(board, tile)
+        records.append((ply, key, canonical_action(tile, action, t), len(board.grid), (board.zobrist, tile.kind.id)))
+        x, y, rot, meeple = action
+        tile.rotation = rot
+        board.place_tile(x, y, tile)
+        if meeple is not None:
+            board.place_meeple(x, y, meeple, player)
+        board.get_completed_features()
+        board.end_turn(player)
+    return records
+
+
+def _opening(job):
+    return opening(*job)
+
+
+def coverage(book: OpeningBook, seeds, plies: int) -> Counter:
+    """Games per ply whose position is still in the book when both sides play book moves."""
+    hits = Counter()
+    for seed in seeds:
+        board, deck = new_game(seed)
+        for ply in range(plies):
+            while deck:
+                tile = deck.draw()
+                legal = board.get_legal_moves(tile)
+                if legal: break
+            else:
+                break
+            player = PLAYERS[board.to_move]
+            hit = book.lookup(board, tile, player)
+            if hit is None:
+                break
+            hits[ply] += 1
+            x, y, rot, meeple = hit.action
+            tile.rotation = rot
+            board.place_tile(x, y, tile)
+            if meeple is not None:
+                board.place_meeple(x, y, meeple, player)
+            board.get_completed_features()
+            board.end_turn(player)
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=400)
+    parser.add_argument("--plies", type=int, default=4)
+    parser.add_argument("--agent", choices=sorted(AGENTS), default="star")
+    parser.add_argument("--time", type=float, default=2.0, help="think time per move in seconds")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--min-visits", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=os.path.join("assets", "opening_book.bin"))
+    args = parser.parse_args()
+
+    jobs = [(args.seed + game, args.plies, args.agent, args.time) for game in range(args.games)]
+    start = time.perf_counter()
+    with Pool(args.workers) as pool:
+        games = pool.map(_opening, jobs, chunksize=1)
+    seconds = time.perf_counter() - start
+
+    builder = BookBuilder()
+    raw, canonical = [set() for _ in range(args.plies)], [set() for _ in range(args.plies)]
+    for records in games:
+        for ply, key, move, tiles, position in records:
+            builder.add_record(key, move, tiles)
+            raw[ply].add(position)
+            canonical[ply].add(key)
+    positions = builder.save(args.out, args.min_visits)
+    print(f"{args.games} self-play openings ({args.agent}, {args.time:.2f}s per move) in {seconds:.1f}s on {args.workers} workers")
+    for ply in range(args.plies):
+        print(f"  ply {ply + 1}: {len(raw[ply]):5d} positions, {len(canonical[ply]):5d} after symmetry")
+    print(f"Wrote {positions} positions ({os.path.getsize(args.out)} bytes) to {args.out}")
+
+    book = OpeningBook.open(args.out)
+    held_out = range(args.seed + args.games, args.seed + args.games + 200)
+    hits = coverage(book, held_out, args.plies)
+    print("Held-out games in book: " + ", ".join(f"ply {ply + 1} {hits[ply] / len(held_out):.0%}" for ply in range(args.plies)))
+    book.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+check_apply_undo.py
+──────────────────────────────────────────────────────────────────────────────
+Randomised property check for `Board.apply` / `Board.undo`.
+
+    python scripts_research/check_apply_undo.py [--cases 500] [--seed 0]
+
+For positions taken from seeded random games, a random sequence of 1-4 moves
+(tile, rotation, random meeple index) is applied in place and then undone.
+The check asserts that
+
+  * after every `apply`, scores, meeples and the Zobrist hash equal those of
+    the same moves played on a `copy.deepcopy` of the board through the
+    normal API, and the hash equals one recomputed from scratch,
+  * `Board.meeple_options` lists exactly the segments `place_meeple` accepts
+    right after the placement,
+  * `Board.score_move` predicts each move's score deltas and leaves the
+    board unchanged, and
+  * after undoing everything, every container of the board (grid, frontier,
+    DSU arrays, monastery state, queues, scores and meeple counts, dict order
+    included) and every tile involved is identical to the starting state.
+──────────────────────────────────────────────────────────────────────────────
+"""
+
+import argparse
+import copy
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logic.engine import Board, PLAYERS, Z_TILE, Z_MEEPLE, Z_SCORE, Z_TO_MOVE, zobrist_key
+from src.logic.deck import create_deck
+
+
+def tile_state(tile) -> tuple:
+    return (id(tile), tile.kind.id, tile.rotation,
+            None if tile.segment_ids is None else tuple(tile.segment_ids),
+            None if tile.meeples is None else tuple(tile.meeples))
+
+
+def board_state(board: Board) -> tuple:
+    """Everything `apply` may touch, as plain comparable values (dict order included)."""
+    dsus = []
+    for st, dsu in board.dsu.items():
+        dsus.append((st, list(dsu.parent), list(dsu.next), list(dsu.size), list(dsu.tiles), list(dsu.pennants),
+                     list(dsu.open_edges), [None if s is None else tuple(s) for s in dsu.shared],
+                     [list(m) for m in dsu.meeples], list(dsu.owners)))
+    return (
+        [(pos, tile_state(t)) for pos, t in board.grid.items()],
+        [(pos, None if c is None else tuple(c)) for pos, c in board.frontier.items()],
+        dsus,
+        list(board.monasteries.items()), list(board.monastery_counts.items()),
+        list(board.pending_monasteries), list(board.pending_features),
+        list(board.field_cities), list(board.meeple_segments),
+        list(board.scores.items()), list(board.meeple_counts.items()), board.to_move, board.zobrist,
+        board._journal, list(board._frames),
+    )
+
+
+def zobrist_from_scratch(board: Board) -> int:
+    """Board hash recomputed from the visible position, to check the incremental updates."""
+    z = zobrist_key(Z_TO_MOVE, 0, 0, 0, board.to_move)
+    for p, name in enumerate(PLAYERS):
+        z ^= zobrist_key(Z_SCORE, 0, 0, board.scores[name], p)
+    for (x, y), tile in board.grid.items():
+        z ^= zobrist_key(Z_TILE, x, y, tile.kind.id, tile.rotation // 90)
+        for i, owner in enumerate(tile.meeples):
+            if owner is not None: z ^= zobrist_key(Z_MEEPLE, x, y, i, board.player_index[owner])
+    return z
+
+
+def meeple_accepted(board: Board, x: int, y: int, segment_index: int) -> bool:
+    """Whether place_meeple takes a meeple on the just placed tile (tried on a copy, meeples refilled)."""
+    scratch = copy.deepcopy(board)
+    scratch.meeple_counts[PLAYERS[0]] = 7
+    return scratch.place_meeple(x, y, segment_index, PLAYERS[0])
+
+
+def random_position(rng: random.Random):
+    """Board after a random number of random turns, plus the tiles still in the deck."""
+    deck = create_deck()
+    rng.shuffle(deck)
+    board = Board()
+    board.place_tile(0, 0, deck.pop(next(i for i, t in enumerate(deck) if t.name == "Tile_Starter")))
+    for turn in range(rng.randrange(len(deck))):
+        tile = deck.pop()
+        legal = board.get_legal_moves(tile)
+        if not legal:
+            continue
+        x, y, rot = rng.choice(legal)
+        tile.rotation = rot
+        board.place_tile(x, y, tile)
+        if rng.random() < 0.4:
+            board.place_meeple(x, y, rng.randrange(len(tile.segments)), PLAYERS[turn % 2])
+        board.get_completed_features()
+        board.end_turn(PLAYERS[turn % 2])
+    return board, deck
+
+
+def check_case(rng: random.Random) -> int:
+    board, deck = random_position(rng)
+    # Outside apply, find() compresses DSU paths; do it once so the snapshots below see final paths
+    board.project_final_scores()
+    before = board_state(board)
+    mirror = copy.deepcopy(board)
+    tiles = []
+    for depth in range(rng.randint(1, 4)):
+        if not deck:
+            break
+        tile = deck.pop(rng.randrange(len(deck)))
+        legal = board.get_legal_moves(tile)
+        if not legal:
+            continue
+        x, y, rot = rng.choice(legal)
+        meeple = rng.randrange(len(tile.segments) + 1) if rng.random() < 0.6 else None
+        player = PLAYERS[board.to_move]
+        tiles.append((tile, tile_state(tile)))
+
+        # score_move must predict the move's effect and leave the board untouched
+        scores, projected, state = dict(board.scores), board.project_final_scores(), board_state(board)
+        delta = board.score_move(tile, (x, y, rot, meeple), player)
+        assert board_state(board) == state, "score_move changed the board"
+
+        options = board.meeple_options(tile, x, y, rot)
+        completed = board.apply(tile, (x, y, rot, meeple), player)
+        twin = copy.deepcopy(tile)
+        twin.rotation = rot
+        assert mirror.place_tile(x, y, twin)
+        assert options == [i for i in range(len(twin.segments)) if meeple_accepted(mirror, x, y, i)]
+        if meeple is not None:
+            mirror.place_meeple(x, y, meeple, player)
+        assert completed == mirror.get_completed_features()
+        mirror.end_turn(player)
+        assert board.scores == mirror.scores and board.meeple_counts == mirror.meeple_counts
+        assert board.zobrist == mirror.zobrist == zobrist_from_scratch(board)
+        assert board.project_final_scores() == mirror.project_final_scores()
+        assert delta.completed == completed
+        assert delta.immediate == {p: board.scores[p] - scores[p] for p in PLAYERS}
+        assert delta.projected == {p: board.project_final_scores()[p] - projected[p] for p in PLAYERS}
+
+    for _ in tiles:
+        board.undo()
+    assert board_state(board) == before, "apply/undo did not restore the board"
+    for tile, state in tiles:
+        assert tile_state(tile) == state, f"{tile} was not restored"
+    return len(tiles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    moves = sum(check_case(rng) for _ in range(args.cases))
+    print(f"OK: {args.cases} cases, {moves} moves applied and undone with an identical board")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+check_batch.py
+──────────────────────────────────────────────────────────────────────────────
+Cross-check of the vectorized batch simulator in `src/logic/batch.py`.
+
+    python scripts_research/check_batch.py [--games 200] [--sample 50] [--seed 0]
+
+Plays `--games` games in one `BatchSimulator` batch for every pairing of the
+batch policies, then replays a sample of them move by move on a `Board`
+dealt by `simulator.new_game` with the same seed. Every turn must offer the
+same number of legal placements, accept or reject the same meeple and end
+with the same scores; the final scores, meeples left, turns and discards
+must match the batch report.
+──────────────────────────────────────────────────────────────────────────────
+"""
+
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logic.engine import PLAYERS
+from src.logic.batch import BatchSimulator, POLICIES
+from src.logic.simulator import new_game
+
+
+def replay(batch: BatchSimulator, game: int):
+    board, deck = new_game(batch.seed + game)
+    result = batch.report().results[game]
+    turns = discarded = 0
+    for turn, (x, y, rot, placed, tried) in enumerate(batch.game_moves(game)):
+        while True:
+            tile = deck.draw()
+            legal = board.get_legal_moves(tile)
+            if legal: break
+            discarded += 1
+        where = f"game {game} turn {turn} ({tile.name})"
+        assert len(legal) == batch.legal_counts[game, turn], f"{where}: {len(legal)} legal moves, batch saw {batch.legal_counts[game, turn]}"
+        assert (x, y, rot) in legal, f"{where}: batch played an illegal move {(x, y, rot)}"
+        player = PLAYERS[board.to_move]
+        tile.rotation = rot
+        board.place_tile(x, y, tile)
+        if tried is not None:
+            accepted = board.place_meeple(x, y, tried, player)
+            assert accepted == (placed is not None), f"{where}: meeple on segment {tried} accepted={accepted} on the board"
+        board.get_completed_features()
+        board.end_turn(player)
+        scores = tuple(board.scores[p] for p in PLAYERS)
+        assert scores == tuple(batch.turn_scores[game, turn]), f"{where}: scores {scores}, batch {tuple(batch.turn_scores[game, turn])}"
+        turns += 1
+    # The batch game ends when its deck runs out, discards included
+    for tile in deck:
+        assert not board.get_legal_moves(tile), f"game {game}: batch stopped with {tile.name} still playable"
+        discarded += 1
+    board.calculate_final_scores()
+    expected = (tuple(board.scores[p] for p in PLAYERS), tuple(board.meeple_counts[p] for p in PLAYERS), turns, discarded)
+    assert expected == (result.scores, result.meeples_left, result.turns, result.discarded), f"game {game}: board {expected}, batch {result}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--sample", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    checked = 0
+    for policies in [(a, b) for a in POLICIES for b in POLICIES]:
+        batch = BatchSimulator(args.games, seed=args.seed, policies=policies)
+        batch.run()
+        for game in rng.sample(range(args.games), min(args.sample, args.games)):
+            replay(batch, game)
+            checked += 1
+    print(f"OK: {checked} batch games replayed identically on Board")
+
+
+if __name__ == "__main__":
+    main()
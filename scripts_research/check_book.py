@@ -0,0 +1,166 @@
+"""
+check_book.py
+──────────────────────────────────────────────────────────────────────────────
+Reference check for the opening book in `src/logic/book.py`.
+
+    python scripts_research/check_book.py [--games 200] [--plies 6] [--seed 0]
+
+Plays the first turns of seeded random games and, next to each, its image
+under a random symmetry of the grid (rotation and/or reflection, starter
+included), with every tile replaced by a kind and rotation with the
+transformed geometry (reflected games drawing the chiral O and P tiles stop
+there). Then checks that:
+
+  * a position and its image get the same canonical key,
+  * a book built from the original games, written to disk and memory-mapped,
+    returns for every recorded position its recorded move, and for the
+    image position the image of that move (up to the symmetries of the
+    position itself),
+  * positions that were never recorded are not found, and the book records
+    the most tiles on the board in any of its positions (past which lookup
+    does not probe it).
+──────────────────────────────────────────────────────────────────────────────
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logic.engine import Board, PLAYERS
+from src.logic.deck import KINDS
+from src.logic.book import BookBuilder, OpeningBook, TRANSFORMS, canonical_key, canonical_action, _PLACED, _encode, _cell
+from src.logic.models import Tile
+from src.logic.simulator import new_game
+
+# Layout code -> the first (kind id, step) placing that geometry
+_BY_CODE = {}
+for _kind in KINDS:
+    for _step in range(4):
+        _BY_CODE.setdefault(_PLACED[(_kind.id, _step, 0)][0], (_kind.id, _step))
+
+
+def transformed(kind_id: int, step: int, t: int):
+    """(kind id, step, segment index map) of a tile with the geometry of (kind_id, step) under
+    TRANSFORMS[t], or None."""
+    code, masks = _PLACED[(kind_id, step, t)]
+    if code not in _BY_CODE: return None
+    other, other_step = _BY_CODE[code]
+    other_masks = _PLACED[(other, other_step, 0)][1]
+    return other, other_step, [other_masks.index(mask) for mask in masks]
+
+
+def image_action(tile: Tile, action, t: int):
+    x, y, rot, meeple = action
+    kind, step, segments = transformed(tile.kind.id, rot // 90, t)
+    return kind, (*_cell(x, y, *TRANSFORMS[t]), step * 90, None if meeple is None else segments[meeple])
+
+
+def canonical_forms(board: Board, tile: Tile, action) -> set:
+    """`action` through every transform taking the position to its canonical form; a symmetric
+    position has several, and equivalent actions then share one of these forms."""
+    encodings = [_encode(board, tile.kind, t) for t in range(len(TRANSFORMS))]
+    best = min(encodings)
+    return {canonical_action(tile, action, t) for t, data in enumerate(encodings) if data == best}
+
+
+def play(board: Board, tile: Tile, action):
+    x, y, rot, meeple = action
+    player = PLAYERS[board.to_move]
+    tile.rotation = rot
+    assert board.place_tile(x, y, tile), f"illegal move {action} for {tile.name}"
+    if meeple is not None:
+        board.place_meeple(x, y, meeple, player)
+    board.get_completed_features()
+    board.end_turn(player)
+
+
+def game(rng: random.Random, plies: int):
+    """(board, tile, action, image board, image tile, image action) of every turn of one opening
+    and of its image under a random non-identity transform, yielded before the move is played."""
+    board, deck = new_game(rng.randrange(1 << 30))
+    t = rng.randrange(1, len(TRANSFORMS))
+    starter = board.grid[(0, 0)]
+    kind, step, _ = transformed(starter.kind.id, 0, t)
+    image = Board()
+    image.place_tile(0, 0, Tile(KINDS[kind], step * 90))
+    turns = 0
+    while deck and turns < plies:
+        tile = deck.draw()
+        legal = board.get_legal_moves(tile)
+        if not legal: continue
+        if any(transformed(tile.kind.id, step, t) is None for step in range(4)): break
+        player = PLAYERS[board.to_move]
+        action = rng.choice(list(board.legal_actions(tile, player)))
+        kind, image_move = image_action(tile, action, t)
+        image_tile = Tile(KINDS[kind])
+        turns += 1
+        yield board, tile, action, image, image_tile, image_move, t
+        play(board, tile, action)
+        play(image, image_tile, image_move)
+        assert board.scores == image.scores, "image game scored differently"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--plies", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    builder = BookBuilder()
+    recorded = {}
+    positions, tiles = 0, 0
+    for _ in range(args.games):
+        for board, tile, action, image, image_tile, image_move, t_image in game(rng, args.plies):
+            key, t = canonical_key(board, tile)
+            assert canonical_key(image, image_tile)[0] == key, f"image of a position with {tile.name} under {TRANSFORMS[t_image]} has another key"
+            if key not in recorded:
+                builder.add(board, tile, action)
+                recorded[key] = canonical_action(tile, action, t)
+                tiles = max(tiles, len(board.grid))
+            positions += 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "book.bin")
+        assert builder.save(path) == len(recorded)
+        book = OpeningBook.open(path)
+        assert book.tiles == tiles, f"book records {book.tiles} tiles on the board, its deepest position has {tiles}"
+        rng = random.Random(args.seed)
+        found = 0
+        for _ in range(args.games):
+            for board, tile, action, image, image_tile, image_move, t_image in game(rng, args.plies):
+                key, t = canonical_key(board, tile)
+                hit = book.lookup(board, tile)
+                assert hit is not None, "recorded position missing from the book"
+                assert canonical_action(tile, hit.action, t) == recorded[key], "book move differs from the recorded one"
+                image_hit = book.lookup(image, image_tile)
+                assert image_hit is not None, "image position missing from the book"
+                _, expected = image_action(tile, hit.action, t_image)
+                assert canonical_forms(image, image_tile, image_hit.action) & canonical_forms(image, image_tile, expected), \
+                    f"book move in the image position is not the image of {hit.action}"
+                found += 2
+        # Positions one random move further than the recorded openings are not in the book
+        misses = 0
+        rng = random.Random(args.seed + 1)
+        for _ in range(50):
+            board, deck = new_game(rng.randrange(1 << 30))
+            for _ in range(args.plies + 1):
+                tile = deck.draw()
+                actions = list(board.legal_actions(tile, PLAYERS[board.to_move]))
+                if actions: play(board, tile, rng.choice(actions))
+            tile = deck.draw()
+            if board.get_legal_moves(tile) and canonical_key(board, tile)[0] not in recorded:
+                assert book.lookup(board, tile) is None, "unrecorded position found in the book"
+                misses += 1
+        book.close()
+    print(f"OK: {positions} positions matched their image, {len(recorded)} book entries, "
+          f"{found} lookups returned the recorded move or its image, {misses} unrecorded positions not found")
+
+
+if __name__ == "__main__":
+    main()
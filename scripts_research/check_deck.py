@@ -0,0 +1,117 @@
+"""
+check_deck.py
+──────────────────────────────────────────────────────────────────────────────
+Property check for the counts-based `Deck` in `src/logic/deck.py`.
+
+    python scripts_research/check_deck.py [--cases 500] [--seed 0]
+
+  * `Deck.shuffled(seed, without=("Tile_Starter",))` deals the same kinds in
+    the same order as `create_deck()` shuffled by `random.Random(seed)` with
+    its starter taken out (the deal `simulator.new_game(seed)` plays),
+  * random sequences of `draw`, `take` and `undo` on ordered and unordered
+    decks match a plain list model (counts, totals, remaining order, the
+    kind of every drawn tile), and undoing everything restores the start,
+  * clones are independent of the original, and
+  * `sample_kind` follows the counts (chi-square over many samples).
+──────────────────────────────────────────────────────────────────────────────
+"""
+
+import argparse
+import os
+import random
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logic.deck import Deck, KINDS, create_deck
+
+
+def same(deck: Deck, model: list, ordered: bool):
+    assert deck.total == len(deck) == len(model), "total"
+    assert deck.counts == [model.count(k) for k in range(len(KINDS))], "counts"
+    if ordered:
+        assert deck.kind_ids() == model, "order"
+        for kind_id, slots in enumerate(deck._slots):
+            assert slots == sorted((i + deck.pos for i, k in enumerate(model) if k == kind_id), reverse=True), "slots"
+    else:
+        assert sorted(deck.kind_ids()) == sorted(model), "kinds"
+
+
+def check_case(rng: random.Random) -> int:
+    seed = rng.randrange(1 << 30)
+    tiles = create_deck()
+    random.Random(seed).shuffle(tiles)
+    tiles.pop(next(i for i, t in enumerate(tiles) if t.name == "Tile_Starter"))
+    deck = Deck.shuffled(seed, without=("Tile_Starter",))
+    assert deck.kind_ids() == [t.kind.id for t in tiles], f"seed {seed} deals differently"
+
+    ops = 0
+    for deck in (deck, deck.unordered()):
+        ordered = deck.order is not None
+        model = deck.kind_ids()
+        start = list(model)
+        undo = []
+        for _ in range(rng.randrange(1, 120)):
+            op = rng.random()
+            if op < 0.35 and deck:
+                tile = deck.draw()
+                if ordered:
+                    assert tile.kind.id == model[0], "draw out of order"
+                model.remove(tile.kind.id)
+                undo.append((tile.kind.id, 0))  # a draw comes from the front: nothing to swap back
+            elif op < 0.7 and deck:
+                kind_id = rng.choice(model)
+                deck.take(kind_id)
+                if ordered:
+                    # An ordered take moves the first copy of the kind to the front and draws it
+                    i = model.index(kind_id)
+                    model[0], model[i] = model[i], model[0]
+                    undo.append((model.pop(0), i))
+                else:
+                    model.remove(kind_id)
+                    undo.append((kind_id, 0))
+            elif undo:
+                deck.undo()
+                kind_id, i = undo.pop()
+                model.insert(0, kind_id)
+                model[0], model[i] = model[i], model[0]
+            ops += 1
+            same(deck, model, ordered)
+            if rng.random() < 0.05:
+                copy = deck.clone()
+                if copy:
+                    copy.take(rng.choice(copy.kind_ids()))
+                same(deck, model, ordered)
+        while undo:
+            deck.undo()
+            undo.pop()
+        same(deck, start, ordered)
+    return ops
+
+
+def check_sampling(rng: random.Random, samples: int = 200_000):
+    deck = Deck.full(random.Random(rng.randrange(1 << 30)))
+    seen = Counter(deck.sample_kind() for _ in range(samples))
+    chi2 = sum((seen[k] - samples * c / deck.total) ** 2 / (samples * c / deck.total)
+               for k, c in enumerate(deck.counts) if c)
+    # 24 degrees of freedom: 0.1% critical value is about 51
+    assert chi2 < 51, f"sample_kind skewed (chi-square {chi2:.1f})"
+    return chi2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    ops = sum(check_case(rng) for _ in range(args.cases))
+    chi2 = check_sampling(rng)
+    print(f"OK: {args.cases} seeded decks dealt as a shuffled create_deck(), {ops} draw/take/undo steps matched the list model, "
+          f"sampling chi-square {chi2:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+check_endgame.py
+──────────────────────────────────────────────────────────────────────────────
+Reference check for the exact endgame solver in `src/logic/endgame.py`.
+
+    python scripts_research/check_endgame.py [--cases 12] [--two 0] [--seed 0]
+
+Plays seeded random games down to their last tiles and, for `--cases`
+positions with one tile left after the one in hand (and `--two` with two;
+the reference takes minutes on each of those), compares `EndgameSolver`
+with a plain expectimax written straight from the rules — no memo, no
+duplicate pruning, every legal action tried:
+
+  * the solver's value equals the reference value of the position,
+  * the action it returns reaches that value under the reference,
+  * the board it was given is left untouched,
+  * with a node cap too small to finish it returns None.
+
+Also reports how often the solver's move beats StarAgent's in expectation.
+──────────────────────────────────────────────────────────────────────────────
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logic.engine import Board, PLAYERS
+from src.logic.deck import KINDS
+from src.logic.endgame import EndgameSolver
+from src.logic.agents import StarAgent
+from src.logic.models import Tile
+from src.logic.simulator import new_game
+from src.logic.snapshot import encode_board
+
+
+def margin(board: Board) -> float:
+    projected = board.project_final_scores()
+    return projected[PLAYERS[0]] - projected[PLAYERS[1]]
+
+
+def after(board: Board, kind: int, pool: Counter) -> float:
+    """Reference value of the position once the tile `kind` has been drawn."""
+    player = PLAYERS[board.to_move]
+    values = []
+    for action in list(board.legal_actions(Tile(KINDS[kind]), player)):
+        board.apply(Tile(KINDS[kind]), action, player)
+        values.append(draw(board, pool))
+        board.undo()
+    return max(values) if board.to_move == 0 else min(values)
+
+
+def draw(board: Board, pool: Counter) -> float:
+    total = sum(pool.values())
+    if total == 0:
+        return margin(board)
+    value = 0.0
+    for kind, count in list(pool.items()):
+        if count <= 0: continue
+        pool[kind] -= 1
+        if board.get_legal_moves(Tile(KINDS[kind])):
+            value += count / total * after(board, kind, pool)
+        else:
+            value += count / total * draw(board, pool)
+        pool[kind] += 1
+    return value
+
+
+def action_value(board: Board, tile: Tile, action, pool: Counter) -> float:
+    board.apply(Tile(tile.kind), action, PLAYERS[board.to_move])
+    value = draw(board, pool)
+    board.undo()
+    return value
+
+
+def endgame_position(rng: random.Random, left: int):
+    """A random game played until `left` tiles remain after the one in hand."""
+    board, deck = new_game(rng.randrange(1 << 30))
+    while True:
+        tile = deck.draw()
+        legal = board.get_legal_moves(tile)
+        if not legal: continue
+        if len(deck) == left:
+            return board, tile, deck
+        x, y, rot = rng.choice(legal)
+        player = PLAYERS[board.to_move]
+        tile.rotation = rot
+        board.place_tile(x, y, tile)
+        if rng.random() < 0.3:
+            board.place_meeple(x, y, rng.randrange(len(tile.segments)), player)
+        board.get_completed_features()
+        board.end_turn(player)
+
+
+def check_case(rng: random.Random, left: int, star: bool) -> tuple:
+    board, tile, deck = endgame_position(rng, left)
+    player = PLAYERS[board.to_move]
+    pool = Counter(t.kind.id for t in deck)
+    before = encode_board(board)
+
+    solver = EndgameSolver(threshold=left, max_nodes=10 ** 7, time_limit=None)
+    action = solver.solve(board, tile, player, deck)
+    assert encode_board(board) == before, "solve modified the board"
+    assert action is not None and solver.stats["solved"], "solver gave up without a cap"
+
+    expected = after(board, tile.kind.id, pool)
+    assert math.isclose(solver.stats["value"], expected, abs_tol=1e-9), f"value {solver.stats['value']} != reference {expected}"
+    chosen = action_value(board, tile, action, pool)
+    assert math.isclose(chosen, expected, abs_tol=1e-9), f"chosen action is worth {chosen}, best is {expected}"
+
+    capped = EndgameSolver(threshold=left, max_nodes=1, time_limit=None)
+    assert capped.solve(board, tile, player, deck) is None and not capped.stats["solved"], "cap ignored"
+
+    gain = None
+    if star:
+        move = StarAgent(player, time_limit=0.2).select_move(board, tile, board.get_legal_moves(tile), board.meeple_counts[player], len(deck))
+        star_value = action_value(board, tile, move, pool)
+        gain = (chosen - star_value) * (1 if board.to_move == 0 else -1)
+    return solver.stats["nodes"], solver.stats["seconds"], gain
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=12)
+    parser.add_argument("--two", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    gains = []
+    for left, cases in ((1, args.cases), (2, args.two)):
+        nodes = seconds = 0.0
+        for _ in range(cases):
+            n, s, gain = check_case(rng, left, star=left == 1)
+            nodes += n
+            seconds += s
+            if gain is not None: gains.append(gain)
+        if cases:
+            print(f"  {left} tile(s) left: {cases} positions, {nodes / cases:.0f} nodes and {seconds / cases:.2f}s per solve")
+    better = sum(1 for g in gains if g > 1e-9)
+    print(f"OK: {args.cases + args.two} endgames matched the reference expectimax; solver beat StarAgent in "
+          f"{better}/{len(gains)} positions (mean +{sum(gains) / max(len(gains), 1):.2f} points)")
+
+
+if __name__ == "__main__":
+    main()
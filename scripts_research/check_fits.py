@@ -0,0 +1,145 @@
+"""
+check_fits.py
+──────────────────────────────────────────────────────────────────────────────
+Reference check for the deck-aware fit index in `src/logic/fits.py`.
+
+    python scripts_research/check_fits.py [--cases 200] [--seed 0]
+
+Plays seeded random games and, after random turns, compares the index with
+brute force over `Board.get_legal_moves`:
+
+  * `has_move` for every tile kind and `placements` for every open cell
+    equal the legal moves grouped by cell,
+  * `fitting_tiles` and `playable_probability` equal counts over the tiles
+    actually left in the deck,
+  * a city, road or monastery `completable` rules out is never completed
+    later in the game.
+
+The same index is then kept across `Board.apply`/`Board.undo` sequences to
+check that it follows placements and take-backs.
+──────────────────────────────────────────────────────────────────────────────
+"""
+
+import argparse
+import os
+import random
+import sys
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logic.engine import Board, PLAYERS
+from src.logic.deck import KINDS, create_deck
+from src.logic.fits import FitIndex
+from src.logic.models import SegmentType, Tile
+
+
+def compare(index: FitIndex, board: Board, deck: list):
+    expected = defaultdict(dict)
+    for kind in KINDS:
+        legal = board.get_legal_moves(Tile(kind))
+        assert index.has_move(kind) == bool(legal), f"has_move({kind.name})"
+        for x, y, rot in legal:
+            expected[(x, y)].setdefault(kind.id, []).append(rot // 90)
+    open_cells = [pos for pos, constraint in board.frontier.items() if constraint is not None]
+    for pos in open_cells:
+        got = {kind_id: sorted(steps) for kind_id, steps in index.placements(pos)}
+        assert got == {k: sorted(v) for k, v in expected.get(pos, {}).items()}, f"placements{pos}"
+        fit = sum(1 for tile in deck if tile.kind.id in expected.get(pos, {}))
+        assert index.fitting_tiles(pos) == fit, f"fitting_tiles{pos}"
+    if deck:
+        playable = sum(1 for tile in deck if index.has_move(tile)) / len(deck)
+        assert abs(index.playable_probability() - playable) < 1e-12, "playable_probability"
+
+
+def features(board: Board):
+    """(x, y, segment index) of one segment of every city, road and monastery on the board."""
+    seen = set()
+    for (x, y), tile in board.grid.items():
+        for i, segment in enumerate(tile.segments):
+            if segment.is_monastery or segment.type is SegmentType.MONASTERY:
+                yield x, y, i
+            elif segment.type in (SegmentType.CITY, SegmentType.ROAD):
+                key = (segment.type, board.dsu[segment.type].root(tile.segment_ids[i]))
+                if key not in seen:
+                    seen.add(key)
+                    yield x, y, i
+
+
+def closed(board: Board, x: int, y: int, i: int) -> bool:
+    segment = board.grid[(x, y)].segments[i]
+    if segment.is_monastery or segment.type is SegmentType.MONASTERY:
+        return board.monastery_counts[(x, y)] == 9
+    dsu = board.dsu[segment.type]
+    return dsu.open_edges[dsu.root(board.grid[(x, y)].segment_ids[i])] == 0
+
+
+def check_case(rng: random.Random) -> tuple:
+    deck = create_deck()
+    rng.shuffle(deck)
+    board = Board()
+    board.place_tile(0, 0, deck.pop(next(i for i, t in enumerate(deck) if t.name == "Tile_Starter")))
+    index = FitIndex(board, [t.kind.id for t in deck])
+    ruled_out = set()
+    checks = 0
+    while deck:
+        tile = deck.pop(0)
+        index.draw(tile)
+        legal = board.get_legal_moves(tile)
+        if not legal: continue
+        x, y, rot = rng.choice(legal)
+        player = PLAYERS[board.to_move]
+        tile.rotation = rot
+        board.place_tile(x, y, tile)
+        if rng.random() < 0.5:
+            board.place_meeple(x, y, rng.randrange(len(tile.segments)), player)
+        board.get_completed_features()
+        board.end_turn(player)
+        if rng.random() < 0.2:
+            compare(index, board, deck)
+            checks += 1
+            for fx, fy, i in features(board):
+                if not closed(board, fx, fy, i) and not index.completable(fx, fy, i):
+                    ruled_out.add((fx, fy, i))
+        for fx, fy, i in ruled_out:
+            assert not closed(board, fx, fy, i), f"feature at {(fx, fy)} segment {i} completed after being ruled out"
+
+    # Search-style use: apply a few moves, take some back
+    moves = 0
+    for _ in range(3):
+        depth = 0
+        for kind in rng.sample(KINDS, 4):
+            tile = Tile(kind)
+            actions = list(board.legal_actions(tile, PLAYERS[board.to_move]))
+            if not actions: continue
+            board.apply(tile, rng.choice(actions), PLAYERS[board.to_move])
+            depth += 1
+            moves += 1
+            compare(index, board, [])
+            if rng.random() < 0.4:
+                board.undo()
+                depth -= 1
+                compare(index, board, [])
+        for _ in range(depth):
+            board.undo()
+        compare(index, board, [])
+    return checks, len(ruled_out), moves
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    totals = [0, 0, 0]
+    for _ in range(args.cases):
+        for i, n in enumerate(check_case(rng)):
+            totals[i] += n
+    print(f"OK: {args.cases} games, {totals[0]} positions matched brute force, {totals[1]} features ruled out "
+          f"and never completed, {totals[2]} applied moves followed")
+
+
+if __name__ == "__main__":
+    main()
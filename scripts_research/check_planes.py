@@ -0,0 +1,138 @@
+"""
+check_planes.py
+──────────────────────────────────────────────────────────────────────────────
+Reference check for the feature-plane encoder in `src/logic/planes.py`.
+
+    python scripts_research/check_planes.py [--cases 200] [--seed 0]
+
+For boards taken from seeded random games (with meeples and completions),
+every channel of `PlaneEncoder.encode` is compared with a slow cell-by-cell
+reference built from the public `Board` API (node types, DSU roots, meeple
+slots, frontier, monastery counters), for both points of view and for a
+window small enough to crop the board. The same encoder is then reused
+across `Board.apply`/`Board.undo` to check that its incremental per-board
+cache never serves stale tiles.
+──────────────────────────────────────────────────────────────────────────────
+"""
+
+import argparse
+import os
+import random
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logic.engine import Board, PLAYERS
+from src.logic.deck import create_deck
+from src.logic.models import SegmentType, Tile
+from src.logic.planes import PlaneEncoder, PLANE_NAMES, N_PLANES
+
+
+def reference(board: Board, player_name: str, size: int, origin: tuple) -> np.ndarray:
+    planes = np.zeros((N_PLANES, size, size), dtype=np.float32)
+    channel = {name: i for i, name in enumerate(PLANE_NAMES)}
+    opponent = next(p for p in PLAYERS if p != player_name)
+    x0, y0 = origin
+    for (x, y), entry in board.frontier.items():
+        if entry is not None and 0 <= x - x0 < size and 0 <= y - y0 < size:
+            planes[channel["frontier"], y - y0, x - x0] = 1
+    for (x, y), tile in board.grid.items():
+        if not (0 <= x - x0 < size and 0 <= y - y0 < size):
+            continue
+        cell = planes[:, y - y0, x - x0]
+        cell[channel["occupied"]] = 1
+        for node in range(12):
+            node_type = tile.get_node_type(node)
+            if node_type in (SegmentType.CITY, SegmentType.ROAD, SegmentType.FIELD):
+                cell[channel[f"{node_type.name.lower()}_{node}"]] = 1
+        cell[channel["pennant"]] = sum(1 for s in tile.segments if s.has_pennant)
+        cell[channel["own_meeple"]] = tile.meeples.count(player_name)
+        cell[channel["opp_meeple"]] = tile.meeples.count(opponent)
+        if (x, y) in board.monastery_counts:
+            cell[channel["monastery"]] = 1
+            cell[channel["monastery_area"]] = board.monastery_counts[(x, y)] / 9
+        for i, segment in enumerate(tile.segments):
+            if segment.type not in board.dsu:
+                continue
+            dsu = board.dsu[segment.type]
+            root = dsu.root(tile.segment_ids[i])
+            name = segment.type.name.lower()
+            if dsu.meeples[board.player_index[player_name]][root]: cell[channel[f"own_{name}"]] = 1
+            if dsu.meeples[board.player_index[opponent]][root]: cell[channel[f"opp_{name}"]] = 1
+            if segment.type is not SegmentType.FIELD:
+                if dsu.open_edges[root] == 0: cell[channel[f"{name}_complete"]] = 1
+                cell[channel[f"{name}_open"]] = max(cell[channel[f"{name}_open"]], dsu.open_edges[root])
+    return planes
+
+
+def compare(encoder: PlaneEncoder, board: Board):
+    for player in PLAYERS:
+        planes = encoder.encode(board, player)
+        expected = reference(board, player, encoder.size, encoder.origin(board))
+        for i, name in enumerate(PLANE_NAMES):
+            assert np.array_equal(planes[i], expected[i]), f"channel {name} differs for {player}"
+
+
+def check_case(rng: random.Random, encoders: list) -> int:
+    seed = rng.randrange(1 << 30)
+    deck = create_deck()
+    random.Random(seed).shuffle(deck)
+    board = Board()
+    board.place_tile(0, 0, deck.pop(next(i for i, t in enumerate(deck) if t.name == "Tile_Starter")))
+    cut = rng.randrange(len(deck))
+    for tile in deck[:cut]:
+        legal = board.get_legal_moves(tile)
+        if not legal:
+            continue
+        x, y, rot = rng.choice(legal)
+        tile.rotation = rot
+        board.place_tile(x, y, tile)
+        player = PLAYERS[board.to_move]
+        if rng.random() < 0.5:
+            board.place_meeple(x, y, rng.randrange(len(tile.segments)), player)
+        board.get_completed_features()
+        board.end_turn(player)
+        if rng.random() < 0.2:
+            compare(encoders[0], board)
+
+    moves = 0
+    for encoder in encoders:
+        compare(encoder, board)
+        # Search-style use: apply a few moves, encode, take some back, encode again
+        depth = 0
+        for tile in deck[cut:cut + rng.randrange(1, 6)]:
+            tile = Tile(tile.kind)
+            actions = list(board.legal_actions(tile, PLAYERS[board.to_move]))
+            if not actions:
+                continue
+            board.apply(tile, rng.choice(actions), PLAYERS[board.to_move])
+            depth += 1
+            moves += 1
+            compare(encoder, board)
+            if depth and rng.random() < 0.4:
+                board.undo()
+                depth -= 1
+                compare(encoder, board)
+        for _ in range(depth):
+            board.undo()
+        compare(encoder, board)
+    return moves
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # The default window, a cropping one and a fixed one off the centre of the board
+    encoders = [PlaneEncoder(), PlaneEncoder(size=7), PlaneEncoder(size=10, center=(4, -3))]
+    moves = sum(check_case(rng, encoders) for _ in range(args.cases))
+    print(f"OK: {args.cases} boards and {moves} applied moves encoded identically to the reference")
+
+
+if __name__ == "__main__":
+    main()
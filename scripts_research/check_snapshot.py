@@ -0,0 +1,157 @@
+"""
+check_snapshot.py
+──────────────────────────────────────────────────────────────────────────────
+Round-trip check for the binary snapshots in `src/logic/snapshot.py`.
+
+    python scripts_research/check_snapshot.py [--cases 200] [--seed 0]
+
+For boards taken from seeded random games (with meeples and completions), the
+check asserts that
+
+  * decoding a snapshot yields a board with the same tiles, frontier, DSU
+    arrays, monastery state, queues, scores and hash, and re-encoding it
+    gives the same bytes,
+  * playing the rest of the deck on the original and on the decoded board
+    gives the same legal moves, completions, hashes and final scores, and
+  * a whole-game snapshot restores the deck order, pending tile and player,
+  * `validate_game` accepts every snapshot of real play, finished games
+    included, and rejects it once a score, the meeples in hand, a tile's
+    rotation, a meeple's owner, a feature set or the player to move is
+    forged.
+──────────────────────────────────────────────────────────────────────────────
+"""
+
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logic.engine import Board, PLAYERS
+from src.logic.deck import create_deck
+from src.logic.models import SegmentType
+from src.logic.snapshot import GameSnapshot, encode_board, decode_board, encode_game, decode_game, validate_game
+
+
+def board_state(board: Board) -> tuple:
+    """The board as plain comparable values (dict order included, tile identity ignored)."""
+    dsus = []
+    for st, dsu in board.dsu.items():
+        # Parents are compared by root only: path compression may differ between copies
+        dsus.append((st, [dsu.find(i) for i in range(len(dsu.parent))], list(dsu.next), list(dsu.size), list(dsu.tiles),
+                     list(dsu.pennants), list(dsu.open_edges), [None if s is None else tuple(s) for s in dsu.shared],
+                     [list(m) for m in dsu.meeples], list(dsu.owners)))
+    return (
+        [(pos, t.kind.id, t.rotation, tuple(t.segment_ids), tuple(t.meeples)) for pos, t in board.grid.items()],
+        [(pos, None if c is None else tuple(c)) for pos, c in board.frontier.items()],
+        dsus,
+        list(board.monasteries.items()), list(board.monastery_counts.items()),
+        list(board.pending_monasteries), list(board.pending_features),
+        list(board.field_cities), list(board.meeple_segments),
+        list(board.scores.items()), list(board.meeple_counts.items()), board.to_move, board.zobrist,
+    )
+
+
+def play(board: Board, tile, rng: random.Random):
+    """One random turn for the player to move; returns what the turn changed, for comparison."""
+    legal = board.get_legal_moves(tile)
+    if not legal:
+        return None
+    x, y, rot = rng.choice(legal)
+    tile.rotation = rot
+    board.place_tile(x, y, tile)
+    player = PLAYERS[board.to_move]
+    if rng.random() < 0.5:
+        board.place_meeple(x, y, rng.randrange(len(tile.segments)), player)
+    completed = board.get_completed_features()
+    board.end_turn(player)
+    return legal, completed
+
+
+def _forge_score(g): g.board.scores[PLAYERS[0]] += 1000
+def _forge_hand(g): g.board.meeple_counts[PLAYERS[1]] += 1
+def _forge_turn(g): return g._replace(current_player=PLAYERS[1 - PLAYERS.index(g.current_player)])
+def _forge_cycle(g):
+    parent = g.board.dsu[SegmentType.FIELD].parent
+    parent[0], parent[1] = 1, 0
+
+def _forge_rotation(g):
+    tile = list(g.board.grid.values())[-1]
+    tile.rotation = (tile.rotation + 90) % 360
+
+def _forge_owner(g):
+    for tile in g.board.grid.values():
+        for i, owner in enumerate(tile.meeples):
+            if owner is not None:
+                tile.meeples[i] = PLAYERS[1 - PLAYERS.index(owner)]
+                return
+
+FORGERIES = (_forge_score, _forge_hand, _forge_turn, _forge_cycle, _forge_rotation, _forge_owner)
+
+
+def check_validation(data: bytes) -> int:
+    """`validate_game` accepts the game snapshot `data` and rejects every forgery of it that
+    changes it; returns the number of forgeries rejected."""
+    validate_game(decode_game(data))
+    rejected = 0
+    for forge in FORGERIES:
+        game = decode_game(data)
+        forged = encode_game(forge(game) or game)
+        if forged == data: continue  # nothing to forge (e.g. no meeple standing)
+        try:
+            validate_game(decode_game(forged))
+        except ValueError:
+            rejected += 1
+            continue
+        raise AssertionError(f"{forge.__name__[1:]} was accepted")
+    return rejected
+
+
+def check_case(rng: random.Random):
+    seed = rng.randrange(1 << 30)
+    deck = create_deck()
+    random.Random(seed).shuffle(deck)
+    board = Board()
+    board.place_tile(0, 0, deck.pop(next(i for i, t in enumerate(deck) if t.name == "Tile_Starter")))
+    cut = rng.randrange(len(deck))
+    for tile in deck[:cut]:
+        play(board, tile, rng)
+
+    data = encode_board(board)
+    copy = decode_board(data)
+    assert encode_board(copy) == data, "re-encoding changed the bytes"
+    assert board_state(copy) == board_state(board), "decoded board differs"
+
+    # Same future on both boards: the tiles are decoded from the same snapshot so both are fresh
+    rest = decode_game(encode_game(GameSnapshot(board, deck[cut:], None, PLAYERS[board.to_move], False, (0, 0), ("A", "B"))))
+    assert [(t.kind.id, t.rotation) for t in rest.deck] == [(t.kind.id, t.rotation) for t in deck[cut:]]
+    assert rest.current_player == PLAYERS[board.to_move] and rest.player_types == ("A", "B")
+    state = rng.getstate()
+    for tile in deck[cut:]:
+        play(board, tile, rng)
+    rng.setstate(state)
+    for tile in rest.deck:
+        play(copy, tile, rng)
+    assert board_state(copy) == board_state(board), "boards diverged after the snapshot"
+    assert board.calculate_final_scores() == copy.calculate_final_scores()
+
+    rejected = check_validation(encode_game(rest))
+    rejected += check_validation(encode_game(GameSnapshot(board, [], None, PLAYERS[board.to_move], True, (0, 0), ("A", "B"))))
+    return len(data), rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sizes, rejected = zip(*(check_case(rng) for _ in range(args.cases)))
+    print(f"OK: {args.cases} snapshots round-tripped ({min(sizes)}-{max(sizes)} bytes), "
+          f"{2 * args.cases} validated and {sum(rejected)} forgeries rejected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+check_think.py
+──────────────────────────────────────────────────────────────────────────────
+Check of the anytime agent protocol in `src/logic/think.py`.
+
+    python scripts_research/check_think.py [--positions 4] [--budget 0.3]
+        [--slack 0.25] [--seed 0]
+
+Runs the search agents (StarAgent, MCTSAgent, root-parallel MCTSAgent and an
+agent whose endgame solver faces a position it cannot finish in time) on
+seeded mid-game positions, with time limits of their own far beyond the
+budget, on a thread, and checks that:
+
+  * given a `--budget` deadline, select_move returns within `--slack` of it,
+  * cancelled from another thread after `--budget` seconds, it returns
+    within `--slack` of the cancel,
+  * the move returned is legal, is the think's best move, and every best move
+    polled while the search ran was legal too,
+  * the board it was given is left untouched.
+
+Prints the time to return and the depth reached per agent.
+──────────────────────────────────────────────────────────────────────────────
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logic.engine import PLAYERS
+from src.logic.agents import GreedyAgent, MCTSAgent, StarAgent
+from src.logic.endgame import EndgameSolver
+from src.logic.simulator import new_game
+from src.logic.snapshot import encode_board
+from src.logic.think import Think
+
+AGENTS = {
+    "star": lambda p: StarAgent(p, time_limit=60.0),
+    "mcts": lambda p: MCTSAgent(p, time_limit=60.0),
+    "mcts-parallel": lambda p: MCTSAgent(p, time_limit=60.0, workers=2),
+    # Two tiles left take the solver tens of seconds: it must give up and leave a move
+    "endgame": lambda p: GreedyAgent(p, endgame=EndgameSolver(threshold=2, max_nodes=10 ** 9, time_limit=None)),
+}
+
+
+def position(rng: random.Random, left: int = None):
+    """A seeded random game played for a while (or until `left` tiles remain after the one in hand)."""
+    board, deck = new_game(rng.randrange(1 << 30))
+    plies = rng.randrange(8, 30)
+    while True:
+        tile = deck.draw()
+        legal = board.get_legal_moves(tile)
+        if not legal: continue
+        if (len(deck) == left) if left is not None else plies == 0:
+            return board, tile, legal, deck
+        player = PLAYERS[board.to_move]
+        x, y, rot = rng.choice(legal)
+        tile.rotation = rot
+        board.place_tile(x, y, tile)
+        if rng.random() < 0.3:
+            board.place_meeple(x, y, rng.randrange(len(tile.segments)), player)
+        board.get_completed_features()
+        board.end_turn(player)
+        plies -= 1
+
+
+def run(agent, board, tile, legal, deck, think: Think, cancel_after: float = None) -> tuple:
+    """(move, seconds from the deadline or cancel to the return) of one select_move on a thread."""
+    player = PLAYERS[board.to_move]
+    actions = set(board.legal_actions(tile, player))
+    before = encode_board(board)
+    result = []
+    thread = threading.Thread(target=lambda: result.append(
+        agent.select_move(board, tile, legal, board.meeple_counts[player], len(deck), deck=deck, think=think)))
+    thread.start()
+    start = time.perf_counter()
+    while thread.is_alive():
+        best = agent.best_move()
+        assert best is None or best in actions, f"{agent.name} offered an illegal move {best}"
+        if cancel_after is not None and not think.cancelled and time.perf_counter() - start >= cancel_after:
+            agent.cancel()
+            stop = time.perf_counter()
+        thread.join(0.01)
+    returned = time.perf_counter()
+    assert result, "select_move raised"
+    move = result[0]
+    assert move in actions, f"illegal move {move}"
+    assert think.best == move and think.finished is not None, "returned move is not the think's best"
+    assert encode_board(board) == before, "select_move modified the board"
+    return move, returned - (stop if cancel_after is not None else think.deadline)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--positions", type=int, default=4)
+    parser.add_argument("--budget", type=float, default=0.3)
+    parser.add_argument("--slack", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    late, depths = defaultdict(list), defaultdict(list)
+    for name, make in AGENTS.items():
+        for _ in range(args.positions):
+            board, tile, legal, deck = position(rng, 2 if name == "endgame" else None)
+            agent = make(PLAYERS[board.to_move])
+            if hasattr(getattr(agent, "search", None), "warm_up"): agent.search.warm_up()
+            for mode in ("deadline", "cancel"):
+                if mode == "deadline":
+                    think = Think.budget(args.budget)
+                    _, over = run(agent, board, tile, legal, deck, think)
+                else:
+                    think = Think()
+                    _, over = run(agent, board, tile, legal, deck, think, cancel_after=args.budget)
+                assert over <= args.slack, f"{name} returned {over:.3f}s after its {mode}"
+                late[name].append(over)
+                depths[name].append(think.depth)
+            if hasattr(getattr(agent, "search", None), "close"): agent.search.close()
+        print(f"  {name:14s} returned at most {max(late[name]) * 1000:6.1f} ms past the deadline or cancel, "
+              f"depth {min(depths[name])}-{max(depths[name])}")
+    print(f"OK: {len(AGENTS) * args.positions * 2} thinks returned a legal best-so-far move within {args.slack}s "
+          f"of a {args.budget}s deadline or cancel")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+replay_corpus.py
+──────────────────────────────────────────────────────────────────────────────
+Records seeded random games and replays them to check that engine changes
+keep scoring identical.
+
+    python scripts_research/replay_corpus.py record [--games 50]
+    python scripts_research/replay_corpus.py check
+
+Each JSONL line in `data/recorded_games.jsonl` stores the tile order, the
+moves `[x, y, rotation, meeple_index | null]` (or `null` for a discarded
+tile), the scores and meeple counts after every turn and the final scores.
+`check` replays every game through `Board` and fails on the first mismatch.
+──────────────────────────────────────────────────────────────────────────────
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logic.engine import Board
+from src.logic.deck import TILE_TYPES, create_deck
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "recorded_games.jsonl")
+PLAYERS = ("Player1", "Player2")
+
+
+def snapshot(board: Board) -> list:
+    return [[board.scores[p] for p in PLAYERS], [board.meeple_counts[p] for p in PLAYERS]]
+
+
+def record_game(seed: int) -> dict:
+    rng = random.Random(seed)
+    deck = create_deck()
+    rng.shuffle(deck)
+    starter = deck.pop(next(i for i, t in enumerate(deck) if t.name == "Tile_Starter"))
+    board = Board()
+    board.place_tile(0, 0, starter)
+
+    game = {"seed": seed, "tiles": [], "moves": [], "turns": []}
+    turn = 0
+    for tile in deck:
+        game["tiles"].append(tile.name)
+        legal = sorted(board.get_legal_moves(tile))
+        if not legal:
+            game["moves"].append(None)
+            continue
+        x, y, rot = rng.choice(legal)
+        while tile.rotation != rot:
+            tile.rotate(1)
+        board.place_tile(x, y, tile)
+        meeple = rng.randrange(len(tile.segments)) if rng.random() < 0.5 else None
+        if meeple is not None:
+            board.place_meeple(x, y, meeple, PLAYERS[turn % 2])
+        board.get_completed_features()
+        game["moves"].append([x, y, rot, meeple])
+        game["turns"].append(snapshot(board))
+        turn += 1
+    board.calculate_final_scores()
+    game["final"] = [board.scores[p] for p in PLAYERS]
+    return game
+
+
+def check_game(game: dict):
+    board = Board()
+    board.place_tile(0, 0, TILE_TYPES["Tile_Starter"]())
+    turn = 0
+    for name, move in zip(game["tiles"], game["moves"]):
+        if move is None:
+            continue
+        x, y, rot, meeple = move
+        tile = TILE_TYPES[name]()
+        tile.rotate(rot // 90)
+        if not board.place_tile(x, y, tile):
+            raise AssertionError(f"seed {game['seed']} turn {turn}: {name} rejected at ({x}, {y}, {rot})")
+        if meeple is not None:
+            board.place_meeple(x, y, meeple, PLAYERS[turn % 2])
+        board.get_completed_features()
+        if snapshot(board) != game["turns"][turn]:
+            raise AssertionError(f"seed {game['seed']} turn {turn}: {snapshot(board)} != {game['turns'][turn]}")
+        turn += 1
+    board.calculate_final_scores()
+    final = [board.scores[p] for p in PLAYERS]
+    if final != game["final"]:
+        raise AssertionError(f"seed {game['seed']} final: {final} != {game['final']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("record", help="(re)generate the corpus with the current engine")
+    p.add_argument("--games", type=int, default=50)
+    sub.add_parser("check", help="replay the corpus and compare scores")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        os.makedirs(os.path.dirname(CORPUS_PATH), exist_ok=True)
+        with open(CORPUS_PATH, "w", encoding="utf-8") as f:
+            for seed in range(args.games):
+                f.write(json.dumps(record_game(seed), separators=(",", ":")) + "\n")
+        print(f"Recorded {args.games} games to {CORPUS_PATH}")
+    else:
+        with open(CORPUS_PATH, encoding="utf-8") as f:
+            games = [json.loads(line) for line in f]
+        for game in games:
+            check_game(game)
+        print(f"OK: {len(games)} recorded games replayed with identical scores")
+
+
+if __name__ == "__main__":
+    main()
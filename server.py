@@ -1,27 +1,57 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
 import uuid
+import asyncio
+from contextlib import asynccontextmanager
 import asyncer
 import os
 import copy
 import random
 
 from src.logic.engine import Board
-from src.logic.deck import DECK_DEFINITIONS, create_deck
+from src.logic.models import Tile
+from src.logic.deck import DECK_DEFINITIONS, Deck
 from src.logic.telemetry import game_telemetry
 from src.logic.agents import GreedyAgent, StarAgent, MCTSAgent, HybridLLMAgent
+from src.logic.mcts import shutdown_pools
 from src.logic.auth_manager import UserAuthManager
+from src.logic.transposition import TranspositionTable
+from src.logic.snapshot import GameSnapshot, encode_game, decode_game, encode_board, decode_board, validate_game
+from src.logic.fits import FitIndex
+from src.logic.endgame import EndgameSolver
+from src.logic.book import OpeningBook
+from src.logic.think import Think
 import json
 import time
 
 LOG_DIR = "game_logs"
 os.makedirs(LOG_DIR, exist_ok=True)
 
-app = FastAPI()
+# Opening moves precomputed offline (scripts_research/build_opening_book.py); memory-mapped once
+# and shared read-only by every game. OPENING_BOOK="" disables it.
+OPENING_BOOK = OpeningBook.load(os.environ.get("OPENING_BOOK", os.path.join("assets", "opening_book.bin")))
+
+# Think-time budget per AI type in seconds, overridable as THINK_BUDGETS="MCTS=5,Star2.5=2". Once
+# it is spent, ai_step cancels the agent and plays its best move so far; a cancelled agent gets
+# THINK_GRACE seconds to return it.
+THINK_BUDGETS = {"Greedy": 1.0, "Star2.5": 3.0, "MCTS": 3.0, "Hybrid LLM": 20.0}
+for _item in filter(None, os.environ.get("THINK_BUDGETS", "").split(",")):
+    _agent, _seconds = _item.rsplit("=", 1)
+    THINK_BUDGETS[_agent.strip()] = float(_seconds)
+THINK_GRACE = 0.25
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Root-parallel MCTS seats of every game share their worker processes (src/logic/mcts.py)
+    shutdown_pools()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -79,38 +109,50 @@ async def list_telemetry_files():
     return {"files": files, "log_dir": game_telemetry.log_dir}
 
 class GameSession:
-    def __init__(self, p1_str="Human", p2_str="Star2.5"):
+    def __init__(self, p1_str="Human", p2_str="Star2.5", seed: Optional[int] = None, snapshot: Optional[GameSnapshot] = None):
         self.p1_type = p1_str
         self.p2_type = p2_str
-        self.board = Board()
-        self.deck = create_deck()
-        random.shuffle(self.deck)
-        
-        starter_idx = next(i for i, t in enumerate(self.deck) if t.name == "Tile_Starter")
-        starter = self.deck.pop(starter_idx)
-        starter.name = "Tile_D" # Map to actual asset name
-        self.board.place_tile(0, 0, starter)
+        if snapshot is None:
+            self.board = Board()
+            # Seeded so a game can be dealt again; tiles are only created as they are drawn
+            self.seed = seed if seed is not None else random.randrange(1 << 32)
+            self.deck = Deck.shuffled(self.seed, without=("Tile_Starter",))
+            self.board.place_tile(0, 0, DECK_DEFINITIONS["Tile_Starter"]())
+            self.logs = ["[Game Started] Starter tile placed at (0, 0)."]
+            self.current_player = "Player1"
+            self.game_over = False
+            self.last_played = (0, 0)
+            self.pending_tile = None
+        else:
+            # Resumed mid-game (see restore): the snapshot holds the board, the remaining deck in order and the turn
+            self.board, self.deck, self.pending_tile = snapshot.board, Deck.from_tiles(snapshot.deck), snapshot.pending_tile
+            self.seed = None  # snapshots keep the remaining order, not the seed it was dealt from
+            self.logs = ["[Game Restored] Resumed from snapshot."]
+            self.current_player, self.game_over, self.last_played = snapshot.current_player, snapshot.game_over, snapshot.last_played
+        # Which remaining tiles fit which open cells; answers "is this tile playable" without move generation
+        self.fits = FitIndex(self.board, self.deck.kind_ids())
         
         # Scores and meeples are now managed by the board itself
         self.scores = self.board.scores
         self.meeples = self.board.meeple_counts
-        self.logs = ["[Game Started] Starter tile placed at (0, 0)."]
-        self.current_player = "Player1"
-        self.game_over = False
-        self.last_played = (0, 0)
         
         self.hf_token = os.environ.get("HF_TOKEN", "")
             
+        # Both AI seats search the same game, so they share one transposition table
+        self.transposition = TranspositionTable()
         self.agents = {}
+        # The server knows the real deck, so the searching AI seats play the last few tiles exactly;
+        # Greedy stays the random baseline (GreedyAgent takes an endgame solver only when given one)
+        endgame_tiles = int(os.environ.get("ENDGAME_TILES", "1"))
         for p_name, a_str in [("Player1", p1_str), ("Player2", p2_str)]:
-            if a_str == "Star2.5": self.agents[p_name] = StarAgent(p_name)
-            elif a_str == "MCTS": self.agents[p_name] = MCTSAgent(p_name)
-            elif a_str == "Hybrid LLM": self.agents[p_name] = HybridLLMAgent(p_name, self.hf_token)
-            elif a_str == "Greedy": self.agents[p_name] = GreedyAgent(p_name)
+            endgame = EndgameSolver(threshold=endgame_tiles) if endgame_tiles > 0 else None
+            if a_str == "Star2.5": self.agents[p_name] = StarAgent(p_name, self.transposition, endgame=endgame, book=OPENING_BOOK)
+            elif a_str == "MCTS": self.agents[p_name] = MCTSAgent(p_name, self.transposition, workers=int(os.environ.get("MCTS_WORKERS", "1")), endgame=endgame, book=OPENING_BOOK)
+            elif a_str == "Hybrid LLM": self.agents[p_name] = HybridLLMAgent(p_name, self.hf_token, self.transposition, endgame=endgame, book=OPENING_BOOK)
+            elif a_str == "Greedy": self.agents[p_name] = GreedyAgent(p_name, self.transposition)
             else: self.agents[p_name] = None
             
-        self.pending_tile = None
-        self.pending_legal_moves = []
+        self.pending_legal_moves = self.board.get_legal_moves(self.pending_tile) if self.pending_tile else []
         
     def prepare_turn(self):
         if self.game_over: return
@@ -127,13 +169,14 @@ class GameSession:
             game_telemetry.finalize_game(self.board.scores, winner)
             return
 
-        self.pending_tile = self.deck.pop(0)
-        self.pending_legal_moves = self.board.get_legal_moves(self.pending_tile)
+        self.pending_tile = self.deck.draw()
+        self.fits.draw(self.pending_tile)
         
-        while not self.pending_legal_moves and self.deck:
+        while not self.fits.has_move(self.pending_tile) and self.deck:
             self.logs.append(f"⚠️ Tile {self.pending_tile.name} has no valid moves. Discarding.")
-            self.pending_tile = self.deck.pop(0)
-            self.pending_legal_moves = self.board.get_legal_moves(self.pending_tile)
+            self.pending_tile = self.deck.draw()
+            self.fits.draw(self.pending_tile)
+        self.pending_legal_moves = self.board.get_legal_moves(self.pending_tile) if self.fits.has_move(self.pending_tile) else []
 
         if not self.pending_legal_moves:
             self.game_over = True
@@ -147,7 +190,7 @@ class GameSession:
             print(f"[DEBUG] Finalizing game: s1={s1}, s2={s2}, winner={winner}")
             game_telemetry.finalize_game(self.board.scores, winner)
 
-    def execute_move(self, move_coords, rotation, meeple_target, strategy=None, rationale=None):
+    def execute_move(self, move_coords, rotation, meeple_target, strategy=None, rationale=None, think=None):
         x, y = move_coords
         while self.pending_tile.rotation != rotation:
             self.pending_tile.rotate(1)
@@ -181,14 +224,28 @@ class GameSession:
             "scores": copy.deepcopy(self.board.scores),
             "deck_remaining": len(self.deck),
             "strategy": strategy,
-            "rationale": rationale
+            "rationale": rationale,
+            "think": think
         }, session_id=f"{self.hf_token if self.hf_token else 'dev'}_{id(self)}")
 
+        self.board.end_turn(self.current_player)
         self.current_player = "Player2" if self.current_player == "Player1" else "Player1"
         self.pending_tile = None
         self.pending_legal_moves = []
         return True, ""
 
+    def snapshot(self) -> bytes:
+        """Compact binary copy of the game (see src/logic/snapshot.py)."""
+        return encode_game(GameSnapshot(self.board, self.deck, self.pending_tile, self.current_player,
+                                        self.game_over, self.last_played, (self.p1_type, self.p2_type)))
+
+    @classmethod
+    def restore(cls, data: bytes) -> "GameSession":
+        snap = decode_game(data)
+        # Snapshots come from clients: only positions real play can reach are resumed
+        validate_game(snap)
+        return cls(*snap.player_types, snapshot=snap)
+
     # Telemetry is now handled via unified logic in execute_move
 
 sessions: Dict[str, GameSession] = {}
@@ -200,6 +257,7 @@ class LoginRequest(BaseModel):
 class StartGameRequest(BaseModel):
     p1_type: str
     p2_type: str
+    seed: Optional[int] = None
 
 class MoveRequest(BaseModel):
     x: int
@@ -220,7 +278,7 @@ def register(req: LoginRequest):
 @app.post("/api/game/new")
 def new_game(req: StartGameRequest):
     sess_id = str(uuid.uuid4())
-    sessions[sess_id] = GameSession(req.p1_type, req.p2_type)
+    sessions[sess_id] = GameSession(req.p1_type, req.p2_type, req.seed)
     sessions[sess_id].prepare_turn()
     return {"session_id": sess_id}
 
@@ -230,15 +288,23 @@ def get_state(session_id: str):
     gs = sessions[session_id]
     grid_data = []
     for (x, y), t in gs.board.grid.items():
-        meeple_data = [{"index": i, "player": seg.meeple_player} for i, seg in enumerate(t.segments) if hasattr(seg, 'meeple_player') and seg.meeple_player]
-        grid_data.append({"x": x, "y": y, "name": t.name, "rotation": t.rotation, "meeples": meeple_data})
+        meeple_data = [{"index": i, "player": p} for i, p in enumerate(t.meeples) if p]
+        name = "Tile_D" if t.name == "Tile_Starter" else t.name # Starter shares the Tile_D artwork
+        grid_data.append({"x": x, "y": y, "name": name, "rotation": t.rotation, "meeples": meeple_data})
     
-    moves = [{"x": x, "y": y, "r": r} for (x, y, r) in gs.pending_legal_moves]
+    moves = []
     tile_name = None
     meeple_choices = []
     if gs.pending_tile:
         tile_name = gs.pending_tile.name
-        meeple_choices = [{"index": i, "type": s.type.name, "nodes": s.nodes} for i, s in enumerate(gs.pending_tile.segments)]
+        # Legal moves list symmetric rotations once; the UI filters by the rotation the player picked.
+        # Each move carries the segments a meeple may still go on (segment indices turn with the tile)
+        tile, board = gs.pending_tile, gs.board
+        equivalent = tile.kind.table.equivalent
+        has_meeple = gs.meeples[gs.current_player] > 0
+        moves = [{"x": x, "y": y, "r": step * 90, "meeples": board.meeple_options(tile, x, y, step * 90) if has_meeple else []}
+                 for (x, y, r) in gs.pending_legal_moves for step in equivalent[r // 90]]
+        meeple_choices = [{"index": i, "type": s.type.name, "nodes": list(s.nodes)} for i, s in enumerate(gs.pending_tile.segments)]
 
     return {
         "game_over": gs.game_over, "current_player": gs.current_player, "is_human_turn": gs.agents[gs.current_player] is None,
@@ -248,6 +314,22 @@ def get_state(session_id: str):
         "player_types": {"Player1": gs.p1_type, "Player2": gs.p2_type}
     }
 
+@app.get("/api/game/{session_id}/snapshot")
+def get_snapshot(session_id: str):
+    if session_id not in sessions: raise HTTPException(status_code=404, detail="Session not found")
+    return Response(content=sessions[session_id].snapshot(), media_type="application/octet-stream")
+
+@app.post("/api/game/restore")
+async def restore_game(request: Request):
+    try:
+        gs = GameSession.restore(await request.body())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    sess_id = str(uuid.uuid4())
+    sessions[sess_id] = gs
+    if gs.pending_tile is None: gs.prepare_turn()
+    return {"session_id": sess_id}
+
 @app.post("/api/game/{session_id}/move")
 async def apply_move(session_id: str, req: MoveRequest):
     if session_id not in sessions: raise HTTPException(status_code=404, detail="Session not found")
@@ -267,14 +349,23 @@ async def ai_step_endpoint(session_id: str):
     if agent is None: return {"success": False, "message": "Not an AI turn"}
     
     gs.logs.append(f"🤖 [THINKING] {gs.current_player} ({agent.name}) is analyzing board...")
+    player_type = gs.p1_type if gs.current_player == "Player1" else gs.p2_type
+    budget = THINK_BUDGETS.get(player_type)
+    think = Think.budget(budget)
+    # The agent thinks on a private copy of the position: an agent still unwinding after its budget
+    # (see below) must not read the session while the next turn changes it
+    board, tile, deck = decode_board(encode_board(gs.board)), Tile(gs.pending_tile.kind), gs.deck.clone()
+    legal_moves, meeples = list(gs.pending_legal_moves), gs.meeples[gs.current_player]
     def sync_ai():
         # Pass both counts: current meeples and remaining tiles
         return agent.select_move(
-            gs.board, 
-            gs.pending_tile, 
-            gs.pending_legal_moves, 
-            gs.meeples[gs.current_player],
-            len(gs.deck)
+            board, 
+            tile, 
+            legal_moves, 
+            meeples,
+            len(deck),
+            deck=deck,
+            think=think
         )
     
     try:
@@ -282,7 +373,22 @@ async def ai_step_endpoint(session_id: str):
         # Looking at src/logic/agents.py, most return x, y, rot, meeple_idx.
         # HybridLLMAgent returns x, y, rot, meeple_idx.
         # But StarAgent and others also return 4 values.
-        result = await asyncer.asyncify(sync_ai)()
+        task = asyncio.ensure_future(asyncer.asyncify(sync_ai)())
+        done, _ = await asyncio.wait({task}, timeout=budget)
+        if not done:
+            # Budget spent: the agent stops at its next check and hands over its best move so far
+            think.cancel()
+            done, _ = await asyncio.wait({task}, timeout=THINK_GRACE)
+        if done:
+            result = task.result()
+        else:
+            # Still unwinding (e.g. waiting on the LLM) on its own copy of the position
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            result = think.best
+        if result is None: raise RuntimeError(f"no move within the {budget}s think budget")
+        report = think.report()
+        gs.logs.append(f"⏱️ {gs.current_player} thought {report['seconds']:.2f}s (depth {report['depth']}, {report['source'] or 'search'})"
+                       + (" - budget reached, best move so far played" if think.cancelled else ""))
         if len(result) == 4:
             mx, my, mrot, midx = result
         else:
@@ -294,7 +400,7 @@ async def ai_step_endpoint(session_id: str):
         rationale = getattr(agent, 'last_rationale', None)
         
         meeple_str = str(midx) if midx is not None else "None"
-        success, msg = gs.execute_move((mx, my), mrot, meeple_str, strategy=strategy, rationale=rationale)
+        success, msg = gs.execute_move((mx, my), mrot, meeple_str, strategy=strategy, rationale=rationale, think=report)
         if success: gs.prepare_turn()
         return {"success": success, "message": msg}
     except Exception as e:
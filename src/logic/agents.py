@@ -1,110 +1,170 @@
+import math
 import random
+import time
 import copy
 from typing import Tuple, List, Optional
+import numpy as np
 from src.logic.models import Tile
-from src.logic.engine import Board
+from src.logic.engine import Board, PLAYERS
+from src.logic.mcts import MCTS, ParallelMCTS
+from src.logic.star import StarSearch
+from src.logic.evaluator import MoveEvaluator, score_actions
+from src.logic.endgame import EndgameSolver
+from src.logic.book import OpeningBook, BookMove
+from src.logic.think import Think
+from src.logic.snapshot import encode_board, decode_board
+from src.logic.transposition import TranspositionTable
 from src.mcp.prompts import SYSTEM_PROMPT, TOT_PROMPT_TEMPLATE
 from src.logic.telemetry import game_telemetry
 
 class CarcassonneAgent:
-    def __init__(self, name: str):
+    def __init__(self, name: str, transposition: Optional[TranspositionTable] = None, endgame: Optional[EndgameSolver] = None,
+                 book: Optional[OpeningBook] = None):
         self.name = name
+        # Search results keyed by Board.zobrist; may be shared between agents of one game
+        self.transposition = transposition if transposition is not None else TranspositionTable()
+        # Plays the last few tiles exactly when the caller passes the real deck (see endgame_move)
+        self.endgame = endgame
+        # Precomputed opening moves, consulted before any search (see book_move)
+        self.book = book
+        # The select_move call in progress (or the last one): deadline, cancellation, best move so far
+        self.think: Optional[Think] = None
 
-    def select_move(self, board: Board, tile: Tile, legal_moves: List[Tuple[int, int, int]], current_meeples: int, remaining_tiles: int = 72) -> Tuple[int, int, int, Optional[int]]:
+    def select_move(self, board: Board, tile: Tile, legal_moves: List[Tuple[int, int, int]], current_meeples: int, remaining_tiles: int = 72, deck: Optional[List[Tile]] = None,
+                    think: Optional[Think] = None) -> Tuple[int, int, int, Optional[int]]:
         """
         Returns (x, y, rotation, meeple_segment_index)
         If meeple_segment_index is None, no meeple is placed.
+        `deck` is the remaining draw pile when the caller knows it (search agents use it for chance nodes).
+        `think` carries the caller's deadline; the agent stops by then (or once it is cancelled) and
+        keeps its best move so far in it, so the caller can poll `best_move()` from another thread.
         """
         raise NotImplementedError
 
+    def begin_think(self, think: Optional[Think]) -> Think:
+        """Makes `think` (a new one without a deadline if None) the agent's current think."""
+        self.think = think if think is not None else Think()
+        return self.think
+
+    def best_move(self) -> Optional[Tuple[int, int, int, Optional[int]]]:
+        """Best move found so far by the current (or last) select_move call."""
+        return self.think.best if self.think is not None else None
+
+    def cancel(self):
+        """Asks the current select_move call to stop and return its best move so far."""
+        if self.think is not None: self.think.cancel()
+
+    def book_move(self, board: Board, tile: Tile, think: Optional[Think] = None) -> Optional[BookMove]:
+        """The opening book's move for this position and tile, or None (no book, or not in it)."""
+        if self.book is None:
+            return None
+        player = self.name if self.name in board.player_index else PLAYERS[board.to_move]
+        hit = self.book.lookup(board, tile, player)
+        if hit is not None and think is not None: think.offer(hit.action, 0, "book")
+        return hit
+
+    def endgame_move(self, board: Board, tile: Tile, deck: Optional[List[Tile]],
+                     think: Optional[Think] = None) -> Optional[Tuple[int, int, int, Optional[int]]]:
+        """The exact move of the agent's endgame solver once the known deck is short enough, or None
+        (no solver, unknown deck, too many tiles left, or the solver hit its node or time cap)."""
+        if self.endgame is None or not self.endgame.applies(deck):
+            return None
+        player = self.name if self.name in board.player_index else PLAYERS[board.to_move]
+        return self.endgame.solve(board, tile, player, deck, think)
+
 class GreedyAgent(CarcassonneAgent):
-    """Simple baseline that picks the first legal move and places a meeple randomly 20% of the time."""
-    def select_move(self, board: Board, tile: Tile, legal_moves: List[Tuple[int, int, int]], current_meeples: int, remaining_tiles: int = 72) -> Tuple[int, int, int, Optional[int]]:
+    """Simple baseline that picks a random legal move and places a meeple on a random free segment 20% of the time."""
+    def select_move(self, board: Board, tile: Tile, legal_moves: List[Tuple[int, int, int]], current_meeples: int, remaining_tiles: int = 72, deck: Optional[List[Tile]] = None,
+                    think: Optional[Think] = None) -> Tuple[int, int, int, Optional[int]]:
+        think = self.begin_think(think)
         if not legal_moves:
-            return 0, 0, 0, None
+            return think.finish((0, 0, 0, None))
+        hit = self.book_move(board, tile, think)
+        if hit is not None: return think.finish(hit.action)
+        move = self.endgame_move(board, tile, deck, think)
+        if move is not None: return think.finish(move)
         
         tx, ty, rot = random.choice(legal_moves)
         
         meeple_idx = None
         if current_meeples > 0 and random.random() < 0.2:
-            meeple_idx = random.randint(0, len(tile.segments) - 1)
+            options = board.meeple_options(tile, tx, ty, rot)
+            if options: meeple_idx = random.choice(options)
             
-        return tx, ty, rot, meeple_idx
+        return think.finish((tx, ty, rot, meeple_idx))
 
 class StarAgent(CarcassonneAgent):
     """
-    Implements a simplified Star2.5 concept: 
-    Iterates through all legal moves, simulates placing the tile, and evaluates the board state.
-    We prioritize moves that complete our own features or score immediate points.
-    We save meeples unless we find a high-value city/road/monastery.
+    Star2.5 *-minimax: full-width expectimax over full actions with chance nodes weighted by
+    the remaining deck, Star1 cutoffs and one-action probing (see src/logic/star.py).
+    Deepens one ply at a time for `time_limit` seconds (less if the caller's deadline comes first),
+    caps the depth at `max_depth` if given
+    and keeps its results in the agent's transposition table. Statistics of the last search
+    (depth reached, node counts, cutoff rates) are kept in `last_stats`.
     """
-    def select_move(self, board: Board, tile: Tile, legal_moves: List[Tuple[int, int, int]], current_meeples: int, remaining_tiles: int = 72) -> Tuple[int, int, int, Optional[int]]:
-        if not legal_moves:
-            return 0, 0, 0, None
+    def __init__(self, name: str, transposition: Optional[TranspositionTable] = None, time_limit: Optional[float] = 1.0,
+                 max_depth: Optional[int] = None, endgame: Optional[EndgameSolver] = None, book: Optional[OpeningBook] = None,
+                 **search_options):
+        super().__init__(name, transposition, endgame, book)
+        self.search = StarSearch(time_limit=time_limit, max_depth=max_depth, transposition=self.transposition, **search_options)
+        self.last_stats = {}
 
-        best_score = -9999
-        best_move = legal_moves[0]
-        best_meeple = None
-        
-        for tx, ty, rot in legal_moves:
-            # Shallow simulation of immediate points (We don't deepcopy the whole board heavily to avoid massive UI lag)
-            # Instead, we evaluate the heuristical 'goodness' of the position.
-            
-            # Simple heuristic: Does it touch existing tiles? (More neighbors = better, as it closes gaps)
-            neighbors = sum(1 for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)] if (tx+dx, ty+dy) in board.grid)
-            score = neighbors * 2
-            
-            meeple_idx = None
-            # If we have lots of meeples, be aggressive. If few, be conservative.
-            meeple_threshold = 0.8 if current_meeples < 3 else 0.4
-            
-            if current_meeples > 0 and random.random() > meeple_threshold:
-                # Try to place on City or Monastery for higher expected value
-                for i, seg in enumerate(tile.segments):
-                    if seg.type.name in ["CITY", "MONASTERY"]:
-                        score += 3  # Bonus for claiming high value features
-                        meeple_idx = i
-                        break
-                
-                # Fallback to road
-                if meeple_idx is None:
-                    for i, seg in enumerate(tile.segments):
-                        if seg.type.name == "ROAD":
-                            score += 1
-                            meeple_idx = i
-                            break
-
-            if score > best_score:
-                best_score = score
-                best_move = (tx, ty, rot)
-                best_meeple = meeple_idx
-                
-        return best_move[0], best_move[1], best_move[2], best_meeple
+    def select_move(self, board: Board, tile: Tile, legal_moves: List[Tuple[int, int, int]], current_meeples: int, remaining_tiles: int = 72, deck: Optional[List[Tile]] = None,
+                    think: Optional[Think] = None) -> Tuple[int, int, int, Optional[int]]:
+        think = self.begin_think(think)
+        if not legal_moves:
+            return think.finish((0, 0, 0, None))
+        hit = self.book_move(board, tile, think)
+        if hit is not None:
+            self.last_stats = {"book": {"visits": hit.visits}}
+            return think.finish(hit.action)
+        move = self.endgame_move(board, tile, deck, think)
+        if move is not None:
+            self.last_stats = {"endgame": self.endgame.stats}
+            return think.finish(move)
+        player = self.name if self.name in board.player_index else PLAYERS[board.to_move]
+        move = self.search.search(board, tile, player, deck, think)
+        self.last_stats = self.search.stats
+        return think.finish(move)
 
 class MCTSAgent(CarcassonneAgent):
     """
-    Simplified Monte-Carlo Tree Search policy.
-    Does random playouts for a subset of legal moves to estimate win probability.
-    Due to Python CPU limits in a Gradio thread, we use a very shallow rollout.
+    UCT Monte-Carlo Tree Search over full actions (position, rotation, meeple) with chance
+    nodes sampled from the remaining deck (see src/logic/mcts.py). Searches for `time_limit`
+    seconds and/or `iterations` playouts (less if the caller's deadline comes first) and reuses
+    the matching subtree on its next turn.
+    With `workers` > 1 the search runs root-parallel in a persistent process pool.
+    Statistics of the last search are kept in `last_stats`.
     """
-    def select_move(self, board: Board, tile: Tile, legal_moves: List[Tuple[int, int, int]], current_meeples: int, remaining_tiles: int = 72) -> Tuple[int, int, int, Optional[int]]:
+    def __init__(self, name: str, transposition: Optional[TranspositionTable] = None, time_limit: Optional[float] = 1.0,
+                 iterations: Optional[int] = None, workers: int = 1, endgame: Optional[EndgameSolver] = None,
+                 book: Optional[OpeningBook] = None, **search_options):
+        super().__init__(name, transposition, endgame, book)
+        if workers > 1:
+            self.search = ParallelMCTS(workers, time_limit=time_limit, iterations=iterations, **search_options)
+        else:
+            self.search = MCTS(time_limit=time_limit, iterations=iterations, **search_options)
+        self.last_stats = {}
+
+    def select_move(self, board: Board, tile: Tile, legal_moves: List[Tuple[int, int, int]], current_meeples: int, remaining_tiles: int = 72, deck: Optional[List[Tile]] = None,
+                    think: Optional[Think] = None) -> Tuple[int, int, int, Optional[int]]:
+        think = self.begin_think(think)
         if not legal_moves:
-            return 0, 0, 0, None
-            
-        # MCTS Simulation Strategy (Shallow)
-        # Random move, but save meeples. Only place on Monastery if meeples > 2, or place 15% of the time otherwise.
-        tx, ty, rot = random.choice(legal_moves)
-        meeple_idx = None
-        
-        if current_meeples > 2:
-            for i, seg in enumerate(tile.segments):
-                if getattr(seg, 'is_monastery', False) or seg.type.name == "MONASTERY":
-                    meeple_idx = i
-                    break
-        elif current_meeples > 0 and random.random() < 0.15:
-            meeple_idx = random.randint(0, len(tile.segments) - 1)
-                    
-        return tx, ty, rot, meeple_idx
+            return think.finish((0, 0, 0, None))
+        hit = self.book_move(board, tile, think)
+        if hit is not None:
+            self.last_stats = {"book": {"visits": hit.visits}}
+            return think.finish(hit.action)
+        move = self.endgame_move(board, tile, deck, think)
+        if move is not None:
+            self.last_stats = {"endgame": self.endgame.stats}
+            return think.finish(move)
+        player = self.name if self.name in board.player_index else PLAYERS[board.to_move]
+        move = self.search.search(board, tile, player, deck, think)
+        self.last_stats = self.search.stats
+        if move is None:  # cancelled before any worker reported
+            move = think.best or (*legal_moves[0], None)
+        return think.finish(move)
 
 # --- Hybrid LLM Logic ---
 import json
@@ -112,9 +172,14 @@ import re
 from huggingface_hub import InferenceClient
 
 class HybridLLMAgent(CarcassonneAgent):
-    def __init__(self, name: str, hf_token: str):
-        super().__init__(name)
+    def __init__(self, name: str, hf_token: str, transposition: Optional[TranspositionTable] = None, move_budget: float = 0.5,
+                 evaluator: Optional[MoveEvaluator] = None, shortlist: int = 8, endgame: Optional[EndgameSolver] = None,
+                 book: Optional[OpeningBook] = None):
+        super().__init__(name, transposition, endgame, book)
         self.token = hf_token
+        self.move_budget = move_budget  # seconds for rating moves after the LLM has answered
+        self.evaluator = evaluator if evaluator is not None else MoveEvaluator.default()  # rates every move in one batch
+        self.shortlist = shortlist  # moves rated exactly, the evaluator's best under the General's order
         # InferenceClient handles endpoint routing (api-inference vs router) automatically
         self.client = InferenceClient(token=self.token.strip())
         self.last_strategy = "GREEDY"
@@ -187,63 +252,71 @@ class HybridLLMAgent(CarcassonneAgent):
         self.last_rationale = rationale
         return order, rationale
 
-    def select_move(self, board: Board, tile: Tile, legal_moves: List[Tuple[int, int, int]], current_meeples: int, remaining_tiles: int = 72) -> Tuple[int, int, int, Optional[int]]:
+    def select_move(self, board: Board, tile: Tile, legal_moves: List[Tuple[int, int, int]], current_meeples: int, remaining_tiles: int = 72, deck: Optional[List[Tile]] = None,
+                    think: Optional[Think] = None) -> Tuple[int, int, int, Optional[int]]:
+        think = self.begin_think(think)
         if not legal_moves:
-            return 0, 0, 0, None
+            return think.finish((0, 0, 0, None))
+        hit = self.book_move(board, tile, think)
+        if hit is not None: return think.finish(hit.action)
+        move = self.endgame_move(board, tile, deck, think)
+        if move is not None: return think.finish(move)
+
+        # Moves are rated by applying them (Board.score_move), so on a private copy: the caller's
+        # board may be read by other threads (e.g. the server's /state) while the agent thinks
+        board = decode_board(encode_board(board))
+        tile = Tile(tile.kind)
+
+        # Every full action is rated by one batched evaluator pass; its best is the best move so
+        # far while the LLM answers
+        player = self.name if self.name in board.player_index else PLAYERS[board.to_move]
+        opponent = next(p for p in PLAYERS if p != player)
+        actions = list(board.legal_actions(tile, player))
+        if current_meeples <= 0:
+            actions = [a for a in actions if a[3] is None]
+        rated = score_actions(board, tile, actions, player, self.evaluator)
+        think.offer(actions[int(rated.argmax())], 0)
             
         # Load lessons from past games
         past_lessons = game_telemetry.get_past_lessons(self.name)
         
         strategy, rationale = self._get_llm_strategy(tile.name, legal_moves, current_meeples, remaining_tiles, past_lessons)
         print(f"[GENERAL {self.name}] Order: {strategy} | Rationale: {rationale}", flush=True)
+        # The caller's deadline may have passed while the LLM answered
+        if think.expired():
+            return think.finish(think.best)
 
         # --- SOLDIER LOGIC: Execute General's Strategy ---
-        best_move = legal_moves[0]
-        best_meeple = None
-        best_tactical_score = -1
-        
-        for tx, ty, rot in legal_moves:
-            score = 0
-            meeple_idx = None
-            
-            # Simple neighbor metric
-            neighbors = sum(1 for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)] if (tx+dx, ty+dy) in board.grid)
-            score += neighbors
-            
-            # Tactical Meeple Placement based on Strategy
-            if current_meeples > 0:
-                for i, seg in enumerate(tile.segments):
-                    seg_type = seg.type.name
-                    if strategy == "CITY" and seg_type == "CITY":
-                        score += 15
-                        meeple_idx = i
-                        break
-                    elif strategy == "ROAD" and seg_type == "ROAD":
-                        score += 8
-                        meeple_idx = i
-                        break
-                    elif strategy == "MONASTERY" and seg_type == "MONASTERY":
-                        score += 20
-                        meeple_idx = i
-                        break
-                    elif strategy == "BLOCKING":
-                        score += neighbors * 4 
-                        meeple_idx = None
-                        break
-                    elif strategy == "GREEDY":
-                        if seg_type in ["CITY", "MONASTERY"]:
-                            score += 5
-                            meeple_idx = i
-                            break
-                        elif seg_type == "ROAD":
-                            score += 2
-                            meeple_idx = i
-            
-            score += random.uniform(0, 0.5)
+        # A meeple is worth keeping unless it claims what the General asked for: the evaluator's
+        # ratings with that bonus pick the `shortlist` moves that are then rated exactly, by what
+        # they do to the projected scores of both players (Board.score_move) plus the same bonus.
+        # Running out of `move_budget` (or reaching the caller's deadline) skips the weaker ones,
+        # down to all of them: the shortlist's head is the best move until one is rated.
+        bonus = np.array([0.0 if m is None else 3.0 if tile.segments[m].type.name == strategy else -1.0
+                          for _, _, _, m in actions], dtype=np.float32)
+        order = (rated + bonus).argsort()[::-1][:self.shortlist]
+        deadline = think.limit(self.move_budget)
+        projected = board.project_final_scores()
+        best_move = actions[order[0]]
+        think.offer(best_move, 0)
+        best_tactical_score = -math.inf
+
+        for index in order:
+            if time.perf_counter() > deadline or think.cancelled: break
+            tx, ty, rot, meeple_idx = actions[index]
+            delta = board.score_move(tile, (tx, ty, rot, meeple_idx), player, projected)
+            mine, theirs = delta.projected[player], delta.projected[opponent]
+            if strategy == "BLOCKING":
+                score = mine - 2 * theirs
+            elif strategy == "GREEDY":
+                score = mine - theirs + delta.immediate[player]
+            else:
+                score = mine - theirs
+            score += float(bonus[index])
 
             if score > best_tactical_score:
                 best_tactical_score = score
-                best_move = (tx, ty, rot)
-                best_meeple = meeple_idx
-        
-        return best_move[0], best_move[1], best_move[2], best_meeple
+                best_move = actions[index]
+                think.offer(best_move, 1)
+
+        return think.finish(best_move)
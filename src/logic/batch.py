@@ -0,0 +1,537 @@
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .models import SegmentType
+from .deck import create_deck, Deck, KINDS, SIDE_BITS, SIDE_MASK, REVERSED_SIDE_CODES
+from .engine import NEIGHBOR_OFFSETS
+from .simulator import GameResult, SimulationReport
+
+# --- Vectorized batch simulation ---
+# N independent games advanced in lockstep, with the whole state in (N, ...) arrays: a dense
+# grid of tile codes per game, the frontier cells with their packed edge constraints, one
+# union-find over every city/road/field segment of a game, monasteries, meeples and scores.
+# Each turn is a fixed number of array operations over all games at once (legality of every
+# frontier cell and rotation, the node-by-node unions, completions), so the Python overhead
+# is paid per turn rather than per game. The rules and the turn order are those of
+# simulator.play_game (draw until a tile fits, place, optional meeple, score completions),
+# and every game records its moves so it can be replayed on a Board.
+#
+# Policies are the ones that reduce to array operations over the candidate placements:
+# "random" (uniform placement, a meeple on a random segment `meeple_rate` of the time, as
+# simulator.RandomPolicy) and "greedy" (the placement with the best immediate score delta).
+
+_CITY, _ROAD, _FIELD = 0, 1, 2
+_TYPE = {SegmentType.CITY: _CITY, SegmentType.ROAD: _ROAD, SegmentType.FIELD: _FIELD}
+POLICIES = ("random", "greedy")
+
+# Per-kind tables. A tile's features (its city, road and field segments) are numbered in
+# TileTable.features order; a placed tile owns segment ids base .. base + features - 1.
+_NK = len(KINDS)
+_NF = max(len(k.table.features) for k in KINDS)
+_NSEG = max(len(k.segments) for k in KINDS)
+_SIG = np.array([k.table.signatures for k in KINDS], dtype=np.int32)                     # kind, step
+_ROTATIONS = np.array([[s in k.table.rotations for s in range(4)] for k in KINDS])      # distinct steps
+_NFEAT = np.array([len(k.table.features) for k in KINDS])
+_NSEGS = np.array([len(k.segments) for k in KINDS])
+_FTYPE = np.full((_NK, _NF), -1, dtype=np.int8)
+_FOPEN = np.zeros((_NK, _NF), dtype=np.int16)
+_FPEN = np.zeros((_NK, _NF), dtype=np.int16)
+_SEG2F = np.full((_NK, _NSEG), -1, dtype=np.int16)    # segment index -> feature (-1: monastery)
+_MONASTERY_SEG = np.full(_NK, -1, dtype=np.int16)      # segment index of the monastery, -1 if none
+for _k in KINDS:
+    for _f, (_i, _st, _pen, _open, _) in enumerate(_k.table.features):
+        _FTYPE[_k.id, _f], _FOPEN[_k.id, _f], _FPEN[_k.id, _f] = _TYPE[_st], _open, _pen
+        _SEG2F[_k.id, _i] = _f
+    for _i, _s in enumerate(_k.segments):
+        if _s.is_monastery or _s.type == SegmentType.MONASTERY: _MONASTERY_SEG[_k.id] = _i
+# (kind, field feature, city feature) adjacencies on one tile, for field scoring
+_PAIRS = [[(_SEG2F[k.id, i], _SEG2F[k.id, c]) for i, cities in enumerate(k.table.field_cities)
+           if k.segments[i].type is SegmentType.FIELD for c in cities] for k in KINDS]
+_NPAIR = max(len(p) for p in _PAIRS)
+_PAIR = np.zeros((_NK, max(_NPAIR, 1), 2), dtype=np.int16)
+_NPAIRS = np.array([len(p) for p in _PAIRS])
+for _k in KINDS:
+    for _j, _p in enumerate(_PAIRS[_k.id]): _PAIR[_k.id, _j] = _p
+# code = kind * 4 + step
+_SIDE_F = np.zeros((_NK * 4, 4, 3), dtype=np.int16)    # feature of the 3 nodes of each side (clockwise)
+_NB_VALUE = np.zeros((_NK * 4, 4), dtype=np.int32)     # constraint value imposed on the neighbour of each side
+for _k in KINDS:
+    for _step in range(4):
+        for _d in range(4):
+            _SIDE_F[_k.id * 4 + _step, _d] = [_SEG2F[_k.id, i] for i in _k.table.side_segments[_step][_d]]
+            _NB_VALUE[_k.id * 4 + _step, _d] = REVERSED_SIDE_CODES[_k.table.sides[_step][_d]] << (SIDE_BITS * ((_d + 2) % 4))
+_NB_MASK = np.array([SIDE_MASK << (SIDE_BITS * ((d + 2) % 4)) for d in range(4)], dtype=np.int32)
+_OPPOSITE = (2, 3, 0, 1)
+
+_STARTER = next(k.id for k in KINDS if k.name == "Tile_Starter")
+_DECK = [t.kind.id for t in create_deck()]
+_SEGMENTS = int(_NFEAT[_DECK].sum())      # segment ids one game can use
+_FIELD_PAIRS = int(_NPAIRS[_DECK].sum())
+_MONASTERIES = int((_MONASTERY_SEG[_DECK] >= 0).sum())
+_TURNS = len(_DECK) - 1
+
+def _deck_order(seed: int) -> List[int]:
+    """Kind ids of the deck simulator.new_game(seed) deals, starter removed."""
+    return Deck.shuffled(seed, without=("Tile_Starter",)).kind_ids()
+
+class BatchSimulator:
+    """`games` games with the decks of simulator.new_game(seed), seed + 1, ...; seat i plays
+    `policies[i]` ("random" or "greedy"). `run()` plays them all to the end.
+
+    The grid of every game is a (2 * radius + 1)^2 array centred on the starter; it is enlarged
+    for all games as soon as one of them gets close to its border.
+    """
+    def __init__(self, games: int, seed: int = 0, policies: Sequence[str] = ("random", "random"),
+                 meeple_rate: float = 0.3, radius: int = 16, rng_seed: Optional[int] = None):
+        for policy in policies:
+            if policy not in POLICIES:
+                raise ValueError(f"Unknown batch policy {policy!r}; expected one of {POLICIES}")
+        self.games = games
+        self.seed = seed
+        self.policies = tuple(policies)
+        self.meeple_rate = meeple_rate
+        self.rng = np.random.default_rng(seed if rng_seed is None else rng_seed)
+        n = games
+        self.decks = np.array([_deck_order(seed + g) for g in range(n)], dtype=np.int16).reshape(n, _TURNS)
+        self.draw = np.zeros(n, dtype=np.int64)         # next deck index
+        self.to_move = np.zeros(n, dtype=np.int64)
+        self.tiles = np.zeros(n, dtype=np.int64)        # tiles placed, starter included
+        self.discarded = np.zeros(n, dtype=np.int64)
+        self.scores = np.zeros((n, 2), dtype=np.int64)
+        self.meeples = np.full((n, 2), 7, dtype=np.int64)
+        self._init_grid(radius)
+        # Frontier: open cells with their [mask, value] constraint, unordered
+        frontier = 2 * _TURNS + 8
+        self.f_cell = np.zeros((n, frontier), dtype=np.int64)
+        self.f_mask = np.zeros((n, frontier), dtype=np.int32)     # 24-bit packed sides, as Board.frontier
+        self.f_value = np.full((n, frontier), -1, dtype=np.int32)  # -1 in unused slots: nothing fits
+        self.f_count = np.zeros(n, dtype=np.int64)
+        # Segments: one union-find per game over the features of every placed tile
+        self.parent = np.tile(np.arange(_SEGMENTS, dtype=np.int64), (n, 1))
+        self.size = np.ones((n, _SEGMENTS), dtype=np.int64)
+        self.open = np.zeros((n, _SEGMENTS), dtype=np.int64)       # root -> open edge nodes
+        self.pennants = np.zeros((n, _SEGMENTS), dtype=np.int64)   # root -> pennants
+        self.occupants = np.zeros((2, n, _SEGMENTS), dtype=np.int64)  # player, game, root -> meeples
+        self.seg_tile = np.zeros((n, _SEGMENTS), dtype=np.int64)   # placement index of the segment's tile
+        self.seg_type = np.full((n, _SEGMENTS), -1, dtype=np.int64)
+        self.n_seg = np.zeros(n, dtype=np.int64)
+        self.pair_field = np.zeros((n, max(_FIELD_PAIRS, 1)), dtype=np.int64)
+        self.pair_city = np.zeros((n, max(_FIELD_PAIRS, 1)), dtype=np.int64)
+        self.n_pair = np.zeros(n, dtype=np.int64)
+        self.mon_x = np.zeros((n, max(_MONASTERIES, 1)), dtype=np.int64)
+        self.mon_y = np.zeros((n, max(_MONASTERIES, 1)), dtype=np.int64)
+        self.mon_owner = np.full((n, max(_MONASTERIES, 1)), -1, dtype=np.int64)
+        self.mon_count = np.zeros((n, max(_MONASTERIES, 1)), dtype=np.int64)
+        self.n_mon = np.zeros(n, dtype=np.int64)
+        # Per turn: (x, y, rotation, meeple placed, meeple tried) with -1 for none, legal placements, scores
+        self.moves = np.full((n, _TURNS, 5), -1, dtype=np.int64)
+        self.legal_counts = np.zeros((n, _TURNS), dtype=np.int64)
+        self.turn_scores = np.zeros((n, _TURNS, 2), dtype=np.int64)
+        self.seconds = 0.0
+        every = np.arange(n)
+        self._place(every, np.full(n, _STARTER), np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.int64))
+
+    # --- Public API ---
+
+    def run(self) -> SimulationReport:
+        start = time.perf_counter()
+        active = np.arange(self.games)
+        while active.size:
+            self._turn(active)
+            active = active[self.draw[active] < _TURNS]
+        self._final_scoring()
+        self.seconds = time.perf_counter() - start
+        return self.report()
+
+    def report(self) -> SimulationReport:
+        results = [GameResult(self.seed + g, tuple(int(s) for s in self.scores[g]), tuple(int(m) for m in self.meeples[g]),
+                              int(self.tiles[g] - 1), int(self.discarded[g])) for g in range(self.games)]
+        return SimulationReport(results, self.seconds)
+
+    def game_moves(self, game: int) -> List[Tuple[int, int, int, Optional[int], Optional[int]]]:
+        """(x, y, rotation, meeple segment placed, meeple segment tried) of every turn of one game."""
+        return [(int(x), int(y), int(rot), None if placed < 0 else int(placed), None if tried < 0 else int(tried))
+                for x, y, rot, placed, tried in self.moves[game, :self.tiles[game] - 1]]
+
+    # --- Grid ---
+
+    def _init_grid(self, radius: int):
+        self.radius = radius
+        self.width = 2 * radius + 1
+        cells = self.width * self.width
+        self.code = np.full((self.games, cells), -1, dtype=np.int64)   # kind * 4 + step, -1 when empty
+        self.base = np.zeros((self.games, cells), dtype=np.int64)      # first segment id of the tile
+        self.slot = np.full((self.games, cells), -1, dtype=np.int64)   # frontier slot of an open cell
+        self.offsets = np.array([dy * self.width + dx for _, dx, dy in NEIGHBOR_OFFSETS])
+
+    def _cell(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        return (y + self.radius) * self.width + (x + self.radius)
+
+    def _xy(self, cell: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return cell % self.width - self.radius, cell // self.width - self.radius
+
+    def _grow(self):
+        """Doubles the radius, keeping every game's tiles and frontier at the same coordinates."""
+        old_r, old_w = self.radius, self.width
+        code, base, slot = self.code, self.base, self.slot
+        fx, fy = self.f_cell % old_w - old_r, self.f_cell // old_w - old_r
+        self._init_grid(old_r * 2)
+        lo, hi = self.radius - old_r, self.radius + old_r + 1
+        n, w = self.games, self.width
+        for new, old in ((self.code, code), (self.base, base), (self.slot, slot)):
+            new.reshape(n, w, w)[:, lo:hi, lo:hi] = old.reshape(n, old_w, old_w)
+        self.f_cell = self._cell(fx, fy)
+
+    # --- Union-find ---
+
+    def _find(self, g: np.ndarray, s: np.ndarray) -> np.ndarray:
+        parent = self.parent
+        while True:
+            up = parent[g, s]
+            if np.array_equal(up, s): return s
+            s = up
+
+    def _union(self, g: np.ndarray, a: np.ndarray, b: np.ndarray):
+        """Joins segment a with segment b in game g (each game at most once per call), as DSU.union:
+        union by size, and every node connection closes two open edge nodes."""
+        ra, rb = self._find(g, a), self._find(g, b)
+        same = ra == rb
+        self.open[g[same], ra[same]] -= 2
+        g, ra, rb = g[~same], ra[~same], rb[~same]
+        swap = self.size[g, ra] < self.size[g, rb]
+        ra, rb = np.where(swap, rb, ra), np.where(swap, ra, rb)
+        self.parent[g, rb] = ra
+        self.size[g, ra] += self.size[g, rb]
+        self.pennants[g, ra] += self.pennants[g, rb]
+        self.open[g, ra] += self.open[g, rb] - 2
+        self.occupants[:, g, ra] += self.occupants[:, g, rb]
+        self.occupants[:, g, rb] = 0
+
+    def _all_roots(self, g: np.ndarray) -> np.ndarray:
+        """Root of every segment of games g, (len(g), segments), by pointer doubling (union by size
+        keeps the trees shallower than log2(segments))."""
+        parent = self.parent[g]
+        reach = 1
+        while reach < _SEGMENTS.bit_length():
+            parent = np.take_along_axis(parent, parent, axis=1)
+            reach *= 2
+        return parent
+
+    def _tiles_of(self, g: np.ndarray, root: np.ndarray) -> np.ndarray:
+        """Distinct tiles in the set of `root` in each game of g (a tile can give a set several
+        segments, which DSU.tiles discounts through its shared keys)."""
+        member = (self._all_roots(g) == root[:, None]) & (np.arange(_SEGMENTS) < self.n_seg[g][:, None])
+        rows, seg = np.nonzero(member)
+        seen = np.zeros((len(g), _TURNS + 1), dtype=bool)
+        seen[rows, self.seg_tile[g[rows], seg]] = True
+        return seen.sum(axis=1)
+
+    def _distinct_tiles(self, roots: np.ndarray, wanted: np.ndarray) -> np.ndarray:
+        """Distinct tiles of the sets whose root is `wanted` (games, segments), indexed like `roots`."""
+        games = np.broadcast_to(np.arange(self.games)[:, None], roots.shape)
+        keep = (np.arange(_SEGMENTS) < self.n_seg[:, None]) & wanted[games, roots]
+        keys = np.unique(((games * _SEGMENTS + roots) * (_TURNS + 1) + self.seg_tile)[keep])
+        return np.bincount(keys // (_TURNS + 1), minlength=roots.size).reshape(roots.shape)
+
+    # --- Moves ---
+
+    def _place(self, g: np.ndarray, kind: np.ndarray, x: np.ndarray, y: np.ndarray, step: np.ndarray):
+        """Places one tile in each game of g (legality already checked), as Board.place_tile."""
+        code = kind * 4 + step
+        cell = self._cell(x, y)
+        base = self.n_seg[g]
+        # New sets for the tile's features
+        columns = np.arange(_NF)
+        valid = columns < _NFEAT[kind][:, None]
+        rows, seg = np.broadcast_to(g[:, None], valid.shape)[valid], (base[:, None] + columns)[valid]
+        self.open[rows, seg] = _FOPEN[kind][valid]
+        self.pennants[rows, seg] = _FPEN[kind][valid]
+        self.seg_type[rows, seg] = _FTYPE[kind][valid]
+        self.seg_tile[rows, seg] = np.broadcast_to(self.tiles[g][:, None], valid.shape)[valid]
+        self.n_seg[g] += _NFEAT[kind]
+        pairs = np.arange(_PAIR.shape[1])
+        valid = pairs < _NPAIRS[kind][:, None]
+        rows, at = np.broadcast_to(g[:, None], valid.shape)[valid], (self.n_pair[g][:, None] + pairs)[valid]
+        self.pair_field[rows, at] = (base[:, None] + _PAIR[kind, :, 0])[valid]
+        self.pair_city[rows, at] = (base[:, None] + _PAIR[kind, :, 1])[valid]
+        self.n_pair[g] += _NPAIRS[kind]
+
+        # Unions with the neighbours, node by node (edge types match, the move being legal)
+        neighbour_cells = cell[:, None] + self.offsets
+        neighbour_codes = self.code[g[:, None], neighbour_cells]
+        for d in range(4):
+            has = neighbour_codes[:, d] >= 0
+            if not has.any(): continue
+            gd, nc = g[has], neighbour_codes[has, d]
+            mine = base[has][:, None] + _SIDE_F[code[has], d]
+            theirs = self.base[gd, neighbour_cells[has, d]][:, None] + _SIDE_F[nc, _OPPOSITE[d]][:, ::-1]
+            for k in range(3):
+                self._union(gd, mine[:, k], theirs[:, k])
+        self.code[g, cell] = code
+        self.base[g, cell] = base
+        self.tiles[g] += 1
+
+        # Frontier: the cell closes, its empty neighbours get the edges of the new tile
+        slot = self.slot[g, cell]
+        taken = slot >= 0
+        if taken.any():
+            gt, st = g[taken], slot[taken]
+            last = self.f_count[gt] - 1
+            moved = self.f_cell[gt, last]
+            for array in (self.f_cell, self.f_mask, self.f_value):
+                array[gt, st] = array[gt, last]
+            self.slot[gt, moved] = st
+            self.slot[gt, cell[taken]] = -1
+            self.f_value[gt, last] = -1
+            self.f_count[gt] -= 1
+        for d in range(4):
+            empty = neighbour_codes[:, d] < 0
+            gd, nc = g[empty], neighbour_cells[empty, d]
+            value = _NB_VALUE[code[empty], d]
+            slot = self.slot[gd, nc]
+            new = slot < 0
+            slot = np.where(new, self.f_count[gd], slot)
+            self.f_count[gd] += new
+            self.slot[gd, nc] = slot
+            self.f_cell[gd, slot] = nc
+            self.f_mask[gd, slot] = np.where(new, 0, self.f_mask[gd, slot]) | _NB_MASK[d]
+            self.f_value[gd, slot] = np.where(new, 0, self.f_value[gd, slot]) | value
+
+        # Monasteries: neighbours count the new tile, a new monastery counts its 3x3 block
+        if self.n_mon[g].any():
+            near = ((np.abs(self.mon_x[g] - x[:, None]) <= 1) & (np.abs(self.mon_y[g] - y[:, None]) <= 1)
+                    & (np.arange(self.mon_x.shape[1]) < self.n_mon[g][:, None]))
+            self.mon_count[g] += near
+        monastery = _MONASTERY_SEG[kind] >= 0
+        if monastery.any():
+            gm, cm = g[monastery], cell[monastery]
+            area = cm[:, None] + (np.arange(-1, 2)[:, None] * self.width + np.arange(-1, 2)).ravel()
+            at = self.n_mon[gm]
+            self.mon_x[gm, at], self.mon_y[gm, at] = x[monastery], y[monastery]
+            self.mon_count[gm, at] = (self.code[gm[:, None], area] >= 0).sum(axis=1)
+            self.mon_owner[gm, at] = -1
+            self.n_mon[gm] += 1
+
+    def _place_meeple(self, g: np.ndarray, kind: np.ndarray, cell: np.ndarray, segment: np.ndarray,
+                      player: np.ndarray) -> np.ndarray:
+        """Meeples of `player` on segment index `segment` of the tile just placed at `cell`, as
+        Board.place_meeple; returns which games accepted it."""
+        ok = (segment >= 0) & (self.meeples[g, player] > 0)
+        on_monastery = ok & (segment == _MONASTERY_SEG[kind])
+        if on_monastery.any():
+            gm = g[on_monastery]
+            self.mon_owner[gm, self.n_mon[gm] - 1] = player[on_monastery]
+        feature = np.where(ok, _SEG2F[kind, np.maximum(segment, 0)], -1)
+        on_feature = ok & (feature >= 0)
+        gf = g[on_feature]
+        root = self._find(gf, self.base[gf, cell[on_feature]] + feature[on_feature])
+        free = self.occupants[0, gf, root] + self.occupants[1, gf, root] == 0
+        self.occupants[player[on_feature][free], gf[free], root[free]] = 1
+        ok[np.flatnonzero(on_feature)[~free]] = False
+        self.meeples[g[ok], player[ok]] -= 1
+        return ok
+
+    def _score_completions(self, g: np.ndarray, kind: np.ndarray, cell: np.ndarray):
+        """Scores the cities and roads of the tiles just placed that are complete and occupied,
+        then the occupied monasteries whose block is full, as Board.get_completed_features."""
+        base = self.base[g, cell]
+        for f in range(_NF):
+            candidate = (f < _NFEAT[kind]) & (_FTYPE[kind, f] >= 0) & (_FTYPE[kind, f] <= _ROAD)
+            if not candidate.any(): continue
+            gc = g[candidate]
+            root = self._find(gc, base[candidate] + f)
+            m0, m1 = self.occupants[0, gc, root], self.occupants[1, gc, root]
+            done = (self.open[gc, root] == 0) & (m0 + m1 > 0)
+            if not done.any(): continue
+            gd, rd, m0, m1 = gc[done], root[done], m0[done], m1[done]
+            points = (self._tiles_of(gd, rd) + self.pennants[gd, rd]) * np.where(self.seg_type[gd, rd] == _CITY, 2, 1)
+            self.scores[gd, 0] += points * (m0 >= m1)
+            self.scores[gd, 1] += points * (m1 >= m0)
+            self.meeples[gd, 0] += m0
+            self.meeples[gd, 1] += m1
+            self.occupants[:, gd, rd] = 0
+        if self.n_mon[g].any():
+            full = (self.mon_count[g] == 9) & (self.mon_owner[g] >= 0)
+            rows, at = np.nonzero(full)
+            gm = g[rows]
+            owner = self.mon_owner[gm, at]
+            self.scores[gm, owner] += 9
+            self.meeples[gm, owner] += 1
+            self.mon_owner[gm, at] = -1
+
+    def _legal(self, g: np.ndarray, kind: np.ndarray) -> np.ndarray:
+        """(len(g), frontier slots, 4 steps) placements of `kind` that fit, as Board.get_legal_moves."""
+        width = int(self.f_count[g].max())
+        mask, value = self.f_mask[g, :width], self.f_value[g, :width]
+        signature = _SIG[kind]
+        fits = (signature[:, None, :] & mask[:, :, None]) == value[:, :, None]
+        fits &= _ROTATIONS[kind][:, None, :]
+        return fits
+
+    def _turn(self, active: np.ndarray):
+        """One turn of every active game: draw until a tile fits (discarding the others), choose,
+        place, meeple, completions."""
+        pending = active
+        while pending.size:
+            kind = self.decks[pending, self.draw[pending]].astype(np.int64)
+            fits = self._legal(pending, kind)
+            counts = fits.sum(axis=(1, 2))
+            playable = counts > 0
+            blocked = pending[~playable]
+            self.draw[blocked] += 1
+            self.discarded[blocked] += 1
+            if playable.any():
+                self._play(pending[playable], kind[playable], fits[playable], counts[playable])
+            pending = blocked[self.draw[blocked] < _TURNS]
+
+    def _play(self, g: np.ndarray, kind: np.ndarray, fits: np.ndarray, counts: np.ndarray):
+        player = self.to_move[g]
+        choice = np.zeros(len(g), dtype=np.int64)
+        segment = np.full(len(g), -1, dtype=np.int64)
+        for seat, policy in enumerate(self.policies):
+            mine = player == seat
+            if not mine.any(): continue
+            if policy == "greedy":
+                choice[mine], segment[mine] = self._greedy(g[mine], kind[mine], fits[mine], seat)
+            else:
+                choice[mine], segment[mine] = self._random(g[mine], kind[mine], fits[mine], counts[mine], seat)
+        slot, step = choice // 4, choice % 4
+        cell = self.f_cell[g, slot]
+        x, y = self._xy(cell)
+        turn = self.tiles[g] - 1
+        self.legal_counts[g, turn] = counts
+        self._place(g, kind, x, y, step)
+        placed = self._place_meeple(g, kind, cell, segment, player)
+        self._score_completions(g, kind, cell)
+        self.moves[g, turn] = np.stack([x, y, step * 90, np.where(placed, segment, -1), segment], axis=1)
+        self.turn_scores[g, turn] = self.scores[g]
+        self.to_move[g] = 1 - player
+        self.draw[g] += 1
+        if np.abs(x).max(initial=0) >= self.radius - 1 or np.abs(y).max(initial=0) >= self.radius - 1:
+            self._grow()
+
+    # --- Policies: (flat frontier slot * 4 + step, meeple segment or -1) per game ---
+
+    def _random(self, g: np.ndarray, kind: np.ndarray, fits: np.ndarray, counts: np.ndarray, seat: int):
+        rng = self.rng
+        flat = fits.reshape(len(g), -1)
+        target = (rng.random(len(g)) * counts).astype(np.int64)
+        choice = (flat.cumsum(axis=1, dtype=np.int16) > target[:, None]).argmax(axis=1)
+        attempt = (rng.random(len(g)) < self.meeple_rate) & (self.meeples[g, seat] > 0)
+        segment = np.where(attempt, (rng.random(len(g)) * _NSEGS[kind]).astype(np.int64), -1)
+        return choice, segment
+
+    def _greedy(self, g: np.ndarray, kind: np.ndarray, fits: np.ndarray, seat: int):
+        """The placement with the best estimated immediate score delta for the mover; a meeple goes
+        on a feature the placement completes when it is unoccupied (it scores at once), otherwise
+        on a random segment `meeple_rate` of the time. Features are read from the middle node of
+        each side, where every city and road edge lies; ties are broken at random."""
+        m, width = fits.shape[0], fits.shape[1]
+        cells = self.f_cell[g, :width]
+        # Neighbour feature behind each side of each frontier cell (rotation independent)
+        neighbour_cells = cells[:, :, None] + self.offsets                     # (m, F, 4 board sides)
+        rows = np.broadcast_to(g[:, None, None], neighbour_cells.shape)
+        ncode = self.code[rows, neighbour_cells]
+        has = ncode >= 0
+        nseg = self.base[rows, neighbour_cells] + _SIDE_F[np.maximum(ncode, 0), np.array(_OPPOSITE), 1]
+        nroot = np.where(has, self._find(rows.ravel(), np.where(has, nseg, 0).ravel()).reshape(has.shape), -1)
+        ntype = np.where(has, self.seg_type[rows, np.maximum(nroot, 0)], -1)
+        linked = has & (ntype <= _ROAD)
+        nroot_safe = np.maximum(nroot, 0)
+        nopen = self.open[rows, nroot_safe]
+        nsize = self.size[rows, nroot_safe]
+        npen = self.pennants[rows, nroot_safe]
+        nmine = self.occupants[seat, rows, nroot_safe]
+        ntheirs = self.occupants[1 - seat, rows, nroot_safe]
+
+        # Per rotation: our feature on each board side (middle node)
+        steps = np.arange(4)
+        ours = _SIDE_F[(kind[:, None] * 4 + steps)[:, :, None], np.arange(4), 1]  # (m, 4 steps, 4 sides)
+        ours = np.broadcast_to(ours[:, None], (m, width, 4, 4))
+        link = np.broadcast_to(linked[:, :, None, :], ours.shape)
+        root = np.broadcast_to(nroot[:, :, None, :], ours.shape)
+        # A neighbouring feature reached from several sides by the same feature counts once
+        first_root = link.copy()
+        first_feature = link.copy()
+        for d in range(4):
+            for e in range(d):
+                same = link[..., e] & (ours[..., e] == ours[..., d])
+                first_root[..., d] &= ~(same & (root[..., e] == root[..., d]))
+                first_feature[..., d] &= ~same
+        pairs = np.where(np.broadcast_to(ntype[:, :, None, :], ours.shape) == _CITY, 3, 1)
+        total_open = np.zeros(ours.shape, dtype=np.int64)
+        total_size = np.zeros(ours.shape, dtype=np.int64)
+        total_pen = np.zeros(ours.shape, dtype=np.int64)
+        mine = np.zeros(ours.shape, dtype=np.int64)
+        theirs = np.zeros(ours.shape, dtype=np.int64)
+        for e in range(4):
+            same = link[..., e:e + 1] & (ours[..., e:e + 1] == ours)
+            counted = same & first_root[..., e:e + 1]
+            total_open += same * -2 * pairs[..., e:e + 1] + counted * nopen[:, :, None, e:e + 1]
+            total_size += counted * nsize[:, :, None, e:e + 1]
+            total_pen += counted * npen[:, :, None, e:e + 1]
+            mine += counted * nmine[:, :, None, e:e + 1]
+            theirs += counted * ntheirs[:, :, None, e:e + 1]
+        own = np.take_along_axis(np.broadcast_to(_FOPEN[kind][:, None, None, :], (m, width, 4, _NF)), ours, axis=3)
+        own_pen = np.take_along_axis(np.broadcast_to(_FPEN[kind][:, None, None, :], (m, width, 4, _NF)), ours, axis=3)
+        is_city = np.take_along_axis(np.broadcast_to(_FTYPE[kind][:, None, None, :], (m, width, 4, _NF)), ours, axis=3) == _CITY
+        closes = first_feature & (own + total_open == 0)
+        points = (1 + total_size + own_pen + total_pen) * np.where(is_city, 2, 1) * closes
+        delta = (points * (mine >= theirs) * (mine > 0) - points * (theirs >= mine) * (theirs > 0)).sum(axis=3)
+        free = points * ((mine + theirs) == 0)
+        claim = free.max(axis=3)
+        can_claim = self.meeples[g, seat] > 0
+        value = delta + claim * can_claim[:, None, None] + self.rng.random(delta.shape) * 0.5
+        value = np.where(fits, value, -np.inf).reshape(m, -1)
+        choice = value.argmax(axis=1)
+        slot, step = choice // 4, choice % 4
+        at = np.arange(m)
+        best_side = free[at, slot, step].argmax(axis=1)
+        claimed = (claim[at, slot, step] > 0) & can_claim
+        feature = ours[at, slot, step, best_side]
+        segment = np.full(m, -1, dtype=np.int64)
+        # Feature -> segment index of the tile
+        seg_of = np.argmax(_SEG2F[kind] == feature[:, None], axis=1)
+        segment[claimed] = seg_of[claimed]
+        attempt = ~claimed & (self.rng.random(m) < self.meeple_rate) & can_claim
+        segment[attempt] = (self.rng.random(int(attempt.sum())) * _NSEGS[kind[attempt]]).astype(np.int64)
+        return choice, segment
+
+    # --- End of game ---
+
+    def _final_scoring(self):
+        """Incomplete occupied cities, roads and monasteries, then fields, as Board.calculate_final_scores."""
+        g = np.arange(self.games)
+        roots = self._all_roots(g)
+        m0, m1 = self.occupants[0], self.occupants[1]
+        occupied = (m0 + m1) > 0
+        # Cities and roads: one point per tile and pennant
+        feature = occupied & (self.seg_type <= _ROAD) & (self.seg_type >= 0)
+        distinct = self._distinct_tiles(roots, feature)
+        points = (distinct + self.pennants) * feature
+        self.scores[:, 0] += (points * (m0 >= m1)).sum(axis=1)
+        self.scores[:, 1] += (points * (m1 >= m0)).sum(axis=1)
+        # Monasteries: their block count
+        owned = self.mon_owner >= 0
+        for p in range(2):
+            self.scores[:, p] += (self.mon_count * (self.mon_owner == p) * owned).sum(axis=1)
+        # Fields: 3 points per distinct complete city bordering the field
+        valid = np.arange(self.pair_field.shape[1]) < self.n_pair[:, None]
+        field = np.take_along_axis(roots, self.pair_field, axis=1)
+        city = np.take_along_axis(roots, self.pair_city, axis=1)
+        rows = np.broadcast_to(g[:, None], field.shape)
+        keep = valid & occupied[rows, field] & (self.open[rows, city] == 0) & (self.seg_type[rows, field] == _FIELD)
+        keys = np.unique((rows * _SEGMENTS + field)[keep] * _SEGMENTS + city[keep])
+        fields = keys // _SEGMENTS
+        cities = np.bincount(fields, minlength=self.games * _SEGMENTS).reshape(self.games, _SEGMENTS)
+        points = 3 * cities
+        field_occupied = self.seg_type == _FIELD
+        self.scores[:, 0] += (points * field_occupied * (m0 >= m1) * (m0 > 0)).sum(axis=1)
+        self.scores[:, 1] += (points * field_occupied * (m1 >= m0) * (m1 > 0)).sum(axis=1)
+
+def run_batch(games: int, seed: int = 0, policies: Sequence[str] = ("random", "random"), meeple_rate: float = 0.3,
+              rng_seed: Optional[int] = None) -> SimulationReport:
+    """Plays `games` games in one batch, decks seeded seed, seed + 1, ... as simulator.run_games."""
+    return BatchSimulator(games, seed, policies, meeple_rate, rng_seed=rng_seed).run()
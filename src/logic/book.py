@@ -0,0 +1,214 @@
+import hashlib
+import mmap
+import os
+import struct
+from collections import Counter, defaultdict
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .models import Tile, TileType
+from .deck import KINDS
+from .engine import Board, PLAYERS, Action
+
+
+# --- Opening book ---
+# Moves for the first turns of a game, precomputed offline from self-play
+# (scripts_research/build_opening_book.py) and looked up instead of searched.
+#
+# Positions are keyed by their canonical form under the 8 symmetries of the square grid:
+# every transform of the placed tiles (as geometry: segment types, edge nodes, pennants),
+# their meeples, the scores, meeples in hand, player to move and the drawn tile is serialised,
+# and the smallest serialisation is hashed to 64 bits. Tile kinds with the same geometry (the
+# starter and D, G and H, ...) are one tile to the book. Rotations are exact symmetries of the
+# game; a reflection is exact except for the two chiral kinds (O, P) whose mirror images are
+# not in the deck, so it merges positions whose futures differ only in how those may be drawn.
+# The starter is fixed at (0, 0), so in practice only the left-right mirror merges positions.
+#
+# Book moves are stored in the canonical frame as (x, y, placed geometry, meeple edge nodes)
+# and mapped back by matching them against the position's legal actions, so a book move is
+# always legal in the position it is played in.
+#
+# File layout (little-endian): a 12-byte header (magic, format version, record count, most tiles
+# on the board in any recorded position), then fixed 16-byte records sorted by key,
+# binary-searched in place over a read-only mmap. Positions with more tiles than that are never
+# in the book, so they are not looked up.
+
+BOOK_MAGIC = b"COBK"
+BOOK_VERSION = 2
+
+_HEADER = struct.Struct("<4sHIH")
+_RECORD = struct.Struct("<QbbHHH")  # key, x, y, layout code, meeple mask, visits
+_MONASTERY = 1 << 12  # meeple mask of a segment without edge nodes
+
+# A transform is (mirror, quarter turns): mirror x -> -x first, then rotate clockwise
+TRANSFORMS = tuple((mirror, turns) for mirror in (False, True) for turns in range(4))
+
+def _node(n: int, mirror: bool, turns: int) -> int:
+    if mirror: n = (2 - n) % 12  # N 0-2 and S 6-8 run backwards, E 3-5 and W 9-11 swap
+    return (n + 3 * turns) % 12
+
+def _cell(x: int, y: int, mirror: bool, turns: int) -> Tuple[int, int]:
+    if mirror: x = -x
+    for _ in range(turns):
+        x, y = y, -x
+    return x, y
+
+def _segment_mask(nodes, step: int, mirror: bool, turns: int) -> int:
+    if not nodes: return _MONASTERY
+    mask = 0
+    for n in nodes:
+        mask |= 1 << _node((n + 3 * step) % 12, mirror, turns)
+    return mask
+
+def _compile():
+    """(kind id, step, transform index) -> (layout code, meeple mask per segment), and
+    (kind id, mirror) -> code of the tile in hand (the smallest code over its rotations)."""
+    codes: Dict[frozenset, int] = {}
+    placed = {}
+    for mirror in (False, True):
+        for kind in KINDS:
+            for step in range(4):
+                for t, (m, turns) in enumerate(TRANSFORMS):
+                    if m != mirror: continue
+                    masks = tuple(_segment_mask(s.nodes, step, m, turns) for s in kind.segments)
+                    layout = frozenset((s.type, masks[i], s.has_pennant, s.is_monastery) for i, s in enumerate(kind.segments))
+                    placed[(kind.id, step, t)] = (codes.setdefault(layout, len(codes)), masks)
+    in_hand = {(kind.id, mirror): min(placed[(kind.id, step, TRANSFORMS.index((mirror, 0)))][0] for step in range(4))
+               for kind in KINDS for mirror in (False, True)}
+    return placed, in_hand
+
+_PLACED, _IN_HAND = _compile()
+
+def _encode(board: Board, kind: TileType, t: int) -> bytes:
+    mirror, turns = TRANSFORMS[t]
+    cells = []
+    for (x, y), tile in board.grid.items():
+        code, masks = _PLACED[(tile.kind.id, tile.rotation // 90, t)]
+        meeples = tile.meeples
+        owners = tuple(sorted((masks[i], board.player_index[p]) for i, p in enumerate(meeples) if p is not None)) if meeples else ()
+        cells.append((_cell(x, y, mirror, turns), code, owners))
+    cells.sort()
+    parts = [struct.pack("<BHH", board.to_move, _IN_HAND[(kind.id, mirror)], len(cells))]
+    parts.extend(struct.pack("<ii", board.scores[p], board.meeple_counts[p]) for p in PLAYERS)
+    for (x, y), code, owners in cells:
+        parts.append(struct.pack("<iiHB", x, y, code, len(owners)))
+        parts.extend(struct.pack("<HB", mask, owner) for mask, owner in owners)
+    return b"".join(parts)
+
+def canonical_key(board: Board, tile: Tile) -> Tuple[int, int]:
+    """(64-bit book key of the position with `tile` drawn, index in TRANSFORMS of a symmetry mapping
+    the position onto its canonical form). Equivalent positions get the same key."""
+    best, best_t = None, 0
+    for t in range(len(TRANSFORMS)):
+        data = _encode(board, tile.kind, t)
+        if best is None or data < best:
+            best, best_t = data, t
+    return int.from_bytes(hashlib.blake2b(best, digest_size=8).digest(), "little"), best_t
+
+def canonical_action(tile: Tile, action: Action, t: int) -> Tuple[int, int, int, int]:
+    """`action` for `tile` seen through TRANSFORMS[t]: (x, y, layout code, meeple mask or 0)."""
+    x, y, rot, meeple = action
+    mirror, turns = TRANSFORMS[t]
+    code, masks = _PLACED[(tile.kind.id, rot // 90, t)]
+    return (*_cell(x, y, mirror, turns), code, 0 if meeple is None else masks[meeple])
+
+class BookMove(NamedTuple):
+    action: Action
+    visits: int  # self-play visits of the position when the book was built
+
+class OpeningBook:
+    """A read-only opening book over a buffer holding the file (usually a memory map)."""
+    def __init__(self, data):
+        if len(data) < _HEADER.size: raise ValueError("Opening book is truncated")
+        magic, version, count, tiles = _HEADER.unpack_from(data)
+        if magic != BOOK_MAGIC: raise ValueError("Not an opening book")
+        if version != BOOK_VERSION: raise ValueError(f"Unsupported opening book version {version} (expected {BOOK_VERSION})")
+        if len(data) < _HEADER.size + count * _RECORD.size: raise ValueError("Opening book is truncated")
+        self.data = data
+        self.count = count
+        self.tiles = tiles
+
+    @classmethod
+    def open(cls, path: str) -> "OpeningBook":
+        """Maps the file at `path` read-only; pages are loaded on first use and shared between processes."""
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def load(cls, path: Optional[str]) -> Optional["OpeningBook"]:
+        """The book at `path`, or None when there is no file there."""
+        if not path or not os.path.exists(path): return None
+        return cls.open(path)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def record(self, key: int) -> Optional[Tuple[int, int, int, int, int]]:
+        """(x, y, layout code, meeple mask, visits) stored under `key`, or None."""
+        data, lo, hi = self.data, 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = _HEADER.size + mid * _RECORD.size
+            (found,) = struct.unpack_from("<Q", data, offset)
+            if found == key: return _RECORD.unpack_from(data, offset)[1:]
+            if found < key: lo = mid + 1
+            else: hi = mid
+        return None
+
+    def lookup(self, board: Board, tile: Tile, player_name: Optional[str] = None) -> Optional[BookMove]:
+        """The book move for `player_name` (by default the player to move) holding `tile`, or None
+        when the position is not in the book."""
+        if len(board.grid) > self.tiles: return None
+        key, t = canonical_key(board, tile)
+        stored = self.record(key)
+        if stored is None: return None
+        wanted, visits = stored[:4], stored[4]
+        player = player_name or PLAYERS[board.to_move]
+        for action in board.legal_actions(tile, player):
+            if canonical_action(tile, action, t) == wanted:
+                return BookMove(action, visits)
+        return None
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap): self.data.close()
+
+class BookBuilder:
+    """Collects the moves played in self-play positions; each position's book move is the one
+    chosen most often there."""
+    def __init__(self):
+        self.moves: Dict[int, Counter] = defaultdict(Counter)
+        self.tiles = 0
+
+    def add(self, board: Board, tile: Tile, action: Action):
+        key, t = canonical_key(board, tile)
+        self.add_record(key, canonical_action(tile, action, t), len(board.grid))
+
+    def add_record(self, key: int, move: Tuple[int, int, int, int], tiles: int, count: int = 1):
+        """Adds moves already in canonical form (as collected by another process) in a position
+        with `tiles` tiles on the board."""
+        self.moves[key][move] += count
+        self.tiles = max(self.tiles, tiles)
+
+    def entries(self, min_visits: int = 1) -> Iterator[Tuple[int, Tuple[int, int, int, int], int]]:
+        """(key, most played canonical move, visits) of every position visited at least min_visits
+        times, in key order; ties go to the smaller move."""
+        for key in sorted(self.moves):
+            counts = self.moves[key]
+            visits = sum(counts.values())
+            if visits < min_visits: continue
+            move = min(counts, key=lambda m: (-counts[m], m))
+            x, y = move[0], move[1]
+            if -128 <= x < 128 and -128 <= y < 128:
+                yield key, move, visits
+
+    def to_bytes(self, min_visits: int = 1) -> bytes:
+        records: List[bytes] = [_RECORD.pack(key, *move, min(visits, 0xFFFF)) for key, move, visits in self.entries(min_visits)]
+        return _HEADER.pack(BOOK_MAGIC, BOOK_VERSION, len(records), self.tiles) + b"".join(records)
+
+    def save(self, path: str, min_visits: int = 1) -> int:
+        """Writes the book to `path` (atomically) and returns its number of positions."""
+        data = self.to_bytes(min_visits)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return (len(data) - _HEADER.size) // _RECORD.size
@@ -1,17 +1,69 @@
-from .models import Tile, TileSegment, SegmentType, Side
+import random
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from .models import Tile, TileSegment, TileTable, TileType, SegmentType, Side
 
-def build_tile(name, segments, center=SegmentType.FIELD):
-    return Tile(name, segments, center_type=center)
+# --- Compiled lookup tables ---
+# Each edge node is encoded in 2 bits, a side (3 nodes, clockwise) in 6 bits and
+# a full rotation signature (N, E, S, W) in 24 bits, so edge matching on the
+# board is a single mask-and-compare instead of per-node segment scans.
+NODE_CODES = {SegmentType.CITY: 1, SegmentType.ROAD: 2, SegmentType.FIELD: 3}
+SIDE_BITS = 6
+SIDE_MASK = (1 << SIDE_BITS) - 1
 
-def _get_tile_factory(name, segments, center=SegmentType.FIELD):
-    return lambda: build_tile(name, [TileSegment(t, s, p, m) for t, s, p, m in segments], center)
+# Side code read in the opposite direction, as seen from the facing neighbour
+REVERSED_SIDE_CODES = tuple(((c & 3) << 4) | (c & 12) | (c >> 4) for c in range(1 << SIDE_BITS))
+
+def _compile_tile(segments: Tuple[TileSegment, ...]) -> TileTable:
+    base = [0] * 12
+    for i, segment in enumerate(segments):
+        for n in segment.nodes:
+            base[n] = i
+    sides, signatures, node_segments, layouts = [], [], [], []
+    for step in range(4):
+        shift = step * 3
+        nodes = tuple(base[(n - shift) % 12] for n in range(12))
+        codes = []
+        for side in Side:
+            code = 0
+            for n in Tile.get_side_nodes(side):
+                code = (code << 2) | NODE_CODES[segments[nodes[n]].type]
+            codes.append(code)
+        sides.append(tuple(codes))
+        signatures.append(sum(code << (SIDE_BITS * side) for side, code in enumerate(codes)))
+        node_segments.append(nodes)
+        layouts.append(frozenset((s.type, frozenset((n + shift) % 12 for n in s.nodes), s.has_pennant, s.is_monastery) for s in segments))
+    rotations = tuple(step for step in range(4) if layouts[step] not in layouts[:step])
+    equivalent = tuple(tuple(o for o in range(4) if layouts[o] == layouts[step]) for step in range(4))
+    # A field borders a city when they own neighbouring edge nodes (rotation-invariant)
+    field_cities = tuple(
+        tuple(ci for ci, c in enumerate(segments) if c.type == SegmentType.CITY
+              and any(abs(nf - nc) % 12 in (1, 11) for nf in f.nodes for nc in c.nodes))
+        if f.type == SegmentType.FIELD else ()
+        for f in segments)
+    side_segments = tuple(tuple(tuple(nodes[n] for n in Tile.get_side_nodes(side)) for side in Side) for nodes in node_segments)
+    features = tuple((i, s.type, 1 if s.has_pennant else 0, len(s.nodes), sum(1 for o in segments if o.type == s.type) > 1)
+                     for i, s in enumerate(segments) if s.type in NODE_CODES)
+    monastery = any(s.is_monastery or s.type == SegmentType.MONASTERY for s in segments)
+    return TileTable(tuple(sides), tuple(signatures), tuple(node_segments), rotations, equivalent, field_cities,
+                     side_segments, features, monastery)
+
+# name -> shared immutable tile type, in catalog order (TileType.id is the position)
+TILE_KINDS: Dict[str, TileType] = {}
+
+def _get_tile_factory(name, segments, center=SegmentType.FIELD) -> Callable[[], Tile]:
+    segments = tuple(TileSegment(t, tuple(s), p, m) for t, s, p, m in segments)
+    kind = TileType(len(TILE_KINDS), name, segments, center, _compile_tile(segments))
+    TILE_KINDS[name] = kind
+    return partial(Tile, kind)
 
 C, R, F, M = SegmentType.CITY, SegmentType.ROAD, SegmentType.FIELD, SegmentType.MONASTERY
 
 TILE_TYPES = {
     # Node Map: N(0,1,2), E(3,4,5), S(6,7,8), W(9,10,11)
-    "Tile_A": _get_tile_factory("Tile_A", [(F, [0,1,2,3,4,5,6,8,9,10,11], False, False), (R, [7], False, False)], M),
-    "Tile_B": _get_tile_factory("Tile_B", [(F, [0,1,2,3,4,5,6,7,8,9,10,11], False, False)], M),
+    # Monastery tiles: the cloister is a node-less centre segment, listed last
+    "Tile_A": _get_tile_factory("Tile_A", [(F, [0,1,2,3,4,5,6,8,9,10,11], False, False), (R, [7], False, False), (M, [], False, True)], M),
+    "Tile_B": _get_tile_factory("Tile_B", [(F, [0,1,2,3,4,5,6,7,8,9,10,11], False, False), (M, [], False, True)], M),
     "Tile_C": _get_tile_factory("Tile_C", [(C, [0,1,2,3,4,5,6,7,8,9,10,11], True, False)], C),
     "Tile_D": _get_tile_factory("Tile_D", [(C, [0,1,2], False, False), (R, [4,10], False, False), (F, [3], False, False), (F, [5,6,7,8,9], False, False), (F, [11], False, False)]),
     "Tile_E": _get_tile_factory("Tile_E", [(C, [0,1,2], False, False), (F, [3,4,5,6,7,8,9,10,11], False, False)]),
@@ -37,18 +89,203 @@ TILE_TYPES = {
     "Tile_Starter": _get_tile_factory("Tile_Starter", [(C, [0,1,2], False, False), (R, [4,10], False, False), (F, [3], False, False), (F, [5,6,7,8,9], False, False), (F, [11], False, False)]),
 }
 
+# Copies of each tile type in the base game (72 tiles, starter included)
+DECK_COUNTS: Dict[str, int] = {
+    "Tile_A": 2, "Tile_B": 4, "Tile_C": 1, "Tile_D": 4, "Tile_E": 5, "Tile_F": 2,
+    "Tile_G": 1, "Tile_H": 3, "Tile_I": 2, "Tile_J": 3, "Tile_K": 3, "Tile_L": 3,
+    "Tile_M": 2, "Tile_N": 3, "Tile_O": 2, "Tile_P": 3, "Tile_Q": 1, "Tile_R": 3,
+    "Tile_S": 2, "Tile_T": 1, "Tile_U": 8, "Tile_V": 9, "Tile_W": 4, "Tile_X": 1,
+    "Tile_Starter": 1
+}
+
+KINDS = list(TILE_KINDS.values())  # TileType.id is the catalog position
+
 def create_deck() -> list[Tile]:
-    counts = {
-        "Tile_A": 2, "Tile_B": 4, "Tile_C": 1, "Tile_D": 4, "Tile_E": 5, "Tile_F": 2,
-        "Tile_G": 1, "Tile_H": 3, "Tile_I": 2, "Tile_J": 3, "Tile_K": 3, "Tile_L": 3,
-        "Tile_M": 2, "Tile_N": 3, "Tile_O": 2, "Tile_P": 3, "Tile_Q": 1, "Tile_R": 3,
-        "Tile_S": 2, "Tile_T": 1, "Tile_U": 8, "Tile_V": 9, "Tile_W": 4, "Tile_X": 1,
-        "Tile_Starter": 1
-    }
     deck = []
-    for name, count in counts.items():
+    for name, count in DECK_COUNTS.items():
         for _ in range(count):
             deck.append(TILE_TYPES[name]())
     return deck
 
+def remaining_kinds(board, tile: Tile, deck: Optional[Sequence[Tile]] = None) -> List[int]:
+    """Kind ids of the tiles still to be drawn after `tile`, one entry per copy.
+
+    Uses the real remaining deck when given, otherwise the full deck minus the tiles on the
+    board and the tile in hand (discarded tiles are then unknown and still counted).
+    """
+    if isinstance(deck, Deck):
+        return deck.kind_ids()
+    if deck is not None:
+        return [t.kind.id for t in deck]
+    counts = dict(DECK_COUNTS)
+    for placed in board.grid.values():
+        counts[placed.name] -= 1
+    counts[tile.name] -= 1
+    return [TILE_KINDS[name].id for name, count in counts.items() for _ in range(max(count, 0))]
+
+# --- Counts-based deck ---
+# The draw pile as copies left per tile kind, optionally with a fixed draw order. Search and
+# simulation only need the multiset (sampling, "take one of kind t", undo, cheap copies for
+# chance nodes); a `Tile` is only created when a tile is drawn for play.
+
+_FULL_DECK = [TILE_KINDS[name].id for name, count in DECK_COUNTS.items() for _ in range(count)]  # create_deck() order
+
+class Deck:
+    """Remaining tiles as counts per kind id (`counts`, `total`). An ordered deck also keeps the
+    draw order (`order[pos:]` are still to come), so `draw()` deals it in sequence; an unordered
+    one draws at random in proportion to the counts. `take(kind)` removes one copy of a kind
+    (moving it to the front of an ordered deck) and `undo()` reverts the last draw or take, both
+    in constant time (bounded by the copies of one kind).
+    """
+    __slots__ = ("counts", "total", "order", "pos", "rng", "_slots", "_history")
+
+    def __init__(self, counts: Optional[Sequence[int]] = None, order: Optional[Sequence[int]] = None,
+                 rng: Optional[random.Random] = None):
+        self.order: Optional[List[int]] = list(order) if order is not None else None
+        self.pos = 0
+        if self.order is not None:
+            self.counts = [0] * len(KINDS)
+            for kind_id in self.order: self.counts[kind_id] += 1
+            # kind id -> positions of its copies still in the order, last (next to come) first
+            self._slots: Optional[List[List[int]]] = [[] for _ in KINDS]
+            for i in range(len(self.order) - 1, -1, -1): self._slots[self.order[i]].append(i)
+        else:
+            self.counts = list(counts) if counts is not None else [0] * len(KINDS)
+            self._slots = None
+        self.total = sum(self.counts)
+        self.rng = rng if rng is not None else random.Random()
+        self._history: List[int] = []
+
+    @classmethod
+    def full(cls, rng: Optional[random.Random] = None) -> "Deck":
+        """The 72 tiles of the base game, unordered."""
+        return cls([DECK_COUNTS[kind.name] for kind in KINDS], rng=rng)
+
+    @classmethod
+    def shuffled(cls, seed: Optional[int] = None, without: Iterable[str] = ()) -> "Deck":
+        """The base game in a seeded order: exactly what `random.Random(seed).shuffle(create_deck())`
+        deals (the shuffle only depends on the seed and the deck length). The first copy of every
+        kind named in `without` is left out, as the starter is by `simulator.new_game`."""
+        order = list(_FULL_DECK)
+        random.Random(seed).shuffle(order)
+        for name in without:
+            order.remove(TILE_KINDS[name].id)
+        return cls(order=order)
+
+    @classmethod
+    def of_kinds(cls, kind_ids: Iterable[int], rng: Optional[random.Random] = None) -> "Deck":
+        """An unordered deck of `kind_ids`, one entry per copy (as `remaining_kinds` lists them)."""
+        counts = [0] * len(KINDS)
+        for kind_id in kind_ids: counts[kind_id] += 1
+        return cls(counts, rng=rng)
+
+    @classmethod
+    def from_tiles(cls, tiles: Iterable[Tile]) -> "Deck":
+        """An ordered deck dealing `tiles` (e.g. a decoded snapshot) in sequence."""
+        return cls(order=[t.kind.id for t in tiles])
+
+    def __len__(self) -> int:
+        return self.total
+
+    def __bool__(self) -> bool:
+        return self.total > 0
+
+    def __iter__(self) -> Iterator[Tile]:
+        """Fresh tiles for the remaining copies, in draw order when there is one (prefer
+        `kind_ids()` when only the kinds are needed)."""
+        return (Tile(KINDS[kind_id]) for kind_id in self.kind_ids())
+
+    def kind_ids(self) -> List[int]:
+        """Kind ids still to be drawn, one entry per copy (as `remaining_kinds`)."""
+        if self.order is not None: return self.order[self.pos:]
+        return [kind_id for kind_id, count in enumerate(self.counts) for _ in range(count)]
+
+    def count(self, kind: Union[Tile, TileType, int]) -> int:
+        return self.counts[_kind_id(kind)]
+
+    def sample_kind(self, rng: Optional[random.Random] = None) -> int:
+        """A kind id drawn in proportion to the copies left, without removing it."""
+        if self.total <= 0: raise IndexError("sample from an empty deck")
+        target = (rng or self.rng).randrange(self.total)
+        for kind_id, count in enumerate(self.counts):
+            target -= count
+            if target < 0: return kind_id
+        raise AssertionError("deck counts out of sync")
+
+    def draw(self) -> Tile:
+        """The next tile for play: the next in order, or a random one from an unordered deck."""
+        if self.total <= 0: raise IndexError("draw from an empty deck")
+        if self.order is None:
+            self.take(self.sample_kind())
+            return Tile(KINDS[self._history[-1]])
+        self._history.append(self.pos)
+        return Tile(KINDS[self._advance()])
+
+    def take(self, kind: Union[Tile, TileType, int]):
+        """Removes one copy of `kind` (a draw whose outcome is known, e.g. at a chance node)."""
+        kind_id = _kind_id(kind)
+        if self.counts[kind_id] <= 0:
+            raise ValueError(f"No {KINDS[kind_id].name} left in the deck")
+        if self.order is None:
+            self.counts[kind_id] -= 1
+            self.total -= 1
+            self._history.append(kind_id)
+            return
+        slots, pos = self._slots[kind_id], self.pos
+        at = slots[-1]
+        if at != pos:
+            self._swap(pos, at)
+        self._history.append(at)
+        self._advance()
+
+    def undo(self):
+        """Puts back the tile of the last `draw` or `take`."""
+        last = self._history.pop()
+        if self.order is None:
+            self.counts[last] += 1
+            self.total += 1
+            return
+        self.pos -= 1
+        kind_id = self.order[self.pos]
+        self.counts[kind_id] += 1
+        self.total += 1
+        self._slots[kind_id].append(self.pos)
+        if last != self.pos:
+            self._swap(self.pos, last)
+
+    def clone(self) -> "Deck":
+        """An independent copy (order included, undo history not)."""
+        deck = Deck.__new__(Deck)
+        deck.counts, deck.total, deck.pos, deck.rng, deck._history = list(self.counts), self.total, self.pos, self.rng, []
+        deck.order = list(self.order) if self.order is not None else None
+        deck._slots = [list(s) for s in self._slots] if self._slots is not None else None
+        return deck
+
+    def unordered(self) -> "Deck":
+        """The remaining multiset alone: the cheap copy chance nodes need."""
+        return Deck(self.counts, rng=self.rng)
+
+    def _advance(self) -> int:
+        kind_id = self.order[self.pos]
+        self._slots[kind_id].pop()
+        self.counts[kind_id] -= 1
+        self.total -= 1
+        self.pos += 1
+        return kind_id
+
+    def _swap(self, i: int, j: int):
+        """Exchanges order positions i and j, keeping both kinds' slot lists sorted."""
+        order = self.order
+        a, b = order[i], order[j]
+        if a == b: return
+        order[i], order[j] = b, a
+        for kind_id, old, new in ((a, i, j), (b, j, i)):
+            slots = self._slots[kind_id]
+            slots[slots.index(old)] = new
+            slots.sort(reverse=True)
+
+def _kind_id(kind: Union[Tile, TileType, int]) -> int:
+    if isinstance(kind, int): return kind
+    return kind.kind.id if isinstance(kind, Tile) else kind.id
+
 DECK_DEFINITIONS = TILE_TYPES
@@ -0,0 +1,135 @@
+import math
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+from .models import Tile
+from .deck import KINDS, Deck, remaining_kinds
+from .engine import Board, PLAYERS, Action
+from .snapshot import encode_board, decode_board
+from .think import Think
+
+
+class _Abort(Exception):
+    pass
+
+class EndgameSolver:
+    """Exact expectimax over the rest of the game once at most `threshold` tiles are left to draw
+    after the one in hand, for a caller that knows the real remaining deck (the server does).
+
+    Values are Player1's final score margin: the player to move maximises (Player1) or minimises
+    (Player2) it over every full action, and a draw averages over the tile kinds in the pile
+    weighted by their copies. A drawn tile that fits nowhere is discarded and its player draws
+    again, as in play, so the value is that of the real game rather than the renormalised
+    approximation of StarSearch. Decision and chance values are memoised by (Board.zobrist,
+    tile in hand, remaining multiset), which merges the many move orders reaching one position.
+
+    The search is exhaustive, so it is capped: past `max_nodes` decision nodes or `time_limit`
+    seconds `solve` gives up and returns None, and the caller plays its normal policy. Every leaf
+    is a final tally of the board, so with about 50 actions per tile one tile after the one in
+    hand solves in under a second and two take tens of seconds. The last attempt is described
+    in `stats`.
+    """
+    def __init__(self, threshold: int = 1, max_nodes: int = 20_000, time_limit: Optional[float] = 2.0):
+        self.threshold = threshold
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.stats: Dict = {}
+        self._board: Optional[Board] = None
+        self._pool = Deck()
+        self._memo: Dict[tuple, float] = {}
+        self._nodes = 0
+        self._deadline = math.inf
+        self._think = Think()
+
+    def applies(self, deck: Optional[Sequence]) -> bool:
+        """Whether `solve` would search: the remaining deck is known and short enough."""
+        return deck is not None and len(deck) <= self.threshold
+
+    def solve(self, board: Board, tile: Tile, player_name: str, deck: Optional[Sequence] = None,
+              think: Optional[Think] = None) -> Optional[Action]:
+        """The expectation-optimal full action for player_name holding tile, or None when the solver
+        does not apply or hits a cap (a `Think`'s deadline or cancellation included). `deck` is the
+        real remaining pile (Tiles or a deck.Deck); `board` itself is never modified."""
+        if not self.applies(deck):
+            return None
+        start = time.perf_counter()
+        self._think = think if think is not None else Think()
+        self._deadline = self._think.limit(self.time_limit, start)
+        self._board = decode_board(encode_board(board))
+        self._pool = Deck.of_kinds(remaining_kinds(board, tile, deck))
+        self._memo = {}
+        self._nodes = 0
+        work = self._board
+        if work.to_move != work.player_index[player_name]:
+            work.end_turn(PLAYERS[work.to_move])
+        try:
+            value, best = self._decision(tile.kind.id, root=True)
+        except _Abort:
+            value, best = None, None
+        self.stats = {"solved": best is not None, "value": value, "nodes": self._nodes, "memo": len(self._memo),
+                      "tiles_left": len(deck), "seconds": time.perf_counter() - start}
+        if best is not None:
+            self._think.offer(best, len(deck) + 1, "endgame")
+        self._board = None
+        self._memo = {}
+        return best
+
+    # --- Search ---
+
+    def _decision(self, kind: int, root: bool = False) -> Tuple[float, Optional[Action]]:
+        """(value, best action) of the player to move holding `kind`."""
+        self._nodes += 1
+        if self._nodes > self.max_nodes or time.perf_counter() > self._deadline or self._think.cancelled:
+            raise _Abort()
+        board, pool = self._board, self._pool
+        key = (board.zobrist, kind, tuple(pool.counts))
+        if not root:
+            value = self._memo.get(key)
+            if value is not None: return value, None
+        player = PLAYERS[board.to_move]
+        maximizing = board.to_move == 0
+        last = not pool
+        best_value, best = (-math.inf if maximizing else math.inf), None
+        seen = set()
+        for action in board.legal_actions(Tile(KINDS[kind]), player):
+            board.apply(Tile(KINDS[kind]), action, player)
+            # Without a meeple in hand a meeple action plays as its placement alone
+            state = board.zobrist
+            if state in seen:
+                board.undo()
+                continue
+            seen.add(state)
+            value = self._margin() if last else self._chance()
+            board.undo()
+            if (value > best_value) if maximizing else (value < best_value):
+                best_value, best = value, action
+        self._memo[key] = best_value
+        return best_value, best
+
+    def _chance(self) -> float:
+        """Expected value of the next draw; unplayable tiles are discarded and drawn past."""
+        board, pool = self._board, self._pool
+        total = pool.total
+        if total == 0:
+            return self._margin()
+        key = (board.zobrist, None, tuple(pool.counts))
+        value = self._memo.get(key)
+        if value is not None: return value
+        value = 0.0
+        for kind, count in enumerate(list(pool.counts)):
+            if count <= 0: continue
+            pool.take(kind)
+            if board.get_legal_moves(Tile(KINDS[kind])):
+                outcome, _ = self._decision(kind)
+            else:
+                outcome = self._chance()
+            pool.undo()
+            value += count / total * outcome
+        self._memo[key] = value
+        return value
+
+    def _margin(self) -> float:
+        p1, p2 = PLAYERS
+        projected = self._board.project_final_scores()
+        return projected[p1] - projected[p2]
+
@@ -1,257 +1,626 @@
-from typing import Dict, Tuple, List, Optional
-from .models import Tile, Side, SegmentType, TileSegment
+from typing import Dict, Iterator, Tuple, List, NamedTuple, Optional
+from .models import Tile, Side, SegmentType
+from .deck import REVERSED_SIDE_CODES, SIDE_BITS, SIDE_MASK
+from .grid import DictGrid
+
+# (side, dx, dy) for the four orthogonal neighbours of a cell
+NEIGHBOR_OFFSETS = ((Side.NORTH, 0, 1), (Side.EAST, 1, 0), (Side.SOUTH, 0, -1), (Side.WEST, -1, 0))
+# The 3x3 block around a cell, the cell itself included
+AREA_OFFSETS = tuple((dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1))
+
+PLAYERS = ("Player1", "Player2")
+
+Action = Tuple[int, int, int, Optional[int]]  # (x, y, rotation, meeple_segment_index)
+
+# Undo journal entry tags (see Board.apply / Board.undo)
+_SET, _DEL, _TRUNC, _ATTR, _UNION, _MAKE_SETS = range(6)
+
+# Zobrist key tags, one per kind of hashed fact (see zobrist_key); Z_HAND is never part of
+# Board.zobrist, searches mix it in to key a position by the tile in hand as well
+Z_TILE, Z_MEEPLE, Z_SCORE, Z_TO_MOVE, Z_HAND = range(1, 6)
+_MASK64 = (1 << 64) - 1
+
+def zobrist_key(tag: int, x: int, y: int, a: int, b: int) -> int:
+    """Stable 64-bit key for one hashed fact, e.g. (Z_TILE, x, y, kind id, rotation step).
+
+    The fields are packed into one integer and scrambled with the splitmix64 finaliser, a
+    bijection, so distinct facts never share a key and keys are identical across processes.
+    """
+    z = (tag << 56 | (x & 0xFFFF) << 40 | (y & 0xFFFF) << 24 | (a & 0xFFFF) << 8 | (b & 0xFF)) + 0x9E3779B97F4A7C15
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
 
 class DSU:
-    """Disjoint Set Union for tracking connected cities, roads, and fields with tile counting."""
-    def __init__(self):
-        self.parent = {}
-        self.tiles = {}       # root -> set of unique tile coordinates (x, y)
-        self.pennants = {}     # root -> count of pennants
-        self.open_edges = {}  # root -> total open connection ends
-        self.meeples = {}     # root -> dict tracking player_name: meeple count
-
-    def make_set(self, segment_id: str, tile_pos: Tuple[int, int], pennants: int = 0, open_edges: int = 0):
-        if segment_id not in self.parent:
-            self.parent[segment_id] = segment_id
-            self.tiles[segment_id] = {tile_pos}
-            self.pennants[segment_id] = pennants
-            self.open_edges[segment_id] = open_edges
-            self.meeples[segment_id] = {}
-
-    def find(self, i):
-        if self.parent[i] == i:
-            return i
-        self.parent[i] = self.find(self.parent[i])
-        return self.parent[i]
-
-    def union(self, i, j):
+    """Disjoint Set Union for tracking connected cities, roads, and fields with tile counting.
+
+    Segments are integer ids into growable arrays; per-root data is only meaningful at roots.
+    """
+    def __init__(self, num_players: int = len(PLAYERS)):
+        self.parent: List[int] = []
+        self.size: List[int] = []        # root -> number of segments (union by size)
+        self.tiles: List[int] = []       # root -> number of distinct tiles
+        self.pennants: List[int] = []    # root -> count of pennants
+        self.open_edges: List[int] = []  # root -> total open connection ends
+        # root -> keys of tiles contributing several segments of this type; None if there are none.
+        # Only these tiles can be counted twice when two sets merge.
+        self.shared: List[Optional[List[int]]] = []
+        self.meeples: List[List[int]] = [[] for _ in range(num_players)]  # player index -> root -> count
+        # Member index: circular linked list through all segments of a set, plus the
+        # (tile position, segment index) each segment id belongs to
+        self.next: List[int] = []
+        self.owners: List[Tuple[Tuple[int, int], int]] = []
+        # Board's undo journal while a search is applying moves; None during normal play
+        self.journal: Optional[list] = None
+
+    def make_set(self, owner: Tuple[Tuple[int, int], int], tile_key: int, pennants: int = 0, open_edges: int = 0, shared: bool = False) -> int:
+        seg_id = len(self.parent)
+        self.parent.append(seg_id)
+        self.next.append(seg_id)
+        self.owners.append(owner)
+        self.size.append(1)
+        self.tiles.append(1)
+        self.pennants.append(pennants)
+        self.open_edges.append(open_edges)
+        self.shared.append([tile_key] if shared else None)
+        for counts in self.meeples:
+            counts.append(0)
+        return seg_id
+
+    def find(self, i: int) -> int:
+        parent = self.parent
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        # Paths are left as they are while journaling, so undo never has to restore them
+        if self.journal is None:
+            while parent[i] != root:
+                parent[i], i = root, parent[i]
+        return root
+
+    def root(self, i: int) -> int:
+        """`find` without path compression, for queries that must leave the arrays untouched."""
+        parent = self.parent
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> bool:
         root_i = self.find(i)
         root_j = self.find(j)
-        if root_i != root_j:
-            # Simple union (size is now implicitly handles via self.tiles set size)
-            if len(self.tiles[root_i]) < len(self.tiles[root_j]):
-                root_i, root_j = root_j, root_i
-            
-            self.parent[root_j] = root_i
-            self.tiles[root_i].update(self.tiles[root_j])
-            self.pennants[root_i] += self.pennants[root_j]
-            
-            # Merge meeples
-            for p, count in self.meeples[root_j].items():
-                self.meeples[root_i][p] = self.meeples[root_i].get(p, 0) + count
-            
-            # One node-pair connection satisfies 2 open ends
-            self.open_edges[root_i] = self.open_edges[root_i] + self.open_edges[root_j] - 2
-            return True
-        else:
+        if root_i == root_j:
             # Connection within same set (loop) removes 2 open ends
+            if self.journal is not None:
+                self.journal.append((_SET, self.open_edges, root_i, self.open_edges[root_i]))
             self.open_edges[root_i] -= 2
             return False
 
+        if self.size[root_i] < self.size[root_j]:
+            root_i, root_j = root_j, root_i
+        if self.journal is not None:
+            self.journal.append((_UNION, self, root_i, root_j, self.tiles[root_i], self.open_edges[root_i],
+                                 self.shared[root_i], self.shared[root_j], [counts[root_j] for counts in self.meeples]))
+        self.parent[root_j] = root_i
+        self.next[root_i], self.next[root_j] = self.next[root_j], self.next[root_i]
+        self.size[root_i] += self.size[root_j]
+        self.tiles[root_i] += self.tiles[root_j]
+        self.pennants[root_i] += self.pennants[root_j]
+        # One node-pair connection satisfies 2 open ends
+        self.open_edges[root_i] += self.open_edges[root_j] - 2
+
+        shared_j = self.shared[root_j]
+        if shared_j is not None:
+            shared_i = self.shared[root_i]
+            if shared_i is None:
+                self.shared[root_i] = shared_j
+            else:
+                merged = list(shared_i)
+                for key in shared_j:
+                    if key in shared_i: self.tiles[root_i] -= 1
+                    else: merged.append(key)
+                self.shared[root_i] = merged
+            self.shared[root_j] = None
+
+        for counts in self.meeples:
+            counts[root_i] += counts[root_j]
+            counts[root_j] = 0
+        return True
+
+    def undo_union(self, root_i: int, root_j: int, tiles_i: int, open_i: int, shared_i, shared_j, meeples_j: List[int]):
+        """Splits root_j back out of root_i using the values journaled by `union`."""
+        self.parent[root_j] = root_j
+        self.next[root_i], self.next[root_j] = self.next[root_j], self.next[root_i]
+        self.size[root_i] -= self.size[root_j]
+        self.tiles[root_i] = tiles_i
+        self.pennants[root_i] -= self.pennants[root_j]
+        self.open_edges[root_i] = open_i
+        self.shared[root_i] = shared_i
+        self.shared[root_j] = shared_j
+        for counts, count in zip(self.meeples, meeples_j):
+            counts[root_i] -= count
+            counts[root_j] = count
+
+    def truncate(self, length: int):
+        """Drops every segment id >= length (undo of the `make_set` calls that created them)."""
+        for array in (self.parent, self.next, self.owners, self.size, self.tiles, self.pennants, self.open_edges, self.shared, *self.meeples):
+            del array[length:]
+
+    def members(self, root: int) -> List[int]:
+        """All segment ids in the set of root, without touching any other set."""
+        result = [root]
+        i = self.next[root]
+        while i != root:
+            result.append(i)
+            i = self.next[i]
+        return result
+
+    def roots(self) -> List[int]:
+        return [i for i, p in enumerate(self.parent) if i == p]
+
+    def occupied(self, root: int) -> bool:
+        return any(counts[root] for counts in self.meeples)
+
+    def majority(self, root: int) -> List[int]:
+        """Player indices holding the most meeples on the feature (empty if unoccupied)."""
+        tally = [counts[root] for counts in self.meeples]
+        top = max(tally)
+        return [p for p, c in enumerate(tally) if c == top] if top else []
+
+class MoveScore(NamedTuple):
+    """Per-player effect of one action (see Board.score_move); every field is keyed by player name."""
+    immediate: Dict[str, int]   # points scored by completions during the move
+    projected: Dict[str, int]   # change of project_final_scores (completions, extensions, merges, meeples released)
+    meeples: Dict[str, int]     # change of meeples in hand (-1 for the one placed, + those released)
+    completed: List[Dict]       # features completed by the move, as get_completed_features reports them
+
 class Board:
-    """Manages the grid of tiles and the game state with precise 12-node rules."""
-    def __init__(self):
-        self.grid: Dict[Tuple[int, int], Tile] = {}
+    """Manages the grid of tiles and the game state with precise 12-node rules.
+
+    `grid_backend` selects the storage of `grid`: `DictGrid` (default) or `DenseGrid`
+    (see grid.py); both expose the same mapping interface and iterate in placement order.
+    """
+    def __init__(self, grid_backend: type = DictGrid):
+        self.grid = grid_backend()
         self.dsu = {
             SegmentType.CITY: DSU(),
             SegmentType.ROAD: DSU(),
             SegmentType.FIELD: DSU()
         }
+        # Open cells next to placed tiles -> [mask, value] over the packed 24-bit edge signature;
+        # a rotation fits when signature & mask == value. Cells that get filled stay as None,
+        # so undoing a placement restores the dict exactly, iteration order included.
+        self.frontier: Dict[Tuple[int, int], Optional[List[int]]] = {}
         self.monasteries: Dict[Tuple[int, int], Optional[str]] = {}
-        self.segment_counter = 0
-        self.scores = {"Player1": 0, "Player2": 0}
-        self.meeple_counts = {"Player1": 7, "Player2": 7}
+        # Monastery position -> tiles in its 3x3 block (itself included); 9 means complete
+        self.monastery_counts: Dict[Tuple[int, int], int] = {}
+        # Occupied monasteries whose counter reached 9 since the last completion check
+        self.pending_monasteries: List[Tuple[int, int]] = []
+        # Field segment id -> city segment ids bordering it on the same tile
+        self.field_cities: List[Tuple[int, ...]] = []
+        # (segment type, segment id) of every meeple standing on a city, road or field
+        self.meeple_segments: List[Tuple[SegmentType, int]] = []
+        self.scores = {p: 0 for p in PLAYERS}
+        self.meeple_counts = {p: 7 for p in PLAYERS}
+        self.player_index = {p: i for i, p in enumerate(PLAYERS)}
+        # (segment type, segment id) touched by tile/meeple placements since the last completion check
+        self.pending_features: List[Tuple[SegmentType, int]] = []
+        # Index of the player to move; only `apply` and `end_turn` advance it
+        self.to_move = 0
+        # Zobrist hash of the position: placed tiles with rotation, standing meeples, scores
+        # and player to move. Updated incrementally by every write to those, so equal
+        # positions reached through different move orders hash the same.
+        self.zobrist = zobrist_key(Z_TO_MOVE, 0, 0, 0, 0)
+        for p in range(len(PLAYERS)):
+            self.zobrist ^= zobrist_key(Z_SCORE, 0, 0, 0, p)
+        # Undo journal of the moves made with `apply`; None when no move is applied
+        self._journal: Optional[list] = None
+        self._frames: List[int] = []
+
+    # --- Journaled mutation helpers (plain writes when no move is being applied) ---
+
+    def _assign(self, container, key, value):
+        if self._journal is not None:
+            self._journal.append((_SET, container, key, container[key]))
+        container[key] = value
+
+    def _insert(self, container: dict, key, value):
+        if self._journal is not None:
+            self._journal.append((_DEL, container, key))
+        container[key] = value
+
+    def _append(self, array: list, item):
+        if self._journal is not None:
+            self._journal.append((_TRUNC, array, len(array)))
+        array.append(item)
+
+    def _rebind(self, obj, name: str, value):
+        if self._journal is not None:
+            self._journal.append((_ATTR, obj, name, getattr(obj, name)))
+        setattr(obj, name, value)
 
-    def _get_next_segment_id(self) -> str:
-        self.segment_counter += 1
-        return f"seg_{self.segment_counter}"
+    def _add_score(self, player_name: str, pts: int):
+        p = self.player_index[player_name]
+        old = self.scores[player_name]
+        self._assign(self.scores, player_name, old + pts)
+        self._rebind(self, "zobrist", self.zobrist ^ zobrist_key(Z_SCORE, 0, 0, old, p) ^ zobrist_key(Z_SCORE, 0, 0, old + pts, p))
+
+    def _set_meeple(self, x: int, y: int, segment_index: int, player_name: Optional[str]):
+        """Puts player_name's meeple on (or, with None, removes the meeple from) a tile segment."""
+        tile = self.grid[(x, y)]
+        z = self.zobrist
+        for name in (tile.meeples[segment_index], player_name):
+            if name is not None: z ^= zobrist_key(Z_MEEPLE, x, y, segment_index, self.player_index[name])
+        self._assign(tile.meeples, segment_index, player_name)
+        self._rebind(self, "zobrist", z)
+
+    def end_turn(self, player_name: str):
+        """Hands the move to the player after player_name."""
+        to_move = (self.player_index[player_name] + 1) % len(PLAYERS)
+        z = self.zobrist ^ zobrist_key(Z_TO_MOVE, 0, 0, 0, self.to_move) ^ zobrist_key(Z_TO_MOVE, 0, 0, 0, to_move)
+        self._rebind(self, "to_move", to_move)
+        self._rebind(self, "zobrist", z)
 
     def is_legal_move(self, x: int, y: int, tile: Tile) -> bool:
         if (x, y) in self.grid: return False
-        adj = {Side.NORTH: (x, y+1), Side.EAST: (x+1, y), Side.SOUTH: (x, y-1), Side.WEST: (x-1, y)}
-        has_adj = not self.grid
-        for side, pos in adj.items():
-            if pos in self.grid:
-                has_adj = True
-                neighbor = self.grid[pos]
-                this_nodes = tile.get_side_nodes(side)
-                neigh_nodes = list(reversed(neighbor.get_side_nodes(Side((side.value + 2) % 4))))
-                for i in range(3):
-                    if tile.get_node_type(this_nodes[i]) != neighbor.get_node_type(neigh_nodes[i]):
-                        return False
-        return has_adj
+        if not self.grid: return True
+        constraint = self.frontier.get((x, y))
+        if constraint is None: return False
+        mask, value = constraint
+        return tile.kind.table.signatures[tile.rotation // 90] & mask == value
 
     def get_legal_moves(self, tile: Tile) -> List[Tuple[int, int, int]]:
+        """Legal (x, y, rotation) placements; rotations that are symmetric duplicates are listed once."""
+        table = tile.kind.table
+        if not self.grid: return [(0, 0, step * 90) for step in table.rotations]
+        options = [(step * 90, table.signatures[step]) for step in table.rotations]
         legal_moves = []
-        if not self.grid: return [(0,0,r) for r in [0, 90, 180, 270]]
-        candidates = set()
-        for (x, y) in self.grid:
-            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                if (x+dx, y+dy) not in self.grid: candidates.add((x+dx, y+dy))
-        for x, y in candidates:
-            for _ in range(4):
-                if self.is_legal_move(x, y, tile): legal_moves.append((x, y, tile.rotation))
-                tile.rotate(1)
+        for (x, y), constraint in self.frontier.items():
+            if constraint is None: continue
+            mask, value = constraint
+            for rotation, signature in options:
+                if signature & mask == value: legal_moves.append((x, y, rotation))
         return legal_moves
 
+    def _update_frontier(self, x: int, y: int, tile: Tile, neighbors: List[Optional[Tile]]):
+        """Closes the cell just filled and records the edges it imposes on its empty neighbours."""
+        if (x, y) in self.frontier:
+            self._assign(self.frontier, (x, y), None)
+        sides = tile.kind.table.sides[tile.rotation // 90]
+        for side, (_, dx, dy) in enumerate(NEIGHBOR_OFFSETS):
+            if neighbors[side] is not None: continue
+            pos = (x + dx, y + dy)
+            # The neighbour's facing side is read in the opposite direction along the shared edge
+            shift = SIDE_BITS * ((side + 2) % 4)
+            mask, value = SIDE_MASK << shift, REVERSED_SIDE_CODES[sides[side]] << shift
+            constraint = self.frontier.get(pos)
+            if constraint is None:
+                self._insert(self.frontier, pos, [mask, value])
+            else:
+                self._assign(self.frontier, pos, [constraint[0] | mask, constraint[1] | value])
+
+    def meeple_options(self, tile: Tile, x: int, y: int, rotation: int) -> List[int]:
+        """Segment indices where a meeple could go right after placing tile at (x, y, rotation).
+
+        Occupancy is judged as `place_meeple` sees it (after the placement, before completion
+        scoring); the player's remaining meeples are not considered. Nothing is placed: a
+        segment's feature after the placement is the union of the neighbouring features its
+        edge nodes touch, together with those of the tile's other segments sharing one of them.
+        The board is left unchanged.
+        """
+        table = tile.kind.table
+        step = rotation // 90
+        if (x, y) in self.grid: return []
+        if self.grid:
+            constraint = self.frontier.get((x, y))
+            if constraint is None or table.signatures[step] & constraint[0] != constraint[1]: return []
+        segments = tile.kind.segments
+        dsus = self.dsu
+        joined: Dict[int, set] = {}   # segment index -> (type, root) of the neighbouring features it joins
+        occupied = set()
+        ours = table.side_segments[step]
+        neighbors = self.grid.neighbors(x, y)
+        for side in range(4):
+            neighbor = neighbors[side]
+            if neighbor is None: continue
+            theirs = neighbor.kind.table.side_segments[neighbor.rotation // 90][(side + 2) % 4]
+            mine = ours[side]
+            for k in range(3):
+                st = segments[mine[k]].type
+                dsu = dsus.get(st)
+                if dsu is None: continue
+                root = dsu.root(neighbor.segment_ids[theirs[2 - k]])
+                joined.setdefault(mine[k], set()).add((st, root))
+                if dsu.occupied(root): occupied.add((st, root))
+        blocked = {i for i, roots in joined.items() if roots & occupied}
+        while blocked:
+            # Segments joining a feature in common with a blocked segment end up in the same feature
+            spread = set().union(*(joined[i] for i in blocked))
+            more = {i for i, roots in joined.items() if i not in blocked and roots & spread}
+            if not more: break
+            blocked |= more
+        return [i for i, segment in enumerate(segments)
+                if (segment.is_monastery or segment.type == SegmentType.MONASTERY or segment.type in dsus) and i not in blocked]
+
+    def legal_actions(self, tile: Tile, player_name: Optional[str] = None) -> Iterator[Tuple[int, int, int, Optional[int]]]:
+        """Every complete legal action (x, y, rotation, meeple_segment_index) for tile: each placement
+        of `get_legal_moves` without a meeple, then with each of its `meeple_options`. With
+        player_name, meeple actions are only generated while that player has a meeple left."""
+        with_meeples = player_name is None or self.meeple_counts[player_name] > 0
+        for x, y, rotation in self.get_legal_moves(tile):
+            yield x, y, rotation, None
+            if with_meeples:
+                for i in self.meeple_options(tile, x, y, rotation):
+                    yield x, y, rotation, i
+
+    def score_move(self, tile: Tile, action: Tuple[int, int, int, Optional[int]], player_name: str,
+                   projected: Optional[Dict[str, int]] = None) -> Optional[MoveScore]:
+        """Score deltas of player_name playing (x, y, rotation, meeple_segment_index) with tile, or None if illegal.
+
+        The move is applied in place and undone again, so nothing is copied and the board is left
+        unchanged, but it is changed meanwhile: only call it on a board no other thread reads
+        (agents score moves on their own copy). `projected` is `project_final_scores()` of the current position; pass it when
+        scoring many moves of the same turn so it is computed once.
+        """
+        if projected is None:
+            projected = self.project_final_scores()
+        scores, meeples = dict(self.scores), dict(self.meeple_counts)
+        completed = self.apply(tile, action, player_name)
+        if completed is None: return None
+        after = self.project_final_scores()
+        result = MoveScore({p: self.scores[p] - scores[p] for p in PLAYERS},
+                           {p: after[p] - projected[p] for p in PLAYERS},
+                           {p: self.meeple_counts[p] - meeples[p] for p in PLAYERS},
+                           completed)
+        self.undo()
+        return result
+
+    def open_cells(self) -> List[Tuple[int, int]]:
+        """Empty cells adjacent to at least one placed tile."""
+        return [pos for pos, constraint in self.frontier.items() if constraint is not None]
+
     def place_tile(self, x: int, y: int, tile: Tile) -> bool:
         if not self.is_legal_move(x, y, tile): return False
         
         # Register segments
-        for segment in tile.segments:
-            seg_id = self._get_next_segment_id()
-            segment.id = seg_id
-            if segment.type in self.dsu:
-                p = 1 if segment.has_pennant else 0
-                self.dsu[segment.type].make_set(seg_id, tile_pos=(x, y), pennants=p, open_edges=len(segment.nodes))
-
-        # Union with neighbors
-        adj = {Side.NORTH: (x, y+1), Side.EAST: (x+1, y), Side.SOUTH: (x, y-1), Side.WEST: (x-1, y)}
-        for side, pos in adj.items():
-            if pos in self.grid:
-                neighbor = self.grid[pos]
-                this_nodes = tile.get_side_nodes(side)
-                neigh_nodes = list(reversed(neighbor.get_side_nodes(Side((side.value + 2) % 4))))
-                for i in range(3):
-                    if tile.get_node_type(this_nodes[i]) == neighbor.get_node_type(neigh_nodes[i]):
-                        seg_this = next((s for s in tile.segments if this_nodes[i] in s.nodes), None)
-                        seg_neigh = next((s for s in neighbor.segments if neigh_nodes[i] in s.nodes), None)
-                        if seg_this and seg_neigh and seg_this.type in self.dsu:
-                            self.dsu[seg_this.type].union(seg_this.id, seg_neigh.id)
-
-        self.grid[(x, y)] = tile
-        for segment in tile.segments:
-            if getattr(segment, 'is_monastery', False) or segment.type == SegmentType.MONASTERY:
-                self.monasteries[(x, y)] = None
+        kind = tile.kind
+        table = kind.table
+        n = len(kind.segments)
+        segment_ids = [None] * n
+        self._rebind(tile, "segment_ids", segment_ids)
+        self._rebind(tile, "meeples", [None] * n)
+        if self._journal is not None:
+            self._journal.append((_MAKE_SETS, [(dsu, len(dsu.parent)) for dsu in self.dsu.values()]))
+            self._journal.append((_TRUNC, self.pending_features, len(self.pending_features)))
+            self._journal.append((_TRUNC, self.field_cities, len(self.field_cities)))
+        dsus = self.dsu
+        tile_key = len(self.grid)
+        for i, st, pennants, open_edges, shared in table.features:
+            seg_id = dsus[st].make_set(((x, y), i), tile_key, pennants, open_edges, shared)
+            segment_ids[i] = seg_id
+            if st is not SegmentType.FIELD:
+                self.pending_features.append((st, seg_id))
+        for i, cities in enumerate(table.field_cities):
+            if kind.segments[i].type is SegmentType.FIELD:
+                self.field_cities.append(tuple(segment_ids[c] for c in cities))
+
+        # Union with neighbors (edge types already match, as the move is legal); the facing
+        # side of a neighbour lists its nodes in the opposite direction
+        ours = table.side_segments[tile.rotation // 90]
+        segments = kind.segments
+        neighbors = self.grid.neighbors(x, y)
+        for side in range(4):
+            neighbor = neighbors[side]
+            if neighbor is None: continue
+            theirs = neighbor.kind.table.side_segments[neighbor.rotation // 90][(side + 2) % 4]
+            neighbor_ids = neighbor.segment_ids
+            mine = ours[side]
+            for k in range(3):
+                idx_this = mine[k]
+                dsu = dsus.get(segments[idx_this].type)
+                if dsu is not None:
+                    dsu.union(segment_ids[idx_this], neighbor_ids[theirs[2 - k]])
+
+        self._insert(self.grid, (x, y), tile)
+        self._rebind(self, "zobrist", self.zobrist ^ zobrist_key(Z_TILE, x, y, kind.id, tile.rotation // 90))
+        self._update_frontier(x, y, tile, neighbors)
+        if table.monastery:
+            self._insert(self.monasteries, (x, y), None)
+            self._insert(self.monastery_counts, (x, y), self.grid.count_area(x, y) - 1)
+        if self.monastery_counts:
+            for dx, dy in AREA_OFFSETS:
+                pos = (x + dx, y + dy)
+                count = self.monastery_counts.get(pos)
+                if count is None: continue
+                self._assign(self.monastery_counts, pos, count + 1)
+                if count + 1 == 9 and self.monasteries[pos] is not None:
+                    self._append(self.pending_monasteries, pos)
         return True
 
+    def monastery_points(self, x: int, y: int) -> int:
+        """Current value of the monastery at (x, y): one point per tile in its 3x3 block."""
+        return self.monastery_counts.get((x, y), 0)
+
     def place_meeple(self, x: int, y: int, segment_index: int, player_name: str) -> bool:
         if (x, y) not in self.grid or self.meeple_counts.get(player_name, 0) <= 0: return False
         tile = self.grid[(x, y)]
         if segment_index < 0 or segment_index >= len(tile.segments): return False
         segment = tile.segments[segment_index]
-        if getattr(segment, 'meeple_player', None) is not None: return False
+        if tile.meeples[segment_index] is not None: return False
 
-        if getattr(segment, 'is_monastery', False) or segment.type == SegmentType.MONASTERY:
+        if segment.is_monastery or segment.type == SegmentType.MONASTERY:
             if self.monasteries.get((x, y)) is not None: return False
-            self.monasteries[(x, y)] = player_name
-            segment.meeple_player = player_name
-            self.meeple_counts[player_name] -= 1
+            self._assign(self.monasteries, (x, y), player_name)
+            if self.monastery_counts[(x, y)] == 9:
+                self._append(self.pending_monasteries, (x, y))
+            self._set_meeple(x, y, segment_index, player_name)
+            self._assign(self.meeple_counts, player_name, self.meeple_counts[player_name] - 1)
             return True
 
         if segment.type not in self.dsu: return False
-        root = self.dsu[segment.type].find(segment.id)
-        if self.dsu[segment.type].meeples.get(root): return False # Feature occupied
+        dsu = self.dsu[segment.type]
+        root = dsu.find(tile.segment_ids[segment_index])
+        if dsu.occupied(root): return False # Feature occupied
         
-        self.dsu[segment.type].meeples[root][player_name] = 1
-        segment.meeple_player = player_name
-        self.meeple_counts[player_name] -= 1
+        self._assign(dsu.meeples[self.player_index[player_name]], root, 1)
+        self._append(self.meeple_segments, (segment.type, root))
+        if segment.type != SegmentType.FIELD:
+            self._append(self.pending_features, (segment.type, root))
+        self._set_meeple(x, y, segment_index, player_name)
+        self._assign(self.meeple_counts, player_name, self.meeple_counts[player_name] - 1)
         return True
 
+    def _award(self, dsu: DSU, root: int, pts: int) -> List[str]:
+        """Adds pts to every majority holder of the feature and returns their names."""
+        winners = [PLAYERS[p] for p in dsu.majority(root)]
+        for w in winners: self._add_score(w, pts)
+        return winners
+
     def get_completed_features(self) -> List[Dict]:
+        """Scores cities, roads and monasteries completed since the last call.
+
+        Only features reached by a tile or meeple placement can have changed, so the
+        check never walks the whole board.
+        """
         completed = []
-        for st in [SegmentType.CITY, SegmentType.ROAD]:
+        pending = self.pending_features
+        self._rebind(self, "pending_features", [])
+        checked = set()
+        for st, seg_id in pending:
             dsu = self.dsu[st]
-            roots = set(dsu.find(sid) for sid in dsu.parent.keys())
-            for root in roots:
-                if dsu.open_edges[root] == 0 and sum(dsu.meeples[root].values()) > 0:
-                    tile_count = len(dsu.tiles[root])
-                    pts = (tile_count + dsu.pennants[root]) * (2 if st == SegmentType.CITY else 1)
-                    meeples = dsu.meeples[root]
-                    max_count = max(meeples.values())
-                    winners = [p for p, c in meeples.items() if c == max_count]
-                    for w in winners: self.scores[w] += pts
-                    for p, c in meeples.items(): self.meeple_counts[p] += c
-                    dsu.meeples[root] = {}
-                    completed.append({"type": st.name, "points": pts, "winners": winners})
-                    # Clear visual meeple
-                    for (gx, gy), t in self.grid.items():
-                        for seg in t.segments:
-                            if seg.type == st and dsu.find(seg.id) == root: seg.meeple_player = None
-
-        for (mx, my), owner in list(self.monasteries.items()):
+            root = dsu.find(seg_id)
+            if (st, root) in checked: continue
+            checked.add((st, root))
+            if dsu.open_edges[root] == 0 and dsu.occupied(root):
+                pts = (dsu.tiles[root] + dsu.pennants[root]) * (2 if st == SegmentType.CITY else 1)
+                winners = self._award(dsu, root, pts)
+                for p, counts in enumerate(dsu.meeples):
+                    if counts[root]:
+                        self._assign(self.meeple_counts, PLAYERS[p], self.meeple_counts[PLAYERS[p]] + counts[root])
+                        self._assign(counts, root, 0)
+                completed.append({"type": st.name, "points": pts, "winners": winners})
+                # Clear visual meeples of this feature only
+                for member in dsu.members(root):
+                    (mx, my), i = dsu.owners[member]
+                    if self.grid[(mx, my)].meeples[i] is not None: self._set_meeple(mx, my, i, None)
+                self._rebind(self, "meeple_segments", [(t, m) for t, m in self.meeple_segments if t != st or dsu.find(m) != root])
+
+        pending = self.pending_monasteries
+        self._rebind(self, "pending_monasteries", [])
+        for pos in pending:
+            owner = self.monasteries[pos]
             if owner:
-                if sum(1 for dx in [-1,0,1] for dy in [-1,0,1] if (mx+dx, my+dy) in self.grid) == 9:
-                    self.scores[owner] += 9
-                    self.meeple_counts[owner] += 1
-                    self.monasteries[(mx, my)] = None
-                    for seg in self.grid[(mx, my)].segments:
-                        if (getattr(seg, 'is_monastery', False) or seg.type == SegmentType.MONASTERY): seg.meeple_player = None
-                    completed.append({"type": "MONASTERY", "points": 9, "winners": [owner]})
+                self._add_score(owner, 9)
+                self._assign(self.meeple_counts, owner, self.meeple_counts[owner] + 1)
+                self._assign(self.monasteries, pos, None)
+                t = self.grid[pos]
+                for i, seg in enumerate(t.segments):
+                    if seg.is_monastery or seg.type == SegmentType.MONASTERY: self._set_meeple(*pos, i, None)
+                completed.append({"type": "MONASTERY", "points": 9, "winners": [owner]})
         return completed
 
-    def calculate_final_scores(self) -> List[Dict]:
+    def _final_tally(self) -> List[Dict]:
+        """Features that end-of-game scoring would award, computed without touching the board."""
         results = []
+        occupied = {}
+        for st, seg_id in self.meeple_segments:
+            occupied.setdefault(st, {})[self.dsu[st].find(seg_id)] = None
+
         # Cities/Roads
         for st in [SegmentType.CITY, SegmentType.ROAD]:
             dsu = self.dsu[st]
-            roots = set(dsu.find(sid) for sid in dsu.parent.keys())
-            for root in roots:
-                if sum(dsu.meeples[root].values()) > 0:
-                    tile_count = len(dsu.tiles[root])
-                    pts = (tile_count + dsu.pennants[root]) * 1
-                    meeples = dsu.meeples[root]
-                    max_v = max(meeples.values())
-                    winners = [p for p, c in meeples.items() if c == max_v]
-                    for w in winners: self.scores[w] += pts
-                    results.append({"type": f"INCOMPLETE_{st.name}", "points": pts, "winners": winners})
+            for root in occupied.get(st, ()):
+                pts = (dsu.tiles[root] + dsu.pennants[root]) * 1
+                winners = [PLAYERS[p] for p in dsu.majority(root)]
+                results.append({"type": f"INCOMPLETE_{st.name}", "points": pts, "winners": winners})
 
         # Monasteries
-        for (mx, my), owner in self.monasteries.items():
+        for pos, owner in self.monasteries.items():
             if owner:
-                pts = sum(1 for dx in [-1,0,1] for dy in [-1,0,1] if (mx+dx, my+dy) in self.grid)
-                self.scores[owner] += pts
-                results.append({"type": "INCOMPLETE_MONASTERY", "points": pts, "winners": [owner]})
+                results.append({"type": "INCOMPLETE_MONASTERY", "points": self.monastery_counts[pos], "winners": [owner]})
 
-        # Fields (Precise Node Adjacency)
+        # Fields: 3 points per completed city bordering any segment of the field
         field_dsu = self.dsu[SegmentType.FIELD]
         city_dsu = self.dsu[SegmentType.CITY]
-        f_to_c = {root: set() for root in set(field_dsu.find(sid) for sid in field_dsu.parent.keys()) if sum(field_dsu.meeples[root].values()) > 0}
-        
-        for (x, y), tile in self.grid.items():
-            completed_cities = [city_dsu.find(s.id) for s in tile.segments if s.type == SegmentType.CITY and city_dsu.open_edges[city_dsu.find(s.id)] == 0]
-            if not completed_cities: continue
-            for f_seg in tile.segments:
-                if f_seg.type == SegmentType.FIELD:
-                    f_root = field_dsu.find(f_seg.id)
-                    if f_root in f_to_c:
-                        for c_seg in tile.segments:
-                            if c_seg.type == SegmentType.CITY:
-                                c_root = city_dsu.find(c_seg.id)
-                                if c_root in completed_cities:
-                                    if any(abs(nf-nc)%12 in [1,11] for nf in f_seg.nodes for nc in c_seg.nodes):
-                                        f_to_c[f_root].add(c_root)
-
-        for f_root, cities in f_to_c.items():
-            pts = len(cities) * 3
-            meeples = field_dsu.meeples[f_root]
-            max_v = max(meeples.values())
-            winners = [p for p, c in meeples.items() if c == max_v]
-            for w in winners: self.scores[w] += pts
-            results.append({"type": "FIELD", "points": pts, "winners": winners})
+        for f_root in occupied.get(SegmentType.FIELD, ()):
+            cities = set()
+            for member in field_dsu.members(f_root):
+                for c in self.field_cities[member]:
+                    c_root = city_dsu.find(c)
+                    if city_dsu.open_edges[c_root] == 0: cities.add(c_root)
+            winners = [PLAYERS[p] for p in field_dsu.majority(f_root)]
+            results.append({"type": "FIELD", "points": len(cities) * 3, "winners": winners})
         return results
 
-        for f_root, cities in field_to_cities.items():
-            pts = len(cities) * 3
-            if pts > 0:
-                meeples = dict(field_dsu.meeples[f_root])
-                results.append({"type": "FIELD", "points": pts, "meeples": meeples})
-                max_m = max(meeples.values())
-                for p in [p for p, c in meeples.items() if c == max_m]:
-                    self.scores[p] = self.scores.get(p, 0) + pts
+    def project_final_scores(self) -> Dict[str, int]:
+        """Per-player totals if the game ended now; read-only, so it can be called at any time."""
+        projected = dict(self.scores)
+        for feature in self._final_tally():
+            for w in feature["winners"]: projected[w] += feature["points"]
+        return projected
 
+    def calculate_final_scores(self) -> List[Dict]:
+        results = self._final_tally()
+        for feature in results:
+            for w in feature["winners"]: self._add_score(w, feature["points"])
         return results
 
+    # --- In-place search: apply / undo ---
+
+    def apply(self, tile: Tile, action: Tuple[int, int, int, Optional[int]], player_name: str) -> Optional[List[Dict]]:
+        """Plays (x, y, rotation, meeple_segment_index) for player_name, including completion scoring,
+        and hands the move to the next player.
+
+        Every change is journaled so `undo` can restore the exact previous state without
+        copying the board. Returns the completed features, or None (and changes nothing)
+        if the placement is illegal. An invalid meeple index is ignored, as in normal play.
+        """
+        x, y, rotation, meeple_idx = action
+        if self._journal is None:
+            self._set_journal([])
+        mark = len(self._journal)
+        self._rebind(tile, "rotation", rotation)
+        if not self.place_tile(x, y, tile):
+            self._rollback(mark)
+            return None
+        self._frames.append(mark)
+        if meeple_idx is not None:
+            self.place_meeple(x, y, meeple_idx, player_name)
+        completed = self.get_completed_features()
+        self.end_turn(player_name)
+        return completed
+
+    def undo(self):
+        """Reverts the most recent `apply`."""
+        self._rollback(self._frames.pop())
+
+    def _rollback(self, mark: int):
+        journal = self._journal
+        for i in range(len(journal) - 1, mark - 1, -1):
+            entry = journal[i]
+            op = entry[0]
+            if op == _SET: entry[1][entry[2]] = entry[3]
+            elif op == _DEL: del entry[1][entry[2]]
+            elif op == _TRUNC: del entry[1][entry[2]:]
+            elif op == _ATTR: setattr(entry[1], entry[2], entry[3])
+            elif op == _UNION: entry[1].undo_union(*entry[2:])
+            elif op == _MAKE_SETS:
+                for dsu, length in entry[1]: dsu.truncate(length)
+        del journal[mark:]
+        if not self._frames:
+            self._set_journal(None)
+
+    def _set_journal(self, journal: Optional[list]):
+        self._journal = journal
+        for dsu in self.dsu.values():
+            dsu.journal = journal
+
     def render_ascii(self) -> str:
         """Returns an ASCII representation of the board."""
         if not self.grid:
             return "   (Empty Board)"
         
-        min_x = min(x for x, y in self.grid.keys())
-        max_x = max(x for x, y in self.grid.keys())
-        min_y = min(y for x, y in self.grid.keys())
-        max_y = max(y for x, y in self.grid.keys())
-        
+        min_x, max_x, min_y, max_y = self.grid.bounds()
+
         # Add padding
         min_x -= 1
         max_x += 1
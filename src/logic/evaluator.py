@@ -0,0 +1,233 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .models import Tile, SegmentType
+from .deck import KINDS
+from .engine import Board, AREA_OFFSETS
+
+# --- Batched move evaluation ---
+# All actions of a turn become one float32 matrix (one row per action, columns FEATURE_NAMES),
+# built from what each placement would connect to, read straight from the DSU arrays without
+# playing any move; a linear model or small MLP then rates every row in one matrix product.
+# Features are seen from the player to move: "own" is that player, "opp" the other one.
+# Sizes and open edges of a joined feature are estimated per placement (every neighbouring
+# feature reached counted once), so they are exact unless one placement closes a loop.
+
+FEATURE_NAMES = (
+    "neighbors",                 # adjacent tiles (0-4)
+    "city_links", "road_links", "field_links",  # edge nodes connected to a neighbour, per type
+    "city_size", "road_size", "field_size",     # tiles of the distinct features joined, per type
+    "city_open", "road_open",    # estimated open edges of the joined cities/roads after the move
+    "city_points", "road_points",  # points of the cities/roads the move would complete
+    "own_meeples_joined", "opp_meeples_joined",  # meeples on the joined cities and roads
+    "own_fields_joined", "opp_fields_joined",    # meeples on the joined fields
+    "own_monasteries_near", "opp_monasteries_near",  # occupied monasteries in the 3x3 block
+    "monastery_tile", "monastery_area",  # the tile is a monastery / tiles around it
+    "pennants",
+    "meeple_city", "meeple_road", "meeple_field", "meeple_monastery",  # where the meeple goes, if any
+    "meeple_feature_size", "meeple_feature_open",  # estimated feature of the meeple segment
+    "meeples_left",              # of the player to move, before the action
+)
+N_FEATURES = len(FEATURE_NAMES)
+_F = {name: i for i, name in enumerate(FEATURE_NAMES)}
+
+_DSU_TYPES = (SegmentType.CITY, SegmentType.ROAD, SegmentType.FIELD)
+# Kind id -> DSU column (index in _DSU_TYPES) of every segment, -1 for monasteries
+_COLUMNS = [tuple(_DSU_TYPES.index(s.type) if s.type in _DSU_TYPES else -1 for s in kind.segments) for kind in KINDS]
+# Kind id -> open edge nodes / pennants of every segment
+_NODES = [np.asarray([len(s.nodes) for s in kind.segments], np.float64) for kind in KINDS]
+_SEGMENT_PENNANTS = [np.asarray([1 if s.has_pennant else 0 for s in kind.segments], np.float64) for kind in KINDS]
+_MEEPLE_COLUMN = {SegmentType.CITY: _F["meeple_city"], SegmentType.ROAD: _F["meeple_road"],
+                  SegmentType.FIELD: _F["meeple_field"], SegmentType.MONASTERY: _F["meeple_monastery"]}
+
+def _roots(parent: List[int]) -> np.ndarray:
+    """Root of every DSU element by pointer jumping (the DSU itself is not touched)."""
+    roots = np.asarray(parent, dtype=np.int64)
+    while True:
+        jumped = roots[roots]
+        if np.array_equal(jumped, roots): return roots
+        roots = jumped
+
+def action_features(board: Board, tile: Tile, actions: Sequence[Tuple[int, int, int, Optional[int]]],
+                    player_name: str) -> np.ndarray:
+    """Feature matrix (len(actions) x N_FEATURES, float32) of player_name's actions with tile."""
+    kind = tile.kind
+    table = kind.table
+    columns = _COLUMNS[kind.id]
+    me = board.player_index[player_name]
+    n = len(actions)
+    out = np.zeros((n, N_FEATURES), dtype=np.float32)
+    if n == 0: return out
+
+    placements: Dict[Tuple[int, int, int], int] = {}
+    row_placement = np.empty(n, dtype=np.int64)
+    for row, (x, y, rotation, _) in enumerate(actions):
+        row_placement[row] = placements.setdefault((x, y, rotation), len(placements))
+    P = len(placements)
+
+    # Every DSU as one global index space: column c's element e is offsets[c] + e
+    dsus = [board.dsu[st] for st in _DSU_TYPES]
+    sizes = [len(d.parent) for d in dsus]
+    offsets = np.cumsum([0] + sizes[:-1])
+    total = max(sum(sizes), 1)
+    roots = np.concatenate([_roots(d.parent) + off for d, off in zip(dsus, offsets)] + [np.zeros(0, np.int64)])
+    tiles = np.concatenate([np.asarray(d.tiles, np.float32) for d in dsus] + [np.zeros(0, np.float32)])
+    pennants = np.concatenate([np.asarray(d.pennants, np.float32) for d in dsus] + [np.zeros(0, np.float32)])
+    open_edges = np.concatenate([np.asarray(d.open_edges, np.float32) for d in dsus] + [np.zeros(0, np.float32)])
+    own = np.concatenate([np.asarray(d.meeples[me], np.float32) for d in dsus] + [np.zeros(0, np.float32)])
+    opp = np.concatenate([np.asarray(d.meeples[1 - me], np.float32) for d in dsus] + [np.zeros(0, np.float32)])
+    column_of = np.repeat(np.arange(len(dsus)), sizes)
+
+    # Edge-node connections to neighbouring tiles: (placement, segment of this tile, global DSU element)
+    conn_p: List[int] = []
+    conn_s: List[int] = []
+    conn_e: List[int] = []
+    neighbors_col = np.zeros(P, dtype=np.float32)
+    monastery_area = np.zeros(P, dtype=np.float32)
+    own_near = np.zeros(P, dtype=np.float32)
+    opp_near = np.zeros(P, dtype=np.float32)
+    grid, monasteries = board.grid, board.monasteries
+    for (x, y, rotation), p in placements.items():
+        ours = table.side_segments[rotation // 90]
+        neighbors = grid.neighbors(x, y)
+        for side in range(4):
+            neighbor = neighbors[side]
+            if neighbor is None: continue
+            neighbors_col[p] += 1
+            theirs = neighbor.kind.table.side_segments[neighbor.rotation // 90][(side + 2) % 4]
+            ids = neighbor.segment_ids
+            mine = ours[side]
+            for k in range(3):
+                c = columns[mine[k]]
+                if c < 0: continue
+                conn_p.append(p)
+                conn_s.append(mine[k])
+                conn_e.append(offsets[c] + ids[theirs[2 - k]])
+        if table.monastery:
+            monastery_area[p] = grid.count_area(x, y)
+        if monasteries:
+            for dx, dy in AREA_OFFSETS:
+                owner = monasteries.get((x + dx, y + dy))
+                if owner is None: continue
+                if owner == player_name: own_near[p] += 1
+                else: opp_near[p] += 1
+
+    conn_p_a = np.asarray(conn_p, dtype=np.int64)
+    conn_s_a = np.asarray(conn_s, dtype=np.int64)
+    conn_root = roots[np.asarray(conn_e, dtype=np.int64)] if conn_e else np.zeros(0, np.int64)
+    conn_col = column_of[conn_root] if conn_e else np.zeros(0, np.int64)
+
+    # Per placement: every joined feature counted once
+    feature_keys = np.unique(conn_p_a * total + conn_root)
+    fp, froot = feature_keys // total, feature_keys % total
+    fcol = column_of[froot] if len(froot) else np.zeros(0, np.int64)
+    # Per (placement, segment of this tile): the features that segment joins, each counted once;
+    # a segment closes its feature when nothing stays open once its own edge nodes are linked
+    segments = len(kind.segments)
+    slot = conn_p_a * segments + conn_s_a
+    slot_keys = np.unique(slot * total + conn_root)
+    sslot, sroot = slot_keys // total, slot_keys % total
+    slot_size = 1 + np.bincount(sslot, weights=tiles[sroot], minlength=P * segments)
+    slot_links = np.bincount(slot, minlength=P * segments)
+    slot_open = np.maximum(np.tile(_NODES[kind.id], P) + np.bincount(sslot, weights=open_edges[sroot], minlength=P * segments)
+                           - 2 * slot_links, 0)
+    slot_points = ((slot_links > 0) & (slot_open == 0)) * (slot_size + np.tile(_SEGMENT_PENNANTS[kind.id], P)
+                                                           + np.bincount(sslot, weights=pennants[sroot], minlength=P * segments))
+    slot_column = np.tile(columns, P)
+    slot_placement = np.repeat(np.arange(P), segments)
+
+    per_placement = np.zeros((P, N_FEATURES), dtype=np.float32)
+    per_placement[:, _F["neighbors"]] = neighbors_col
+    for c, name in enumerate(("city", "road", "field")):
+        per_placement[:, _F[f"{name}_links"]] = np.bincount(conn_p_a, weights=(conn_col == c), minlength=P)
+        per_placement[:, _F[f"{name}_size"]] = np.bincount(fp, weights=tiles[froot] * (fcol == c), minlength=P)
+        if name == "field":
+            per_placement[:, _F["own_fields_joined"]] = np.bincount(fp, weights=own[froot] * (fcol == c), minlength=P)
+            per_placement[:, _F["opp_fields_joined"]] = np.bincount(fp, weights=opp[froot] * (fcol == c), minlength=P)
+            continue
+        per_placement[:, _F[f"{name}_open"]] = np.bincount(slot_placement, weights=slot_open * (slot_column == c), minlength=P)
+        per_placement[:, _F[f"{name}_points"]] = np.bincount(slot_placement, weights=slot_points * (slot_column == c),
+                                                             minlength=P) * (2 if name == "city" else 1)
+    city_road = fcol < 2
+    per_placement[:, _F["own_meeples_joined"]] = np.bincount(fp, weights=own[froot] * city_road, minlength=P)
+    per_placement[:, _F["opp_meeples_joined"]] = np.bincount(fp, weights=opp[froot] * city_road, minlength=P)
+    per_placement[:, _F["own_monasteries_near"]] = own_near
+    per_placement[:, _F["opp_monasteries_near"]] = opp_near
+    per_placement[:, _F["monastery_tile"]] = 1.0 if table.monastery else 0.0
+    per_placement[:, _F["monastery_area"]] = monastery_area
+    per_placement[:, _F["pennants"]] = sum(_SEGMENT_PENNANTS[kind.id])
+    per_placement[:, _F["meeples_left"]] = board.meeple_counts[player_name]
+    out[:] = per_placement[row_placement]
+
+    # Meeple actions: type and estimated feature of the chosen segment
+    meeple_rows = [row for row, action in enumerate(actions) if action[3] is not None]
+    if meeple_rows:
+        rows = np.asarray(meeple_rows, dtype=np.int64)
+        meeples = [actions[row][3] for row in meeple_rows]
+        keys = row_placement[rows] * segments + np.asarray(meeples, dtype=np.int64)
+        out[rows, _F["meeple_feature_size"]] = slot_size[keys]
+        out[rows, _F["meeple_feature_open"]] = slot_open[keys]
+        for row, m in zip(meeple_rows, meeples):
+            segment = kind.segments[m]
+            out[row, _MEEPLE_COLUMN[SegmentType.MONASTERY if segment.is_monastery else segment.type]] = 1.0
+    return out
+
+class MoveEvaluator:
+    """Rates feature rows with a linear model (one layer) or an MLP (ReLU between layers).
+
+    `layers` is a list of (weights, bias) with weights shaped (inputs, outputs); the first
+    layer takes N_FEATURES inputs and the last one has a single output.
+    """
+    def __init__(self, layers: List[Tuple[np.ndarray, np.ndarray]]):
+        if not layers or layers[0][0].shape[0] != N_FEATURES or layers[-1][0].shape[1] != 1:
+            raise ValueError(f"Evaluator layers must map {N_FEATURES} features to one score")
+        self.layers = [(np.asarray(w, np.float32), np.asarray(b, np.float32)) for w, b in layers]
+
+    def score(self, features: np.ndarray) -> np.ndarray:
+        """One score per row of `features`, higher is better for the player to move."""
+        h = features
+        last = len(self.layers) - 1
+        for i, (w, b) in enumerate(self.layers):
+            h = h @ w + b
+            if i < last: np.maximum(h, 0, out=h)
+        return h[:, 0]
+
+    def save(self, path: str):
+        arrays = {"features": np.asarray(FEATURE_NAMES)}
+        for i, (w, b) in enumerate(self.layers):
+            arrays[f"w{i}"], arrays[f"b{i}"] = w, b
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "MoveEvaluator":
+        """Reads weights written by `save` (an .npz with w0, b0, w1, b1, ... and the feature names)."""
+        with np.load(path) as data:
+            if tuple(data["features"].tolist()) != FEATURE_NAMES:
+                raise ValueError(f"{path} was trained on a different feature set")
+            layers = []
+            while f"w{len(layers)}" in data:
+                i = len(layers)
+                layers.append((data[f"w{i}"], data[f"b{i}"]))
+        return cls(layers)
+
+    @classmethod
+    def default(cls) -> "MoveEvaluator":
+        """Hand-set linear weights: points completed now, growth of features we hold, meeples kept."""
+        w = np.zeros((N_FEATURES, 1), dtype=np.float32)
+        for name, weight in {
+            "neighbors": 0.5, "city_points": 1.0, "road_points": 1.0,
+            "own_meeples_joined": 1.5, "opp_meeples_joined": -1.0,
+            "own_fields_joined": 0.5, "opp_fields_joined": -0.5,
+            "own_monasteries_near": 1.0, "opp_monasteries_near": -1.0,
+            "meeple_city": 2.0, "meeple_road": 0.5, "meeple_field": -0.5, "meeple_monastery": 1.0,
+            "meeple_feature_size": 0.5, "meeple_feature_open": -0.25, "monastery_area": 0.5,
+        }.items():
+            w[_F[name], 0] = weight
+        return cls([(w, np.zeros(1, dtype=np.float32))])
+
+def score_actions(board: Board, tile: Tile, actions: Sequence[Tuple[int, int, int, Optional[int]]], player_name: str,
+                  evaluator: Optional[MoveEvaluator] = None) -> np.ndarray:
+    """Scores of player_name's actions with tile, in one batch (`MoveEvaluator.default()` if none given)."""
+    evaluator = evaluator if evaluator is not None else MoveEvaluator.default()
+    return evaluator.score(action_features(board, tile, actions, player_name))
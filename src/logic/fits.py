@@ -0,0 +1,165 @@
+from itertools import islice
+from math import comb
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from .models import SegmentType, Tile, TileType
+from .deck import TILE_KINDS, DECK_COUNTS, KINDS, _kind_id
+from .engine import Board, NEIGHBOR_OFFSETS, AREA_OFFSETS
+
+# --- Deck-aware fit index ---
+# Which tile kinds (and rotations) fit each open cell of a board, kept up to date as tiles are
+# placed and taken back, and weighed by the tiles still to be drawn. What fits a cell depends
+# only on its frontier constraint, and few distinct constraints occur, so the fitting kinds are
+# memoised per constraint; a placement only changes its own cell and its four neighbours.
+
+_FITS: Dict[Tuple[int, int], Tuple[Tuple[int, Tuple[int, ...]], ...]] = {}
+
+def constraint_fits(mask: int, value: int) -> Tuple[Tuple[int, Tuple[int, ...]], ...]:
+    """(kind id, distinct steps) of every tile kind that fits a cell with this frontier constraint."""
+    key = (mask, value)
+    result = _FITS.get(key)
+    if result is None:
+        result = []
+        for kind in KINDS:
+            table = kind.table
+            steps = tuple(step for step in table.rotations if table.signatures[step] & mask == value)
+            if steps: result.append((kind.id, steps))
+        result = _FITS[key] = tuple(result)
+    return result
+
+class FitIndex:
+    """Open cells of `board` with the tile kinds that fit them, plus the remaining deck as counts per
+    kind id (`remaining`, one entry per copy, as `deck.remaining_kinds`; by default the full deck
+    minus the tiles on the board).
+
+    The index follows the board by itself: every query first catches up with the tiles placed or
+    undone since the last one (a constant-time check when nothing changed), so it can sit next to
+    a board used with `apply`/`undo`. Draws are reported with `draw`/`put_back`.
+    """
+    def __init__(self, board: Board, remaining: Optional[Iterable[int]] = None):
+        self.board = board
+        self.remaining = [0] * len(KINDS)  # kind id -> copies still to be drawn
+        if remaining is None:
+            counts = dict(DECK_COUNTS)
+            for tile in board.grid.values():
+                counts[tile.name] -= 1
+            remaining = (TILE_KINDS[name].id for name, count in counts.items() for _ in range(max(count, 0)))
+        for kind_id in remaining:
+            self.remaining[kind_id] += 1
+        self.total = sum(self.remaining)
+        self.cells: Dict[Tuple[int, int], Tuple[Tuple[int, Tuple[int, ...]], ...]] = {}  # open cell -> fitting kinds
+        self.cell_counts = [0] * len(KINDS)  # kind id -> open cells it fits
+        self._placed: List[Tuple[Tuple[int, int], Tile, list]] = []  # (position, tile, segment_ids) in placement order
+
+    # --- Deck ---
+
+    def draw(self, tile: Union[Tile, TileType, int]):
+        kind_id = _kind_id(tile)
+        if self.remaining[kind_id] <= 0:
+            raise ValueError(f"No {KINDS[kind_id].name} left to draw")
+        self.remaining[kind_id] -= 1
+        self.total -= 1
+
+    def put_back(self, tile: Union[Tile, TileType, int]):
+        self.remaining[_kind_id(tile)] += 1
+        self.total += 1
+
+    # --- Board ---
+
+    def sync(self):
+        """Catches up with the board. Undo is LIFO and every placement binds a fresh segment_ids
+        list, so a recorded tile still on its square with the same list means every tile before
+        it is unchanged too; only the cells around the tiles that differ are refreshed."""
+        grid, placed = self.board.grid, self._placed
+        if len(placed) == len(grid) and (not placed or _unchanged(grid, placed[-1])): return
+        touched: Set[Tuple[int, int]] = set()
+        while placed and (len(placed) > len(grid) or not _unchanged(grid, placed[-1])):
+            touched.add(placed.pop()[0])
+        for pos in islice(iter(grid), len(placed), None):
+            tile = grid[pos]
+            placed.append((pos, tile, tile.segment_ids))
+            touched.add(pos)
+        frontier = self.board.frontier
+        counts = self.cell_counts
+        for x, y in touched:
+            for pos in ((x, y), *((x + dx, y + dy) for _, dx, dy in NEIGHBOR_OFFSETS)):
+                old = self.cells.pop(pos, None)
+                if old is not None:
+                    for kind_id, _ in old: counts[kind_id] -= 1
+                constraint = frontier.get(pos)
+                if constraint is not None:
+                    new = self.cells[pos] = constraint_fits(constraint[0], constraint[1])
+                    for kind_id, _ in new: counts[kind_id] += 1
+
+    def has_move(self, tile: Union[Tile, TileType, int]) -> bool:
+        """Whether `board.get_legal_moves` would return anything for this kind."""
+        self.sync()
+        return not self.board.grid or self.cell_counts[_kind_id(tile)] > 0
+
+    def placements(self, pos: Tuple[int, int]) -> Tuple[Tuple[int, Tuple[int, ...]], ...]:
+        """(kind id, distinct steps) of the kinds that fit the open cell `pos`; empty if it is not open."""
+        self.sync()
+        return self.cells.get(pos, ())
+
+    def fitting_tiles(self, pos: Tuple[int, int]) -> int:
+        """Remaining tiles that fit `pos`. An empty cell off the frontier has no constraint yet and
+        counts every remaining tile; a filled cell counts none."""
+        self.sync()
+        fits = self.cells.get(pos)
+        if fits is None:
+            return 0 if pos in self.board.grid else self.total
+        remaining = self.remaining
+        return sum(remaining[kind_id] for kind_id, _ in fits)
+
+    def fill_probability(self, pos: Tuple[int, int], draws: int = 1) -> float:
+        """Probability that at least one of the next `draws` tiles fits `pos` as it is now
+        (hypergeometric over the remaining deck); 1.0 for a filled cell."""
+        if pos in self.board.grid: return 1.0
+        fit, total = self.fitting_tiles(pos), self.total
+        draws = min(draws, total)
+        if total == 0 or fit == 0: return 0.0
+        return 1.0 - comb(total - fit, draws) / comb(total, draws)
+
+    def playable_probability(self) -> float:
+        """Probability that the next tile drawn has a legal move (1 - the discard probability)."""
+        self.sync()
+        if self.total == 0: return 0.0
+        if not self.board.grid: return 1.0
+        counts = self.cell_counts
+        return sum(n for kind_id, n in enumerate(self.remaining) if counts[kind_id]) / self.total
+
+    # --- Features ---
+
+    def open_cells(self, x: int, y: int, segment_index: int) -> Set[Tuple[int, int]]:
+        """Empty cells the feature through a segment of the tile at (x, y) still needs: the cells
+        beside its open edges for a city or road, the empty cells of the 3x3 block for a monastery."""
+        board = self.board
+        tile = board.grid[(x, y)]
+        segment = tile.segments[segment_index]
+        if segment.is_monastery or segment.type is SegmentType.MONASTERY:
+            return {(x + dx, y + dy) for dx, dy in AREA_OFFSETS if (x + dx, y + dy) not in board.grid}
+        if segment.type is SegmentType.FIELD:
+            raise ValueError("Fields are never completed")
+        dsu = board.dsu[segment.type]
+        cells = set()
+        for member in dsu.members(dsu.root(tile.segment_ids[segment_index])):
+            (mx, my), i = dsu.owners[member]
+            owner = board.grid[(mx, my)]
+            sides = owner.kind.table.side_segments[owner.rotation // 90]
+            for side, (_, dx, dy) in enumerate(NEIGHBOR_OFFSETS):
+                pos = (mx + dx, my + dy)
+                if i in sides[side] and pos not in board.grid: cells.add(pos)
+        return cells
+
+    def completable(self, x: int, y: int, segment_index: int) -> bool:
+        """False when the city, road or monastery through this segment can no longer be completed:
+        one of the cells it needs fits no remaining tile, or more cells are missing than tiles are
+        left. Constraints only tighten as tiles are placed, so False is final; True means the
+        remaining deck does not rule it out."""
+        cells = self.open_cells(x, y, segment_index)
+        if len(cells) > self.total: return False
+        return all(self.fitting_tiles(pos) > 0 for pos in cells)
+
+def _unchanged(grid, entry) -> bool:
+    pos, tile, ids = entry
+    return grid.get(pos) is tile and tile.segment_ids is ids
@@ -0,0 +1,164 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+from .models import Tile
+
+# Storage backends for Board.grid. Both behave like a (x, y) -> Tile dict that iterates in
+# placement order, and add the queries the board's hot paths need: the four orthogonal
+# neighbours of a cell (N, E, S, W, i.e. Side order), the tile count of a 3x3 block and a
+# bounding box that is tracked on every write instead of recomputed with full scans.
+
+class _TrackedBounds:
+    """Bounding box maintenance shared by the backends; `_box` is None while it needs a rescan."""
+    _box: Optional[List[int]] = None
+
+    def _grow(self, x: int, y: int):
+        box = self._box
+        if box is None: return
+        if not self._count:
+            self._box = [x, x, y, y]
+            return
+        if x < box[0]: box[0] = x
+        elif x > box[1]: box[1] = x
+        if y < box[2]: box[2] = y
+        elif y > box[3]: box[3] = y
+
+    def _shrink(self, x: int, y: int):
+        # Only removing a tile on the edge of the box can shrink it (undo of the latest placement)
+        box = self._box
+        if box is not None and (x in (box[0], box[1]) or y in (box[2], box[3])):
+            self._box = None
+
+    def bounds(self) -> Optional[Tuple[int, int, int, int]]:
+        """(min_x, max_x, min_y, max_y) of the placed tiles, or None while the grid is empty."""
+        if not self._count: return None
+        if self._box is None:
+            xs = [x for x, _ in self]
+            ys = [y for _, y in self]
+            self._box = [min(xs), max(xs), min(ys), max(ys)]
+        return tuple(self._box)
+
+class DictGrid(_TrackedBounds, dict):
+    """Default backend: a plain dict keyed by position, so lookups stay C-level dict probes."""
+
+    def __init__(self):
+        super().__init__()
+        self._box = []
+
+    @property
+    def _count(self) -> int:
+        return len(self)
+
+    def __setitem__(self, pos: Tuple[int, int], tile: Tile):
+        self._grow(*pos)
+        dict.__setitem__(self, pos, tile)
+
+    def __delitem__(self, pos: Tuple[int, int]):
+        dict.__delitem__(self, pos)
+        self._shrink(*pos)
+
+    def neighbors(self, x: int, y: int) -> List[Optional[Tile]]:
+        get = self.get
+        return [get((x, y + 1)), get((x + 1, y)), get((x, y - 1)), get((x - 1, y))]
+
+    def count_area(self, x: int, y: int) -> int:
+        """Tiles in the 3x3 block centred on (x, y), the cell itself included."""
+        return sum(1 for dx in (-1, 0, 1) for dy in (-1, 0, 1) if (x + dx, y + dy) in self)
+
+class DenseGrid(_TrackedBounds):
+    """Growable row-major 2-D array with an origin offset; neighbour access is index arithmetic.
+
+    Row r, column c holds the cell (origin_x + c, origin_y + r). The array keeps a margin of
+    two empty cells around every tile, so the neighbours and the 3x3 block of any placed or
+    frontier cell are always inside it and need no bounds checks.
+    """
+    MARGIN = 2
+
+    def __init__(self, size: int = 16):
+        self.width = self.height = size
+        self.origin_x = self.origin_y = -(size // 2)
+        self.cells: List[Optional[Tile]] = [None] * (size * size)
+        self.order: Dict[Tuple[int, int], None] = {}  # placed positions in placement order
+        self._box = []
+
+    @property
+    def _count(self) -> int:
+        return len(self.order)
+
+    def _inside(self, x: int, y: int, margin: int) -> bool:
+        return (margin <= x - self.origin_x < self.width - margin
+                and margin <= y - self.origin_y < self.height - margin)
+
+    def _grow_to(self, x: int, y: int):
+        """Reallocates so that (x, y) is at least MARGIN cells away from every edge."""
+        margin = self.MARGIN
+        while not self._inside(x, y, margin):
+            min_x = min(self.origin_x, x - margin - self.width // 2)
+            min_y = min(self.origin_y, y - margin - self.height // 2)
+            width = max(self.origin_x + self.width, x + margin + 1 + self.width // 2) - min_x
+            height = max(self.origin_y + self.height, y + margin + 1 + self.height // 2) - min_y
+            cells: List[Optional[Tile]] = [None] * (width * height)
+            shift = (self.origin_y - min_y) * width + (self.origin_x - min_x)
+            for row in range(self.height):
+                start = row * self.width
+                dest = shift + row * width
+                cells[dest:dest + self.width] = self.cells[start:start + self.width]
+            self.cells, self.width, self.height, self.origin_x, self.origin_y = cells, width, height, min_x, min_y
+
+    def get(self, pos: Tuple[int, int], default=None):
+        x = pos[0] - self.origin_x
+        y = pos[1] - self.origin_y
+        if 0 <= x < self.width and 0 <= y < self.height:
+            tile = self.cells[y * self.width + x]
+            if tile is not None: return tile
+        return default
+
+    def __contains__(self, pos) -> bool:
+        return self.get(pos) is not None
+
+    def __getitem__(self, pos: Tuple[int, int]) -> Tile:
+        tile = self.get(pos)
+        if tile is None: raise KeyError(pos)
+        return tile
+
+    def __setitem__(self, pos: Tuple[int, int], tile: Tile):
+        x, y = pos
+        if not self._inside(x, y, self.MARGIN): self._grow_to(x, y)
+        self._grow(x, y)
+        if pos not in self.order: self.order[pos] = None
+        self.cells[(y - self.origin_y) * self.width + (x - self.origin_x)] = tile
+
+    def __delitem__(self, pos: Tuple[int, int]):
+        if pos not in self.order: raise KeyError(pos)
+        x, y = pos
+        self.cells[(y - self.origin_y) * self.width + (x - self.origin_x)] = None
+        del self.order[pos]
+        self._shrink(x, y)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return iter(self.order)
+
+    def keys(self):
+        return self.order.keys()
+
+    def values(self) -> List[Tile]:
+        return [self.cells[(y - self.origin_y) * self.width + (x - self.origin_x)] for x, y in self.order]
+
+    def items(self) -> List[Tuple[Tuple[int, int], Tile]]:
+        return [(pos, tile) for pos, tile in zip(self.order, self.values())]
+
+    def neighbors(self, x: int, y: int) -> List[Optional[Tile]]:
+        if not self._inside(x, y, 1): self._grow_to(x, y)
+        w = self.width
+        i = (y - self.origin_y) * w + (x - self.origin_x)
+        cells = self.cells
+        return [cells[i + w], cells[i + 1], cells[i - w], cells[i - 1]]
+
+    def count_area(self, x: int, y: int) -> int:
+        """Tiles in the 3x3 block centred on (x, y), the cell itself included."""
+        if not self._inside(x, y, 1): self._grow_to(x, y)
+        w = self.width
+        i = (y - self.origin_y) * w + (x - self.origin_x)
+        cells = self.cells
+        return sum(1 for row in (i - w, i, i + w) for c in cells[row - 1:row + 2] if c is not None)
@@ -0,0 +1,428 @@
+import math
+import multiprocessing
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .models import Tile
+from .deck import KINDS, Deck, remaining_kinds
+from .engine import Board, PLAYERS, Action
+from .snapshot import encode_board, decode_board
+from .simulator import playout
+from .think import Think
+
+
+def _visit_distribution(statistics: Dict[Action, Tuple[int, float]], top: int = 5) -> List[Dict]:
+    ranked = sorted(statistics.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return [{"action": a, "visits": n, "value": w / n if n else 0.0} for a, (n, w) in ranked]
+
+class _Decision:
+    """A player to move with a known tile; edges are full actions leading to chance nodes."""
+    __slots__ = ("player", "kind", "key", "visits", "untried", "children")
+
+    def __init__(self, player: int, kind: int, key: int):
+        self.player = player
+        self.kind = kind
+        self.key = key                     # Board.zobrist of the position, used to re-find it next turn
+        self.visits = 0
+        self.untried: Optional[List[Action]] = None  # actions not expanded yet; None until first visit
+        self.children: Dict[Action, "_Chance"] = {}
+
+class _Chance:
+    """Position after an action, before the next draw; children are keyed by the drawn kind id."""
+    __slots__ = ("visits", "value", "children")
+
+    def __init__(self):
+        self.visits = 0
+        self.value = 0.0                   # summed reward for the player who chose the action
+        self.children: Dict[int, _Decision] = {}
+
+class MCTS:
+    """UCT search over full actions with chance nodes sampled from the remaining deck.
+
+    Each iteration descends the tree with UCB1, expands one action, finishes with a random
+    playout of at most `rollout_depth` turns (None plays to the end of the deck) and backs
+    up the projected final score margin, squashed to [0, 1] for the player to move. Moves
+    are explored in place on a private copy of the board with `Board.apply`/`Board.undo`.
+    The subtree of the position reached at the next call is reused.
+
+    A decision node with n visits may only have `widening * sqrt(n + 1)` expanded actions
+    (progressive widening; None expands every action before any is revisited), so the
+    search reaches the following turns despite ~50 full actions per tile.
+
+    Given a `Think`, the search also stops at its deadline or when it is cancelled, and every
+    `offer_every` iterations offers it the most visited root action with the depth of the
+    principal variation (the most visited line, in decisions).
+    """
+    def __init__(self, time_limit: Optional[float] = 1.0, iterations: Optional[int] = None, exploration: float = 1.0,
+                 rollout_depth: Optional[int] = 12, rollout_meeple_rate: float = 0.3, score_scale: float = 20.0,
+                 widening: Optional[float] = 2.0, seed: Optional[int] = None, offer_every: int = 64):
+        if time_limit is None and iterations is None:
+            raise ValueError("MCTS needs a time limit, an iteration budget or both")
+        self.time_limit = time_limit
+        self.iterations = iterations
+        self.exploration = exploration
+        self.rollout_depth = rollout_depth
+        self.rollout_meeple_rate = rollout_meeple_rate
+        self.score_scale = score_scale
+        self.widening = widening
+        self.offer_every = offer_every
+        self.rng = random.Random(seed)
+        self.root: Optional[_Decision] = None
+        self.stats: Dict = {}
+        self._board: Optional[Board] = None
+        self._pool = Deck()
+
+    # --- Public API ---
+
+    def search(self, board: Board, tile: Tile, player_name: str, deck: Optional[Sequence[Tile]] = None,
+               think: Optional[Think] = None) -> Action:
+        """Best full action for player_name holding tile; `board` itself is never modified."""
+        self.run(decode_board(encode_board(board)), tile.kind.id, player_name, remaining_kinds(board, tile, deck), think)
+        return self.best_action()
+
+    def run(self, board: Board, kind: int, player_name: str, pool: List[int], think: Optional[Think] = None):
+        """Searches the position on `board` (which the search mutates and restores) for a tile of
+        kind id `kind`; `pool` holds the kind ids still to be drawn. Results: `root_statistics()`."""
+        self._board = board
+        self._pool = Deck.of_kinds(pool, self.rng)
+        player = board.player_index[player_name]
+        if board.to_move != player:
+            board.end_turn(PLAYERS[player - 1])
+        root = self._reuse(kind, board.zobrist, player)
+        reused = root.visits if root is not None else 0
+        self.root = root if root is not None else _Decision(player, kind, board.zobrist)
+
+        start = time.perf_counter()
+        think = think if think is not None else Think()
+        deadline = think.limit(self.time_limit, start)
+        done = 0
+        while (self.iterations is None or done < self.iterations) and time.perf_counter() < deadline and not think.cancelled:
+            self._iterate()
+            done += 1
+            if done % self.offer_every == 0:
+                think.offer(self.best_action(), self.principal_depth())
+            if self.root.untried == [] and len(self.root.children) == 1:
+                break  # a single legal action: nothing to search
+        elapsed = time.perf_counter() - start
+        depth = self.principal_depth()
+        if self.root.children:
+            think.offer(self.best_action(), depth)
+
+        self.stats = {
+            "iterations": done,
+            "seconds": elapsed,
+            "iterations_per_second": done / elapsed if elapsed > 0 else 0.0,
+            "reused_visits": reused,
+            "tree_size": self._tree_size(self.root),
+            "root_visits": self.root.visits,
+            "depth": depth,
+            "visit_distribution": _visit_distribution(self.root_statistics()),
+            "cancelled": think.cancelled,
+        }
+        self._board = None
+
+    def best_action(self) -> Optional[Action]:
+        """The most visited root action so far."""
+        if not self.root or not self.root.children: return None
+        return max(self.root.children.items(), key=lambda item: item[1].visits)[0]
+
+    def principal_depth(self) -> int:
+        """Decisions along the most visited line from the root (the depth the search reached)."""
+        depth, node = 0, self.root
+        while node is not None and node.children:
+            depth += 1
+            chance = max(node.children.values(), key=lambda child: child.visits)
+            node = max(chance.children.values(), key=lambda child: child.visits) if chance.children else None
+        return depth
+
+    def root_statistics(self) -> Dict[Action, Tuple[int, float]]:
+        """Root action -> (visits, summed reward for the player to move) of the last search."""
+        return {action: (child.visits, child.value) for action, child in self.root.children.items()}
+
+    # --- Search ---
+
+    def _iterate(self):
+        board, pool, rng = self._board, self._pool, self.rng
+        draws: List[int] = []
+        path: List[Tuple[_Decision, _Chance]] = []
+        node = self.root
+        while True:
+            if node.untried is None:
+                node.untried = self._actions(node)
+                rng.shuffle(node.untried)
+            if node.untried and (self.widening is None or len(node.children) < self.widening * math.sqrt(node.visits + 1)):
+                action = node.untried.pop()
+                child = node.children[action] = _Chance()
+                expanded = True
+            else:
+                action, child = self._select(node)
+                expanded = False
+            board.apply(Tile(KINDS[node.kind]), action, PLAYERS[node.player])
+            path.append((node, child))
+            if expanded:
+                break
+            kind = self._draw_playable(draws)
+            if kind is None:
+                break
+            nxt = child.children.get(kind)
+            if nxt is None:
+                nxt = child.children[kind] = _Decision(board.to_move, kind, board.zobrist)
+            node = nxt
+
+        reward = self._rollout(draws)
+        for _ in path:
+            board.undo()
+        for _ in draws:
+            pool.undo()
+
+        for decision, chance in path:
+            decision.visits += 1
+            chance.visits += 1
+            chance.value += reward if decision.player == 0 else 1.0 - reward
+
+    def _select(self, node: _Decision) -> Tuple[Action, _Chance]:
+        log_n = math.log(node.visits)
+        c = self.exploration
+        best, best_ucb = None, -math.inf
+        for action, child in node.children.items():
+            ucb = child.value / child.visits + c * math.sqrt(log_n / child.visits)
+            if ucb > best_ucb:
+                best, best_ucb = (action, child), ucb
+        return best
+
+    def _actions(self, node: _Decision) -> List[Action]:
+        return list(self._board.legal_actions(Tile(KINDS[node.kind]), PLAYERS[node.player]))
+
+    def _draw_playable(self, draws: List[int]) -> Optional[int]:
+        """Draws kinds from the pool until one fits the board (unplayable ones are discarded, as in play);
+        each is appended to `draws` so the caller can put them back with as many `Deck.undo` calls."""
+        pool, board = self._pool, self._board
+        while pool:
+            kind = pool.sample_kind()
+            pool.take(kind)
+            draws.append(kind)
+            if board.get_legal_moves(Tile(KINDS[kind])):
+                return kind
+        return None
+
+    def _rollout(self, draws: List[int]) -> float:
+        """Random playout from the current position; returns the reward for Player1."""
+        board = self._board
+        turns = playout(board, lambda: self._draw_playable(draws), self.rng, self.rollout_meeple_rate, self.rollout_depth)
+        projected = board.project_final_scores()
+        for _ in range(turns):
+            board.undo()
+        margin = projected[PLAYERS[0]] - projected[PLAYERS[1]]
+        return 0.5 + 0.5 * math.tanh(margin / self.score_scale)
+
+    # --- Tree reuse ---
+
+    def _reuse(self, kind: int, key: int, player: int) -> Optional[_Decision]:
+        """The decision node of the previous tree matching the current position, if any.
+
+        Looks two plies below the previous root (our move, the opponent's move), matching
+        the position by Zobrist hash and the tile in hand by kind.
+        """
+        if self.root is None:
+            return None
+        frontier = [self.root]
+        for _ in range(2):
+            frontier = [d for n in frontier for c in n.children.values() for d in c.children.values()]
+            for node in frontier:
+                if node.key == key and node.kind == kind and node.player == player:
+                    return node
+        return None
+
+    @staticmethod
+    def _tree_size(root: _Decision) -> int:
+        size, stack = 0, [root]
+        while stack:
+            node = stack.pop()
+            size += 1 + len(node.children)
+            for chance in node.children.values():
+                stack.extend(chance.children.values())
+        return size
+
+# --- Root parallelism ---
+# Every worker process keeps one MCTS (and its tree, for reuse) for its whole lifetime and
+# searches its own copy of the position decoded from a snapshot; only the root statistics
+# travel back to the parent, which sums them per action.
+#
+# Pools are shared: every ParallelMCTS with the same worker count and search options submits to
+# one process pool, so a server running many games keeps `workers` processes in all. Workers
+# are started from a forkserver rather than forked from the (possibly threaded) parent. Each
+# search in flight owns a slot of a flag array shared with the pool's workers; a cancelled
+# think sets the flag, which the workers' Think reads as its `cancelled` flag. A slot is only
+# reused once every worker of its search has returned.
+
+_CANCEL_SLOTS = 64
+_REPORT_GRACE = 0.1  # seconds the parent still waits for reports once the think is over
+
+_worker_search: Optional[MCTS] = None
+_worker_cancel = None  # the pool's flag array, one byte per search slot
+
+class _PoolThink(Think):
+    """A worker's Think, cancelled through its search's slot of the pool's flag array."""
+    __slots__ = ("slot",)
+
+    @property
+    def cancelled(self) -> bool:
+        return _worker_cancel[self.slot] != 0
+
+    @cancelled.setter
+    def cancelled(self, value: bool):
+        if value: _worker_cancel[self.slot] = 1
+
+def _init_worker(options: Dict, cancel):
+    global _worker_search, _worker_cancel
+    options = dict(options)
+    if options.get("seed") is not None:
+        options["seed"] += os.getpid()
+    _worker_search = MCTS(**options)
+    _worker_cancel = cancel
+
+def _worker_run(snapshot: bytes, kind: int, player_name: str, pool: List[int],
+                seconds: Optional[float] = None, slot: Optional[int] = None) -> Tuple[Dict[Action, Tuple[int, float]], Dict]:
+    if slot is None:
+        think = Think.budget(seconds)
+    else:
+        think = _PoolThink.budget(seconds)
+        think.slot = slot
+    _worker_search.run(decode_board(snapshot), kind, player_name, pool, think)
+    return _worker_search.root_statistics(), _worker_search.stats
+
+class _Pool:
+    """A worker pool and the cancellation slots of the searches using it."""
+    def __init__(self, workers: int, options: Dict):
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])  # imported once, not in every worker started
+        self.cancel = context.RawArray("b", _CANCEL_SLOTS)
+        self.executor = ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                            initargs=(options, self.cancel))
+        # Start the workers now rather than on the first search
+        self.started = [self.executor.submit(int) for _ in range(workers)]
+        self._free = list(range(_CANCEL_SLOTS))
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Optional[int]:
+        """A cleared cancellation slot, or None when every slot is in use (that search then
+        cannot be cancelled and its workers stop at their deadline)."""
+        with self._lock:
+            if not self._free: return None
+            slot = self._free.pop()
+        self.cancel[slot] = 0
+        return slot
+
+    def release(self, slot: Optional[int], futures=()):
+        """Frees `slot` once every one of `futures` (workers that may still read it) is done."""
+        if slot is None: return
+        left = [len(futures)]
+        def done(_=None):
+            with self._lock:
+                left[0] -= 1
+                if left[0] <= 0: self._free.append(slot)
+        if not futures: done()
+        for future in futures: future.add_done_callback(done)
+
+_pools: Dict[Tuple, _Pool] = {}
+_pools_lock = threading.Lock()
+
+def _shared_pool(workers: int, options: Dict) -> _Pool:
+    key = (workers, tuple(sorted(options.items())))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = _Pool(workers, options)
+        return pool
+
+def shutdown_pools():
+    """Stops the workers of every shared pool; the next search starts a new one."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.executor.shutdown(cancel_futures=True)
+
+class ParallelMCTS:
+    """Root-parallel MCTS: `workers` independent searches of the same position in a persistent
+    process pool, merged by summing the visits and rewards of each root action.
+
+    `time_limit` applies to every worker; an `iterations` budget is split evenly between them.
+    The pool is started with the first ParallelMCTS of its settings (see `warm_up`) and shared
+    with every one of the same settings until `close()` (or `shutdown_pools()`). Given a `Think`, the workers search until
+    its deadline at the latest, and the merged statistics are offered to it as workers finish;
+    once it is over (cancelled or past its deadline) the workers stop after their current
+    playout and the search returns the merge of what they report within `_REPORT_GRACE`
+    seconds (None if none did, e.g. while the pool is still starting).
+    """
+    def __init__(self, workers: int = 4, time_limit: Optional[float] = 1.0, iterations: Optional[int] = None, **options):
+        if iterations is not None:
+            iterations = max(1, iterations // workers)
+        self.workers = workers
+        self.options = dict(options, time_limit=time_limit, iterations=iterations)
+        self.stats: Dict = {}
+        _shared_pool(workers, self.options)
+
+    def search(self, board: Board, tile: Tile, player_name: str, deck: Optional[Sequence[Tile]] = None,
+               think: Optional[Think] = None) -> Optional[Action]:
+        """Best full action for player_name holding tile; `board` itself is never modified."""
+        pool = _shared_pool(self.workers, self.options)
+        think = think if think is not None else Think()
+        snapshot, kinds = encode_board(board), remaining_kinds(board, tile, deck)
+        seconds = think.remaining() if think.deadline != math.inf else None
+        if seconds is not None and self.options["time_limit"] is not None:
+            seconds = min(seconds, self.options["time_limit"])
+        start = time.perf_counter()
+        slot = pool.acquire()
+        pending = set()
+        try:
+            pending = {pool.executor.submit(_worker_run, snapshot, tile.kind.id, player_name, kinds, seconds, slot)
+                       for _ in range(self.workers)}
+            merged: Dict[Action, Tuple[int, float]] = {}
+            iterations = depth = 0
+            stop = math.inf  # when to give up on workers that have not reported
+            while pending and time.perf_counter() < stop:
+                if think.expired() and stop == math.inf:
+                    if slot is not None: pool.cancel[slot] = 1
+                    stop = time.perf_counter() + _REPORT_GRACE
+                done, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+                for future in done:
+                    statistics, stats = future.result()
+                    iterations += stats["iterations"]
+                    depth = max(depth, stats["depth"])
+                    for action, (visits, value) in statistics.items():
+                        total = merged.get(action, (0, 0.0))
+                        merged[action] = (total[0] + visits, total[1] + value)
+                if done and merged:
+                    think.offer(max(merged.items(), key=lambda item: item[1][0])[0], depth)
+        finally:
+            pool.release(slot, pending)
+        elapsed = time.perf_counter() - start
+        self.stats = {
+            "workers": self.workers,
+            "iterations": iterations,
+            "seconds": elapsed,
+            "iterations_per_second": iterations / elapsed if elapsed > 0 else 0.0,
+            "root_visits": sum(visits for visits, _ in merged.values()),
+            "depth": depth,
+            "visit_distribution": _visit_distribution(merged),
+            "cancelled": think.cancelled,
+        }
+        return max(merged.items(), key=lambda item: item[1][0])[0] if merged else None
+
+    def warm_up(self):
+        """Waits until the pool's workers are running (starting them takes a fraction of a second
+        plus an import of the caller's main script in each)."""
+        wait(_shared_pool(self.workers, self.options).started)
+
+    def close(self):
+        """Stops the shared pool this search uses (and so that of every search with its settings)."""
+        key = (self.workers, tuple(sorted(self.options.items())))
+        with _pools_lock:
+            pool = _pools.pop(key, None)
+        if pool is not None:
+            pool.executor.shutdown(cancel_futures=True)
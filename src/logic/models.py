@@ -1,5 +1,5 @@
 from enum import Enum, auto
-from typing import List, Dict, Optional, Tuple
+from typing import List, NamedTuple, Optional, Tuple
 
 class SegmentType(Enum):
     CITY = auto()
@@ -7,43 +7,92 @@ class SegmentType(Enum):
     FIELD = auto()
     MONASTERY = auto()
 
+    # Members are singletons compared by identity, so the identity hash is valid and keeps
+    # the board's per-type dict lookups in C (Enum.__hash__ is a Python-level function)
+    __hash__ = object.__hash__
+
 class Side(Enum):
     NORTH = 0
     EAST = 1
     SOUTH = 2
     WEST = 3
 
-class TileSegment:
-    """Represents a part of a tile using node indices (0-11)."""
-    def __init__(self, segment_type: SegmentType, nodes: List[int], has_pennant: bool = False, is_monastery: bool = False):
-        self.type = segment_type
-        self.nodes = nodes  # Indices 0-11
-        self.has_pennant = has_pennant
-        self.is_monastery = is_monastery
-        self.id = None
-        self.meeple_player: Optional[str] = None
+class TileSegment(NamedTuple):
+    """Immutable part of a tile type using node indices (0-11) at rotation 0."""
+    type: SegmentType
+    nodes: Tuple[int, ...]
+    has_pennant: bool = False
+    is_monastery: bool = False
 
-    def __repr__(self):
-        return f"Segment({self.type.name}, nodes={self.nodes}, meeple={self.meeple_player})"
+class TileTable(NamedTuple):
+    """Immutable per-type lookup tables; the per-rotation ones are indexed by step (rotation // 90)."""
+    sides: Tuple[Tuple[int, int, int, int], ...]  # step -> 6-bit code of each side (N, E, S, W)
+    signatures: Tuple[int, ...]                   # step -> the four side codes packed into 24 bits
+    node_segments: Tuple[Tuple[int, ...], ...]    # step -> edge node -> segment index
+    rotations: Tuple[int, ...]                    # distinct steps; symmetric duplicates removed
+    equivalent: Tuple[Tuple[int, ...], ...]       # step -> all steps yielding the same layout
+    field_cities: Tuple[Tuple[int, ...], ...]     # segment index -> adjacent city segments (fields only)
+    side_segments: Tuple[Tuple[Tuple[int, int, int], ...], ...]  # step -> side -> segment index of its 3 nodes (clockwise)
+    # (segment index, type, pennants, open edges, type occurs more than once) of every city, road and field
+    features: Tuple[Tuple[int, "SegmentType", int, int, bool], ...]
+    monastery: bool
 
-class Tile:
-    """Represents a single square tile in the game with 12 edge nodes."""
-    def __init__(self, name: str, segments: List[TileSegment], center_type: SegmentType = SegmentType.FIELD):
+class TileType:
+    """Shared, immutable definition of a tile kind: geometry, segment types, pennants and lookup tables.
+
+    One instance exists per catalog entry; every `Tile` of that kind points at it (flyweight).
+    """
+    __slots__ = ("id", "name", "segments", "center_type", "table")
+
+    def __init__(self, type_id: int, name: str, segments: Tuple[TileSegment, ...], center_type: SegmentType, table: TileTable):
+        self.id = type_id
         self.name = name
         self.segments = segments
         self.center_type = center_type
-        self.rotation = 0
+        self.table = table
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return f"TileType({self.name})"
+
+class Tile:
+    """A single tile in play: its shared `TileType` plus the compact per-placement state.
+
+    `segment_ids` (DSU id per segment, None for segments outside any DSU) and `meeples`
+    (player name per segment slot) are assigned by `Board.place_tile`.
+    """
+    __slots__ = ("kind", "rotation", "segment_ids", "meeples")
+
+    def __init__(self, kind: TileType, rotation: int = 0):
+        self.kind = kind
+        self.rotation = rotation
+        self.segment_ids: Optional[List[Optional[int]]] = None
+        self.meeples: Optional[List[Optional[str]]] = None
+
+    @property
+    def name(self) -> str:
+        return self.kind.name
+
+    @property
+    def segments(self) -> Tuple[TileSegment, ...]:
+        """Segment definitions of the tile type (node indices at rotation 0)."""
+        return self.kind.segments
+
+    @property
+    def center_type(self) -> SegmentType:
+        return self.kind.center_type
 
     def rotate(self, times: int = 1):
-        """Rotates the tile by shifting node indices (3 nodes per 90 degrees)."""
-        times = times % 4
-        if times == 0: return
+        """Rotates the tile clockwise; the shared geometry is never touched."""
         self.rotation = (self.rotation + 90 * times) % 360
-        shift = times * 3
-        for segment in self.segments:
-            segment.nodes = [(n + shift) % 12 for n in segment.nodes]
 
-    def get_side_nodes(self, side: Side) -> List[int]:
+    @staticmethod
+    def get_side_nodes(side: Side) -> List[int]:
         """Returns the 3 node indices associated with a specific side."""
         if side == Side.NORTH: return [0, 1, 2]
         if side == Side.EAST:  return [3, 4, 5]
@@ -52,11 +101,8 @@ class Tile:
         return []
 
     def get_node_type(self, node_index: int) -> SegmentType:
-        """Returns the segment type at a specific node index."""
-        for segment in self.segments:
-            if node_index in segment.nodes:
-                return segment.type
-        return SegmentType.FIELD # Default
+        """Returns the segment type at a specific node index for the current rotation."""
+        return self.kind.segments[self.kind.table.node_segments[self.rotation // 90][node_index]].type
 
     def __repr__(self):
         return f"Tile({self.name}, rotation={self.rotation})"
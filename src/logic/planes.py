@@ -0,0 +1,243 @@
+import weakref
+from itertools import islice
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .models import SegmentType
+from .deck import KINDS
+from .engine import Board, PLAYERS
+
+# --- Feature planes ---
+# A board as a fixed-size float32 tensor (channels x size x size) for policy/value models: one
+# cell per board square in a window around the play area (tiles outside it are cropped, empty
+# cells are zero). Cell (row, col) is the square (x0 + col, y0 + row) with (x0, y0) = `origin()`;
+# rows grow northwards like y. Ownership channels are seen from `player_name` (own/opp).
+#
+# Static channels depend only on the tile kind and rotation and come from one lookup table;
+# the rest are read from the DSU arrays with a few vectorized gathers. The list of placed tiles
+# is kept per board and only extended with the tiles placed since the last call, so encoding
+# inside a search loop (apply, encode, undo) does not rescan the grid.
+
+_TERRAIN = (SegmentType.CITY, SegmentType.ROAD, SegmentType.FIELD)
+STATIC_PLANES = (("occupied",)
+                 + tuple(f"{t.name.lower()}_{node}" for t in _TERRAIN for node in range(12))  # terrain of each edge node
+                 + ("monastery", "pennant"))
+DYNAMIC_PLANES = (
+    "frontier",                      # open cell next to a tile
+    "own_meeple", "opp_meeple",      # meeple standing on this tile
+    "own_city", "opp_city", "own_road", "opp_road", "own_field", "opp_field",  # feature through the tile is occupied
+    "city_complete", "road_complete",
+    "city_open", "road_open",        # open edges left on the (most open) city/road through the tile
+    "monastery_area",                # tiles in the 3x3 block of a monastery tile, / 9
+)
+PLANE_NAMES = STATIC_PLANES + DYNAMIC_PLANES
+N_PLANES = len(PLANE_NAMES)
+_P = {name: i for i, name in enumerate(PLANE_NAMES)}
+_STATIC = len(STATIC_PLANES)
+
+# Terrain type index -> channel of the per-type dynamic planes (cities and roads only for the last two)
+_OWN = np.array([_P["own_city"], _P["own_road"], _P["own_field"]])
+_OPP = np.array([_P["opp_city"], _P["opp_road"], _P["opp_field"]])
+_COMPLETE = np.array([_P["city_complete"], _P["road_complete"]])
+_OPEN = np.array([_P["city_open"], _P["road_open"]])
+
+
+def _static_rows() -> np.ndarray:
+    """(kind id * 4 + step) -> static channel values of that tile."""
+    rows = np.zeros((len(KINDS) * 4, _STATIC), dtype=np.float32)
+    for kind in KINDS:
+        for step in range(4):
+            row = rows[kind.id * 4 + step]
+            row[_P["occupied"]] = 1.0
+            for node, i in enumerate(kind.table.node_segments[step]):
+                seg_type = kind.segments[i].type
+                if seg_type in _TERRAIN:
+                    row[_P[f"{seg_type.name.lower()}_{node}"]] = 1.0
+            row[_P["monastery"]] = 1.0 if kind.table.monastery else 0.0
+            row[_P["pennant"]] = sum(1 for s in kind.segments if s.has_pennant)
+    return rows
+
+_STATIC_ROWS = _static_rows()
+
+def _find(parent: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """Roots of the DSU elements `ids` (the DSU itself is not touched). Union by size keeps every
+    tree shallower than log2(len(parent)), so a fixed number of pointer-doubling steps reaches
+    the roots without convergence checks."""
+    reach = 1
+    while reach < len(parent).bit_length():
+        parent = parent[parent]
+        reach *= 2
+    return parent[ids]
+
+class _Placed:
+    """Placed tiles of one board in placement order, with the arrays the encoder gathers from."""
+    __slots__ = ("tiles", "ids", "xs", "ys", "codes", "rows", "segments", "city_road", "arrays")
+
+    def __init__(self):
+        self.tiles: List = []
+        self.ids: List[list] = []  # segment_ids list bound by each placement
+        self.xs: List[int] = []
+        self.ys: List[int] = []
+        self.codes: List[int] = []
+        self.rows: Dict[Tuple[int, int], int] = {}        # position -> index in the lists above
+        self.segments = {t: ([], []) for t in _TERRAIN}  # type -> (tile rows, DSU ids) of its segments
+        self.city_road = 0                               # city and road segments, set with the arrays
+        self.arrays = None                               # numpy copies, rebuilt after a change
+
+    def sync(self, grid):
+        """Drops the tiles taken back since the last call and appends the new ones. Undo is LIFO
+        and every placement binds a fresh segment_ids list, so a cached tile still on its square
+        with the same list means every tile before it is unchanged too."""
+        tiles, count = self.tiles, len(self.tiles)
+        while tiles and (len(tiles) > len(grid) or grid.get((self.xs[-1], self.ys[-1])) is not tiles[-1]
+                         or tiles[-1].segment_ids is not self.ids[-1]):
+            del self.rows[(self.xs[-1], self.ys[-1])]
+            for column in (self.ids, self.xs, self.ys, self.codes, tiles):
+                column.pop()
+            for rows, ids in self.segments.values():
+                while rows and rows[-1] >= len(tiles):
+                    rows.pop()
+                    ids.pop()
+        if len(tiles) != count: self.arrays = None
+        if len(tiles) == len(grid): return
+        for pos in islice(iter(grid), len(tiles), None):
+            tile = grid[pos]
+            row = self.rows[pos] = len(tiles)
+            tiles.append(tile)
+            self.ids.append(tile.segment_ids)
+            self.xs.append(pos[0])
+            self.ys.append(pos[1])
+            self.codes.append(tile.kind.id * 4 + tile.rotation // 90)
+            for i, segment in enumerate(tile.kind.segments):
+                seg_id = tile.segment_ids[i]
+                if seg_id is not None and segment.type in self.segments:
+                    rows, ids = self.segments[segment.type]
+                    rows.append(row)
+                    ids.append(seg_id)
+        self.arrays = None
+
+    def get_arrays(self):
+        """(xs, ys, codes, segment rows, segment DSU ids, segment type index), segments grouped by type in
+        _TERRAIN order, so the city and road segments come first."""
+        if self.arrays is None:
+            per_type = list(self.segments.values())
+            self.city_road = len(per_type[0][0]) + len(per_type[1][0])
+            self.arrays = (np.asarray(self.xs, np.int64), np.asarray(self.ys, np.int64), np.asarray(self.codes, np.int64),
+                           np.asarray([r for rows, _ in per_type for r in rows], np.int64),
+                           np.asarray([i for _, ids in per_type for i in ids], np.int64),
+                           np.repeat(np.arange(len(per_type)), [len(rows) for rows, _ in per_type]))
+        return self.arrays
+
+class PlaneEncoder:
+    """Encodes boards as (N_PLANES, size, size) float32 arrays, see PLANE_NAMES.
+
+    The window is centred on the bounding box of the placed tiles unless a fixed `center`
+    square is given. One encoder can serve many boards; per-board caches go away with the board.
+    """
+    def __init__(self, size: int = 24, center: Optional[Tuple[int, int]] = None):
+        self.size = size
+        self.center = center
+        self._placed: "weakref.WeakKeyDictionary[Board, _Placed]" = weakref.WeakKeyDictionary()
+
+    def origin(self, board: Board) -> Tuple[int, int]:
+        """Board square (x0, y0) of cell (0, 0)."""
+        if self.center is not None:
+            cx, cy = self.center
+        else:
+            bounds = board.grid.bounds()
+            cx, cy = (0, 0) if bounds is None else ((bounds[0] + bounds[1]) // 2, (bounds[2] + bounds[3]) // 2)
+        return cx - self.size // 2, cy - self.size // 2
+
+    def encode(self, board: Board, player_name: Optional[str] = None, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Planes of `board` seen from player_name (the player to move by default); fills `out` if given."""
+        if out is None:
+            out = np.zeros((N_PLANES, self.size, self.size), dtype=np.float32)
+        else:
+            out.fill(0.0)
+        self._encode_into(board, board.player_index[player_name] if player_name is not None else board.to_move, out)
+        return out
+
+    def encode_batch(self, boards: Sequence[Board], players: Optional[Sequence[Optional[str]]] = None) -> np.ndarray:
+        """(len(boards), N_PLANES, size, size) planes; `players[i]` is the point of view for boards[i]."""
+        out = np.zeros((len(boards), N_PLANES, self.size, self.size), dtype=np.float32)
+        for i, board in enumerate(boards):
+            player_name = players[i] if players is not None else None
+            self._encode_into(board, board.player_index[player_name] if player_name is not None else board.to_move, out[i])
+        return out
+
+    def _encode_into(self, board: Board, me: int, out: np.ndarray):
+        """Writes the planes into the zeroed array `out`. Small parts (frontier, meeples, monasteries)
+        are collected in Python and written with one assignment each: at these sizes every
+        NumPy call costs more than the elements it touches."""
+        size = self.size
+        x0, y0 = self.origin(board)
+        planes = out.reshape(N_PLANES, -1)
+        placed = self._sync(board)
+        n = len(placed.tiles)
+        if not n: return
+
+        # Per placed tile, then scattered into the window in one go
+        xs, ys, codes, seg_rows, seg_ids, seg_types = placed.get_arrays()
+        values = np.zeros((n, N_PLANES), dtype=np.float32)
+        values[:, :_STATIC] = _STATIC_ROWS[codes]
+        flat = values.reshape(-1)
+        # The three DSUs as one index space, so each step below is one vectorized call
+        dsus = [board.dsu[t] for t in _TERRAIN]
+        city, road = len(dsus[0].parent), len(dsus[1].parent)
+        offsets = (0, city, city + road)
+        parent = np.asarray(dsus[0].parent + dsus[1].parent + dsus[2].parent, np.int64)
+        parent[city:city + road] += city
+        parent[city + road:] += city + road
+        roots = _find(parent, seg_ids + np.asarray(offsets)[seg_types])
+        base = seg_rows * N_PLANES
+        if board.meeple_segments:
+            # Occupied roots from the few meeples on the board rather than the per-root meeple arrays
+            claimed: Tuple[List[int], List[int]] = ([], [])
+            for t, seg_id in board.meeple_segments:
+                c = _TERRAIN.index(t)
+                root = dsus[c].root(seg_id)
+                for p in (me, 1 - me):
+                    if dsus[c].meeples[p][root]: claimed[p != me].append(offsets[c] + root)
+            occupied = np.zeros((2, len(parent)), dtype=bool)
+            occupied[0, claimed[0]] = True
+            occupied[1, claimed[1]] = True
+            flat[(base + _OWN[seg_types])[occupied[0, roots]]] = 1.0
+            flat[(base + _OPP[seg_types])[occupied[1, roots]]] = 1.0
+        k = placed.city_road
+        open_edges = np.asarray(dsus[0].open_edges + dsus[1].open_edges, np.float32)[roots[:k]]
+        flat[(base[:k] + _COMPLETE[seg_types[:k]])[open_edges == 0]] = 1.0
+        np.maximum.at(flat, base[:k] + _OPEN[seg_types[:k]], open_edges)
+
+        own, opp = PLAYERS[me], PLAYERS[1 - me]
+        meeple_rows = [row for row, tile in enumerate(placed.tiles) if any(tile.meeples)]
+        if meeple_rows:
+            values[meeple_rows, _P["own_meeple"]] = [placed.tiles[row].meeples.count(own) for row in meeple_rows]
+            values[meeple_rows, _P["opp_meeple"]] = [placed.tiles[row].meeples.count(opp) for row in meeple_rows]
+        if board.monastery_counts:
+            values[[placed.rows[pos] for pos in board.monastery_counts], _P["monastery_area"]] = \
+                [count / 9.0 for count in board.monastery_counts.values()]
+
+        min_x, max_x, min_y, max_y = board.grid.bounds()
+        cells = (ys - y0) * size + (xs - x0)
+        if x0 <= min_x and max_x < x0 + size and y0 <= min_y and max_y < y0 + size:
+            planes[:, cells] = values.T
+            occupied = np.zeros((size + 2, size + 2), dtype=bool)
+            occupied[ys - y0 + 1, xs - x0 + 1] = True
+        else:
+            inside = (xs >= x0) & (xs < x0 + size) & (ys >= y0) & (ys < y0 + size)
+            planes[:, cells[inside]] = values[inside].T
+            # Tiles just outside the window still make the cells next to them frontier cells
+            margin = (xs >= x0 - 1) & (xs <= x0 + size) & (ys >= y0 - 1) & (ys <= y0 + size)
+            occupied = np.zeros((size + 2, size + 2), dtype=bool)
+            occupied[ys[margin] - y0 + 1, xs[margin] - x0 + 1] = True
+        # Frontier: empty cells with an orthogonal neighbour (the open cells of Board.frontier)
+        inner = occupied[1:-1, 1:-1]
+        out[_P["frontier"]] = ~inner & (occupied[2:, 1:-1] | occupied[:-2, 1:-1] | occupied[1:-1, 2:] | occupied[1:-1, :-2])
+
+    def _sync(self, board: Board) -> _Placed:
+        placed = self._placed.get(board)
+        if placed is None:
+            placed = self._placed[board] = _Placed()
+        placed.sync(board.grid)
+        return placed
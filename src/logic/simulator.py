@@ -0,0 +1,139 @@
+import random
+import time
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .models import Tile
+from .deck import DECK_DEFINITIONS, Deck, KINDS
+from .engine import Board, PLAYERS
+from .grid import DictGrid
+
+# --- Headless game simulation ---
+# Whole games between agents (any object with CarcassonneAgent's select_move) under the turn
+# rules of GameSession: draw, discard tiles that fit nowhere, place, optional meeple, score
+# completions, hand over the move, final scoring once the deck is empty. No I/O, logging or
+# telemetry, so throughput is bounded by the engine and the agents only. Seat i of `agents`
+# plays PLAYERS[i]; the deck order depends only on the seed.
+
+
+class GameResult(NamedTuple):
+    seed: int
+    scores: Tuple[int, ...]        # final score per seat, in PLAYERS order
+    meeples_left: Tuple[int, ...]
+    turns: int                     # tiles placed after the starter
+    discarded: int                 # drawn tiles that fit nowhere
+
+    @property
+    def winner(self) -> Optional[int]:
+        """Seat index of the winner, None on a draw."""
+        best = max(self.scores)
+        seats = [i for i, s in enumerate(self.scores) if s == best]
+        return seats[0] if len(seats) == 1 else None
+
+class SimulationReport(NamedTuple):
+    results: List[GameResult]
+    seconds: float
+
+    @property
+    def games_per_second(self) -> float:
+        return len(self.results) / self.seconds if self.seconds > 0 else 0.0
+
+    def wins(self) -> Tuple[int, ...]:
+        """Games won per seat, then draws."""
+        counts = [0] * (len(PLAYERS) + 1)
+        for result in self.results:
+            winner = result.winner
+            counts[len(PLAYERS) if winner is None else winner] += 1
+        return tuple(counts)
+
+class RandomPolicy:
+    """Uniformly random placements with a meeple attempt on a random segment `meeple_rate` of the
+    time; seeded, so games between random policies are reproducible."""
+    def __init__(self, name: str, meeple_rate: float = 0.3, seed: Optional[int] = None):
+        self.name = name
+        self.meeple_rate = meeple_rate
+        self.rng = random.Random(seed)
+
+    def select_move(self, board: Board, tile: Tile, legal_moves: List[Tuple[int, int, int]], current_meeples: int, remaining_tiles: int = 72, deck: Optional[List[Tile]] = None) -> Tuple[int, int, int, Optional[int]]:
+        rng = self.rng
+        x, y, rot = rng.choice(legal_moves)
+        meeple = None
+        if current_meeples > 0 and rng.random() < self.meeple_rate:
+            meeple = rng.randrange(len(tile.segments))
+        return x, y, rot, meeple
+
+def new_game(seed: int, grid_backend: type = DictGrid) -> Tuple[Board, Deck]:
+    """A board with the starter placed at (0, 0) and the remaining deck shuffled by `seed` (the deal
+    of `Deck.shuffled`, as GameSession deals it)."""
+    deck = Deck.shuffled(seed, without=("Tile_Starter",))
+    board = Board(grid_backend)
+    board.place_tile(0, 0, DECK_DEFINITIONS["Tile_Starter"]())
+    return board, deck
+
+def play_turn(board: Board, deck: Deck, agents: Sequence) -> Optional[int]:
+    """Draws from `deck` until a tile fits and lets the agent of the player to move play it; returns
+    the number of discarded tiles, or None once the deck holds no playable tile."""
+    discarded = 0
+    while deck:
+        tile = deck.draw()
+        legal = board.get_legal_moves(tile)
+        if legal: break
+        discarded += 1
+    else:
+        return None
+    player = PLAYERS[board.to_move]
+    agent = agents[board.to_move]
+    x, y, rot, meeple = agent.select_move(board, tile, legal, board.meeple_counts[player], len(deck), deck=deck)
+    tile.rotation = rot
+    if not board.place_tile(x, y, tile):
+        raise ValueError(f"{agent.name} chose an illegal move {(x, y, rot)} for {tile.name}")
+    if meeple is not None:
+        board.place_meeple(x, y, meeple, player)
+    board.get_completed_features()
+    board.end_turn(player)
+    return discarded
+
+def play_game(agents: Sequence, seed: int, grid_backend: type = DictGrid) -> GameResult:
+    board, deck = new_game(seed, grid_backend)
+    turns = discarded = 0
+    while True:
+        skipped = play_turn(board, deck, agents)
+        if skipped is None: break
+        turns += 1
+        discarded += skipped
+    board.calculate_final_scores()
+    return GameResult(seed, tuple(board.scores[p] for p in PLAYERS), tuple(board.meeple_counts[p] for p in PLAYERS),
+                      turns, discarded)
+
+def run_games(make_agents: Callable[[int], Sequence], games: int, seed: int = 0, grid_backend: type = DictGrid) -> SimulationReport:
+    """Plays `games` games with decks seeded seed, seed + 1, ...; `make_agents(game_index)` returns the
+    agents of one game in seat order (e.g. alternating seats between games)."""
+    results = []
+    start = time.perf_counter()
+    for game in range(games):
+        results.append(play_game(make_agents(game), seed + game, grid_backend))
+    return SimulationReport(results, time.perf_counter() - start)
+
+# --- Playouts ---
+
+def playout(board: Board, draw: Callable[[], Optional[int]], rng: random.Random, meeple_rate: float = 0.3,
+            max_turns: Optional[int] = None) -> int:
+    """Random-policy continuation of the position on `board` with `Board.apply`; a meeple goes on
+    a random free segment `meeple_rate` of the time.
+
+    `draw()` returns the kind id of the next playable tile or None when there is none left.
+    Returns the number of turns applied; the caller undoes them with as many `Board.undo` calls.
+    """
+    turns = 0
+    while max_turns is None or turns < max_turns:
+        kind = draw()
+        if kind is None: break
+        tile = Tile(KINDS[kind])
+        x, y, rot = rng.choice(board.get_legal_moves(tile))
+        player = PLAYERS[board.to_move]
+        meeple = None
+        if board.meeple_counts[player] > 0 and rng.random() < meeple_rate:
+            options = board.meeple_options(tile, x, y, rot)
+            if options: meeple = rng.choice(options)
+        board.apply(tile, (x, y, rot, meeple), player)
+        turns += 1
+    return turns
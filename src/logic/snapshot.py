@@ -0,0 +1,303 @@
+import struct
+import sys
+from array import array
+from collections import Counter
+from typing import List, NamedTuple, Optional, Tuple
+
+from .models import Tile, SegmentType
+from .deck import KINDS, DECK_COUNTS
+from .engine import Board, PLAYERS
+from .grid import DictGrid
+
+# --- Compact, versioned binary snapshots of a Board and of a whole game ---
+# Layout (little-endian): a 6-byte header (magic, format version, record kind), fixed fields
+# packed with struct, then every per-tile / per-segment column as one array block
+# (<count><raw bytes>), so encoding and decoding are mostly C-level copies plus one loop
+# over the placed tiles. What the board can rebuild from its tiles (segment ids, DSU owners,
+# field-city lists) is not stored. A board cannot be snapshotted in the middle of Board.apply.
+
+SNAPSHOT_MAGIC = b"CSNP"
+SNAPSHOT_VERSION = 1
+BOARD_RECORD, GAME_RECORD = 1, 2
+
+_HEADER = struct.Struct("<4sBB")
+_COUNT = struct.Struct("<I")
+_DSU_TYPES = (SegmentType.CITY, SegmentType.ROAD, SegmentType.FIELD)
+_SWAP = sys.byteorder == "big"
+# Kind id -> (DSU segments as (segment index, DSU column), field segments as (segment index, city segment indices)),
+# i.e. what place_tile registers for a tile of that kind, in the same order
+_LAYOUTS = [(tuple((i, _DSU_TYPES.index(s.type)) for i, s in enumerate(kind.segments) if s.type in _DSU_TYPES),
+             tuple((i, cities) for i, cities in enumerate(kind.table.field_cities) if kind.segments[i].type == SegmentType.FIELD))
+            for kind in KINDS]
+
+class GameSnapshot(NamedTuple):
+    board: Board
+    deck: List[Tile]               # remaining tiles, in draw order
+    pending_tile: Optional[Tile]
+    current_player: str
+    game_over: bool
+    last_played: Tuple[int, int]
+    player_types: Tuple[str, str]  # agent label of each seat, e.g. ("Human", "Star2.5")
+
+class _Writer:
+    def __init__(self, kind: int):
+        self.parts = [_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, kind)]
+
+    def pack(self, fmt: str, *values):
+        self.parts.append(struct.pack(fmt, *values))
+
+    def column(self, typecode: str, values):
+        block = array(typecode, values)
+        if _SWAP: block.byteswap()
+        self.parts.append(_COUNT.pack(len(block)))
+        self.parts.append(block.tobytes())
+
+    def blob(self, data: bytes):
+        self.parts.append(_COUNT.pack(len(data)))
+        self.parts.append(data)
+
+    def getvalue(self) -> bytes:
+        return b"".join(self.parts)
+
+class _Reader:
+    def __init__(self, data: bytes, kind: int):
+        if len(data) < _HEADER.size: raise ValueError("Snapshot is truncated")
+        magic, version, record = _HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC: raise ValueError("Not a game snapshot")
+        if version != SNAPSHOT_VERSION: raise ValueError(f"Unsupported snapshot version {version} (expected {SNAPSHOT_VERSION})")
+        if record != kind: raise ValueError(f"Snapshot holds record kind {record}, expected {kind}")
+        self.data = memoryview(data)
+        self.pos = _HEADER.size
+
+    def unpack(self, fmt: str) -> tuple:
+        values = struct.unpack_from(fmt, self.data, self.pos)
+        self.pos += struct.calcsize(fmt)
+        return values
+
+    def column(self, typecode: str) -> list:
+        block = array(typecode)
+        (count,) = _COUNT.unpack_from(self.data, self.pos)
+        end = self.pos + _COUNT.size + count * block.itemsize
+        block.frombytes(self.data[self.pos + _COUNT.size:end])
+        if _SWAP: block.byteswap()
+        self.pos = end
+        return block.tolist()
+
+    def blob(self) -> bytes:
+        (count,) = _COUNT.unpack_from(self.data, self.pos)
+        start = self.pos + _COUNT.size
+        self.pos = start + count
+        return bytes(self.data[start:self.pos])
+
+def _pairs(flat: list) -> list:
+    return list(zip(flat[0::2], flat[1::2]))
+
+def _flat(pairs) -> list:
+    return [v for pair in pairs for v in pair]
+
+# --- Board ---
+
+def _write_board(w: _Writer, board: Board):
+    if board._frames: raise ValueError("Cannot snapshot a board while moves are applied")
+    player_index = board.player_index
+    w.pack("<BBQ", len(PLAYERS), board.to_move, board.zobrist)
+    w.column("h", [board.scores[p] for p in PLAYERS] + [board.meeple_counts[p] for p in PLAYERS])
+
+    tiles = list(board.grid.values())
+    w.column("b", _flat(board.grid))
+    w.column("B", [t.kind.id for t in tiles])
+    w.column("B", [t.rotation // 90 for t in tiles])
+    w.column("B", [0 if m is None else player_index[m] + 1 for t in tiles for m in t.meeples])
+
+    w.column("b", _flat(board.frontier))
+    w.column("I", [v for c in board.frontier.values() for v in (c if c is not None else (0, 0))])
+
+    for st in _DSU_TYPES:
+        dsu = board.dsu[st]
+        for column in (dsu.parent, dsu.next, dsu.size, dsu.tiles, dsu.pennants):
+            w.column("H", column)
+        w.column("h", dsu.open_edges)
+        w.column("b", [-1 if s is None else len(s) for s in dsu.shared])
+        w.column("H", [key for s in dsu.shared if s is not None for key in s])
+        for counts in dsu.meeples:
+            w.column("B", counts)
+
+    w.column("b", _flat(board.monasteries))
+    w.column("B", [0 if o is None else player_index[o] + 1 for o in board.monasteries.values()])
+    w.column("B", list(board.monastery_counts.values()))
+    w.column("b", _flat(board.pending_monasteries))
+    w.column("B", [st.value for st, _ in board.pending_features])
+    w.column("H", [i for _, i in board.pending_features])
+    w.column("B", [st.value for st, _ in board.meeple_segments])
+    w.column("H", [i for _, i in board.meeple_segments])
+
+def _read_board(r: _Reader, grid_backend: type) -> Board:
+    players, to_move, zobrist = r.unpack("<BBQ")
+    if players != len(PLAYERS): raise ValueError(f"Snapshot has {players} players, expected {len(PLAYERS)}")
+    board = Board(grid_backend)
+    board.to_move, board.zobrist = to_move, zobrist
+    tallies = r.column("h")
+    board.scores.update(zip(PLAYERS, tallies[:players]))
+    board.meeple_counts.update(zip(PLAYERS, tallies[players:]))
+    owner_names = (None,) + PLAYERS
+
+    positions, kinds, steps, meeples = _pairs(r.column("b")), r.column("B"), r.column("B"), r.column("B")
+    # Segment ids, DSU owners and field-city lists are rebuilt exactly as place_tile assigns them
+    next_ids = [0] * len(_DSU_TYPES)
+    owners = [[] for _ in _DSU_TYPES]
+    grid, field_cities, m = board.grid, board.field_cities, 0
+    for pos, kind_id, step in zip(positions, kinds, steps):
+        kind = KINDS[kind_id]
+        tile = Tile(kind, step * 90)
+        n = len(kind.segments)
+        tile.meeples = [owner_names[o] for o in meeples[m:m + n]]
+        m += n
+        ids = [None] * n
+        segments, fields = _LAYOUTS[kind_id]
+        for i, column in segments:
+            ids[i] = next_ids[column]
+            next_ids[column] += 1
+            owners[column].append((pos, i))
+        tile.segment_ids = ids
+        for i, cities in fields:
+            field_cities.append(tuple([ids[c] for c in cities]))
+        grid[pos] = tile
+
+    frontier_positions, constraints = _pairs(r.column("b")), r.column("I")
+    board.frontier = {pos: ([constraints[2 * i], constraints[2 * i + 1]] if constraints[2 * i] else None)
+                      for i, pos in enumerate(frontier_positions)}
+
+    for column, st in enumerate(_DSU_TYPES):
+        dsu = board.dsu[st]
+        dsu.parent, dsu.next, dsu.size, dsu.tiles, dsu.pennants = (r.column("H") for _ in range(5))
+        dsu.open_edges = r.column("h")
+        lengths, keys, k = r.column("b"), r.column("H"), 0
+        dsu.shared = []
+        for length in lengths:
+            if length < 0:
+                dsu.shared.append(None)
+            else:
+                dsu.shared.append(keys[k:k + length])
+                k += length
+        dsu.meeples = [r.column("B") for _ in range(players)]
+        dsu.owners = owners[column]
+        if len(dsu.parent) != next_ids[column]: raise ValueError("Snapshot DSU does not match its tiles")
+
+    monastery_positions = _pairs(r.column("b"))
+    board.monasteries = dict(zip(monastery_positions, (owner_names[o] for o in r.column("B"))))
+    board.monastery_counts = dict(zip(monastery_positions, r.column("B")))
+    board.pending_monasteries = _pairs(r.column("b"))
+    board.pending_features = [(SegmentType(st), i) for st, i in zip(r.column("B"), r.column("H"))]
+    board.meeple_segments = [(SegmentType(st), i) for st, i in zip(r.column("B"), r.column("H"))]
+    return board
+
+def encode_board(board: Board) -> bytes:
+    w = _Writer(BOARD_RECORD)
+    _write_board(w, board)
+    return w.getvalue()
+
+def decode_board(data: bytes, grid_backend: type = DictGrid) -> Board:
+    try:
+        return _read_board(_Reader(data, BOARD_RECORD), grid_backend)
+    except (struct.error, IndexError, KeyError) as e:
+        raise ValueError(f"Snapshot is corrupt: {e}") from e
+
+# --- Whole game (board plus the GameSession state around it) ---
+
+def encode_game(game: GameSnapshot) -> bytes:
+    w = _Writer(GAME_RECORD)
+    _write_board(w, game.board)
+    pending = game.pending_tile
+    w.pack("<BBbbh", PLAYERS.index(game.current_player), game.game_over, *game.last_played,
+           -1 if pending is None else pending.kind.id * 4 + pending.rotation // 90)
+    w.column("B", [t.kind.id for t in game.deck])
+    w.column("B", [t.rotation // 90 for t in game.deck])
+    for label in game.player_types:
+        w.blob(label.encode("utf-8"))
+    return w.getvalue()
+
+def decode_game(data: bytes, grid_backend: type = DictGrid) -> GameSnapshot:
+    try:
+        return _read_game(_Reader(data, GAME_RECORD), grid_backend)
+    except (struct.error, IndexError, KeyError, UnicodeDecodeError) as e:
+        raise ValueError(f"Snapshot is corrupt: {e}") from e
+
+def _read_game(r: _Reader, grid_backend: type) -> GameSnapshot:
+    board = _read_board(r, grid_backend)
+    current, game_over, lx, ly, pending = r.unpack("<BBbbh")
+    deck = [Tile(KINDS[k], step * 90) for k, step in zip(r.column("B"), r.column("B"))]
+    player_types = tuple(r.blob().decode("utf-8") for _ in PLAYERS)
+    pending_tile = None if pending < 0 else Tile(KINDS[pending // 4], pending % 4 * 90)
+    return GameSnapshot(board, deck, pending_tile, PLAYERS[current], bool(game_over), (lx, ly), player_types)
+
+# --- Validation of untrusted snapshots ---
+# decode_game only checks the structure, so a snapshot from a client can hold any board. A game
+# is accepted when replaying its tiles in placement order (the grid order) on a fresh board, each
+# with the meeples still standing on it played by the player who placed it, reaches the same
+# board: every tile fits, every meeple was legal for its owner, and the stored feature sets,
+# meeples in hand and turn are what play builds. Scores cannot be replayed (the meeples that
+# scored completed features are gone), so each is bounded by the points of the completed
+# features, on top of the end-of-game tally once the game is over.
+
+def validate_game(game: GameSnapshot):
+    """Raises ValueError unless `game` is a position real play can reach (see above)."""
+    board = game.board
+    drawn = Counter(t.name for t in board.grid.values())
+    drawn.update(t.name for t in game.deck)
+    if game.pending_tile is not None: drawn[game.pending_tile.name] += 1
+    if any(count > DECK_COUNTS[name] for name, count in drawn.items()):
+        raise ValueError("Snapshot holds more tiles of a kind than the deck")
+    tiles = list(board.grid.items())
+    if not tiles or tiles[0][0] != (0, 0) or tiles[0][1].name != "Tile_Starter" or tiles[0][1].rotation != 0:
+        raise ValueError("Snapshot board does not start from the starter at (0, 0)")
+    ref = Board()
+    for turn, ((x, y), tile) in enumerate(tiles):
+        if not ref.place_tile(x, y, Tile(tile.kind, tile.rotation)):
+            raise ValueError(f"Snapshot tile {tile.name} at ({x}, {y}) does not fit")
+        if turn == 0: continue
+        player = PLAYERS[(turn - 1) % len(PLAYERS)]
+        standing = [(i, owner) for i, owner in enumerate(tile.meeples) if owner is not None]
+        if len(standing) > 1 or any(owner != player or not ref.place_meeple(x, y, i, owner) for i, owner in standing):
+            raise ValueError(f"Snapshot meeple at ({x}, {y}) could not have been placed")
+        ref.get_completed_features()
+        ref.end_turn(player)
+    if any(ref.grid[pos].meeples != tile.meeples for pos, tile in tiles):
+        raise ValueError("Snapshot meeples stand on completed features")
+    if ref.meeple_counts != board.meeple_counts or PLAYERS[ref.to_move] != game.current_player:
+        raise ValueError("Snapshot meeples in hand or player to move do not match its board")
+
+    completed = 9 * sum(count == 9 for count in ref.monastery_counts.values())
+    for st in (SegmentType.CITY, SegmentType.ROAD):
+        dsu = ref.dsu[st]
+        for root in dsu.roots():
+            if dsu.open_edges[root] == 0:
+                completed += (dsu.tiles[root] + dsu.pennants[root]) * (2 if st == SegmentType.CITY else 1)
+    tally = ref.project_final_scores() if game.game_over else {p: 0 for p in PLAYERS}
+    for p in PLAYERS:
+        if not 0 <= board.scores[p] - tally[p] <= completed:
+            raise ValueError(f"Snapshot score of {p} is out of reach")
+        ref._add_score(p, board.scores[p])
+    # Path compression leaves parent links depending on the queries made, so the stored ones only
+    # need to lead (without a cycle) to the root the replay has; the rest must match exactly
+    for st, dsu in board.dsu.items():
+        parent, ref_dsu = dsu.parent, ref.dsu[st]
+        n = len(parent)
+        if n != len(ref_dsu.parent) or any(not 0 <= j < n for j in parent):
+            raise ValueError("Snapshot feature sets do not match its tiles")
+        for i in range(n):
+            j = i
+            for _ in range(n):
+                if parent[j] == j: break
+                j = parent[j]
+            else:
+                raise ValueError("Snapshot feature sets hold a cycle")
+            if j != ref_dsu.root(i):
+                raise ValueError("Snapshot feature sets do not match its tiles")
+        ref_dsu.parent = list(parent)
+    if encode_board(ref) != encode_board(board):
+        raise ValueError("Snapshot board state does not match its tiles")
+
+    if game.last_played not in board.grid:
+        raise ValueError("Snapshot last move is off the board")
+    if not game.game_over and game.pending_tile is not None and not ref.get_legal_moves(game.pending_tile):
+        raise ValueError("Snapshot tile in hand fits nowhere")
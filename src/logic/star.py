@@ -0,0 +1,314 @@
+import math
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .models import Tile, SegmentType
+from .deck import KINDS, Deck, remaining_kinds
+from .engine import Board, PLAYERS, Z_HAND, zobrist_key, Action
+from .snapshot import encode_board, decode_board
+from .transposition import TranspositionTable, EXACT, LOWER, UPPER
+from .think import Think
+
+
+# Move ordering bonus for the segment a meeple goes on
+_MEEPLE_BONUS = {SegmentType.MONASTERY: 3, SegmentType.CITY: 3, SegmentType.ROAD: 1, SegmentType.FIELD: 0}
+
+class _Timeout(Exception):
+    pass
+
+class StarSearch:
+    """Depth-limited *-minimax (Star1 with Star2.5 probing) over full actions.
+
+    Values are the evaluation for Player1 (projected final score margin plus `meeple_value`
+    per meeple in hand), so Player1 maximises, Player2 minimises and results stored in a
+    shared transposition table mean the same for both seats. After every action a chance
+    node weighs each tile kind still in the draw pile by its number of copies (kinds that
+    fit nowhere are discarded in play, so they are dropped and the rest renormalised).
+
+    The cutoffs need known value bounds: the evaluation is clamped to the root's value
+    +/- `score_bound`. Values clamped to one window are wrong in another, so stored values
+    carry their window and only those of the running search's window are used (the moves of
+    the others still order the actions). A chance node first probes every outcome with one action (the best by
+    the move ordering), which bounds its value from one side, and stops once the weighted
+    bounds already decide the window (Star2.5); otherwise the outcomes are searched in turn
+    with the windows Star1 derives from the bounds of the others.
+
+    Depth counts decisions (plies). `search` deepens one ply at a time until `time_limit`
+    or `max_depth` and returns the best action of the deepest completed iteration; the
+    first iteration rates every action by its score deltas (`Board.score_move`). Given a
+    `Think`, it also stops at its deadline or when it is cancelled, and offers the best action
+    of every completed iteration to it.
+    """
+    def __init__(self, time_limit: Optional[float] = 1.0, max_depth: Optional[int] = None,
+                 transposition: Optional[TranspositionTable] = None, probing: bool = True,
+                 score_bound: float = 60.0, meeple_value: float = 1.0):
+        if time_limit is None and max_depth is None:
+            raise ValueError("StarSearch needs a time limit, a maximum depth or both")
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.transposition = transposition if transposition is not None else TranspositionTable()
+        self.probing = probing
+        self.score_bound = score_bound
+        self.meeple_value = meeple_value
+        self.stats: Dict = {}
+        self._board: Optional[Board] = None
+        self._pool = Deck()
+        self._actions_cache: Dict[Tuple[int, int], List[Action]] = {}
+        self._lower = self._upper = 0.0
+        self._deadline = math.inf
+        self._think = Think()
+        self._projected: Dict[str, int] = {}
+        self._counters: Counter = Counter()
+
+    # --- Public API ---
+
+    def search(self, board: Board, tile: Tile, player_name: str, deck: Optional[Sequence[Tile]] = None,
+               think: Optional[Think] = None) -> Action:
+        """Best full action for player_name holding tile; `board` itself is never modified."""
+        return self.run(decode_board(encode_board(board)), tile.kind.id, player_name, remaining_kinds(board, tile, deck), think)
+
+    def run(self, board: Board, kind: int, player_name: str, pool: List[int], think: Optional[Think] = None) -> Action:
+        """Searches the position on `board` (which the search mutates and may leave changed if the
+        time runs out) for a tile of kind id `kind`; `pool` holds the kind ids still to be drawn."""
+        start = time.perf_counter()
+        self._think = think = think if think is not None else Think()
+        self._deadline = think.limit(self.time_limit, start)
+        self._board = board
+        self._pool = Deck.of_kinds(pool)
+        self._actions_cache = {}
+        self._counters = Counter()
+        player = board.player_index[player_name]
+        if board.to_move != player:
+            board.end_turn(PLAYERS[player - 1])
+        self._projected = board.project_final_scores()
+        root_value = self._value(self._projected)
+        self._lower, self._upper = root_value - self.score_bound, root_value + self.score_bound
+
+        actions = list(self._actions(kind))
+        best, value, depth, iterations = actions[0], root_value, 0, []
+        think.offer(best, 0)
+        # Deeper than one ply per remaining tile is the same search again
+        limit = min(self.max_depth or math.inf, len(pool) + 1)
+        if len(actions) > 1:
+            while depth < limit:
+                try:
+                    if depth == 0:
+                        best, value, actions = self._score_actions(kind, actions, root_value)
+                    else:
+                        best, value, actions = self._root(kind, depth + 1, actions)
+                except _Timeout:
+                    break
+                depth += 1
+                think.offer(best, depth)
+                iterations.append({"depth": depth, "nodes": self._counters["nodes"], "seconds": time.perf_counter() - start})
+        elapsed = time.perf_counter() - start
+
+        c = self._counters
+        chance = c["chance_nodes"]
+        expanded = c["expanded"]
+        self.stats = {
+            "depth": depth,
+            "value": value,
+            "nodes": c["nodes"],
+            "evaluations": c["evaluations"],
+            "chance_nodes": chance,
+            "probes": c["probes"],
+            "probe_cutoffs": c["probe_cutoffs"],
+            "star1_cutoffs": c["star1_cutoffs"],
+            "chance_cutoff_rate": (c["probe_cutoffs"] + c["star1_cutoffs"]) / chance if chance else 0.0,
+            "alpha_beta_cutoffs": c["alpha_beta_cutoffs"],
+            "alpha_beta_cutoff_rate": c["alpha_beta_cutoffs"] / expanded if expanded else 0.0,
+            "tt_hits": c["tt_hits"],
+            "seconds": elapsed,
+            "nodes_per_second": c["nodes"] / elapsed if elapsed > 0 else 0.0,
+            "iterations": iterations,
+            "cancelled": think.cancelled,
+        }
+        self._board = None
+        return best
+
+    # --- Search ---
+
+    def _score_actions(self, kind: int, actions: List[Action], root_value: float) -> Tuple[Action, float, List[Action]]:
+        """The one-ply iteration: every action is rated by its projected score deltas (Board.score_move)."""
+        board = self._board
+        player = PLAYERS[board.to_move]
+        p1, p2 = PLAYERS
+        scored = []
+        for action in actions:
+            if time.perf_counter() > self._deadline or self._think.cancelled:
+                raise _Timeout()
+            delta = board.score_move(Tile(KINDS[kind]), action, player, self._projected)
+            self._counters["evaluations"] += 1
+            value = root_value + delta.projected[p1] - delta.projected[p2] + self.meeple_value * (delta.meeples[p1] - delta.meeples[p2])
+            scored.append((min(max(value, self._lower), self._upper), action))
+        scored.sort(key=lambda item: item[0], reverse=board.to_move == 0)
+        value, best = scored[0]
+        return best, value, [action for _, action in scored]
+
+    def _root(self, kind: int, depth: int, actions: List[Action]) -> Tuple[Action, float, List[Action]]:
+        """One iteration at the root; returns the best action, its value and the actions reordered best first."""
+        board = self._board
+        player = PLAYERS[board.to_move]
+        maximizing = board.to_move == 0
+        alpha, beta = self._lower, self._upper
+        scored = []
+        for action in actions:
+            board.apply(Tile(KINDS[kind]), action, player)
+            value = self._chance(depth - 1, alpha, beta)
+            board.undo()
+            scored.append((value, action))
+            # Later actions only need to prove they are better (fail-soft values below that are bounds)
+            if maximizing: alpha = max(alpha, value)
+            else: beta = min(beta, value)
+        scored.sort(key=lambda item: item[0], reverse=maximizing)
+        value, best = scored[0]
+        self.transposition.store(board.zobrist ^ zobrist_key(Z_HAND, 0, 0, kind, 0), depth, value, EXACT, best,
+                                 (self._lower, self._upper))
+        return best, value, [action for _, action in scored]
+
+    def _decision(self, kind: int, depth: int, alpha: float, beta: float, probe: bool = False) -> float:
+        """Value of the player to move holding `kind`; with `probe` only the first ordered action is
+        searched, which gives a lower bound for Player1 to move and an upper bound for Player2."""
+        c = self._counters
+        c["nodes"] += 1
+        if time.perf_counter() > self._deadline or self._think.cancelled:
+            raise _Timeout()
+        if depth == 0:
+            return self._evaluate()
+        board = self._board
+        key = board.zobrist ^ zobrist_key(Z_HAND, 0, 0, kind, 0)
+        entry = self.transposition.get(key, depth)
+        if entry is not None and entry.window == (self._lower, self._upper):
+            c["tt_hits"] += 1
+            if entry.flag == EXACT: return entry.value
+            if entry.flag == LOWER and entry.value >= beta: return entry.value
+            if entry.flag == UPPER and entry.value <= alpha: return entry.value
+
+        maximizing = board.to_move == 0
+        player = PLAYERS[board.to_move]
+        actions = self._actions(kind)
+        if entry is not None and entry.move in actions:
+            actions = [entry.move] + [a for a in actions if a != entry.move]
+        if probe:
+            actions = actions[:1]
+        else:
+            c["expanded"] += 1
+        a, b = alpha, beta
+        best_value, best = (-math.inf if maximizing else math.inf), None
+        for action in actions:
+            board.apply(Tile(KINDS[kind]), action, player)
+            value = self._chance(depth - 1, a, b)
+            board.undo()
+            if maximizing:
+                if value > best_value: best_value, best = value, action
+                a = max(a, value)
+            else:
+                if value < best_value: best_value, best = value, action
+                b = min(b, value)
+            if a >= b:
+                if not probe: c["alpha_beta_cutoffs"] += 1
+                break
+        if not probe:
+            if best_value <= alpha: flag = UPPER
+            elif best_value >= beta: flag = LOWER
+            else: flag = EXACT
+            self.transposition.store(key, depth, best_value, flag, best, (self._lower, self._upper))
+        return best_value
+
+    def _chance(self, depth: int, alpha: float, beta: float) -> float:
+        """Expected value over the next draw (Star1 windows, Star2.5 probing)."""
+        if depth == 0:
+            return self._evaluate()
+        board, pool = self._board, self._pool
+        outcomes = [(kind, count) for kind, count in enumerate(pool.counts)
+                    if count > 0 and board.get_legal_moves(Tile(KINDS[kind]))]
+        if not outcomes:
+            return self._evaluate()
+        c = self._counters
+        c["chance_nodes"] += 1
+        total = sum(count for _, count in outcomes)
+        probs = [count / total for _, count in outcomes]
+        lower, upper = self._lower, self._upper
+        lo = [lower] * len(outcomes)
+        hi = [upper] * len(outcomes)
+        sum_lo, sum_hi = lower, upper
+
+        if self.probing and len(outcomes) > 1:
+            # One action per outcome bounds it from the side of the player to move
+            maximizing = board.to_move == 0
+            for i, (kind, _) in enumerate(outcomes):
+                p = probs[i]
+                if maximizing:
+                    window = (lower, min(upper, (beta - (sum_lo - p * lo[i])) / p))
+                else:
+                    window = (max(lower, (alpha - (sum_hi - p * hi[i])) / p), upper)
+                pool.take(kind)
+                value = self._decision(kind, depth, *window, probe=True)
+                pool.undo()
+                c["probes"] += 1
+                if maximizing:
+                    sum_lo += p * (value - lo[i])
+                    lo[i] = value
+                    if sum_lo >= beta:
+                        c["probe_cutoffs"] += 1
+                        return sum_lo
+                else:
+                    sum_hi += p * (value - hi[i])
+                    hi[i] = value
+                    if sum_hi <= alpha:
+                        c["probe_cutoffs"] += 1
+                        return sum_hi
+
+        for i, (kind, _) in enumerate(outcomes):
+            p = probs[i]
+            # The window this outcome must leave for the whole node to stay inside (alpha, beta)
+            a = max(lo[i], (alpha - (sum_hi - p * hi[i])) / p)
+            b = min(hi[i], (beta - (sum_lo - p * lo[i])) / p)
+            pool.take(kind)
+            value = self._decision(kind, depth, a, b)
+            pool.undo()
+            # Fail-soft: at or below a it is an upper bound, at or above b a lower bound
+            new_lo = value if value > a else lo[i]
+            new_hi = value if value < b else hi[i]
+            sum_lo += p * (new_lo - lo[i])
+            sum_hi += p * (new_hi - hi[i])
+            lo[i], hi[i] = new_lo, new_hi
+            if sum_lo >= beta:
+                c["star1_cutoffs"] += 1
+                return sum_lo
+            if sum_hi <= alpha:
+                c["star1_cutoffs"] += 1
+                return sum_hi
+        return sum_lo
+
+    def _actions(self, kind: int) -> List[Action]:
+        """Full actions for the player to move, ordered by a cheap heuristic (no move is played):
+        placements touching more tiles first, and a meeple on a city or monastery before one on
+        a road, before no meeple, before a meeple on a field."""
+        board = self._board
+        cache_key = (board.zobrist, kind)
+        actions = self._actions_cache.get(cache_key)
+        if actions is not None:
+            return actions
+        tile = Tile(KINDS[kind])
+        segments = tile.segments
+        neighbors = board.grid.neighbors
+        scored = []
+        for action in board.legal_actions(tile, PLAYERS[board.to_move]):
+            x, y, _, meeple = action
+            touching = 4 - neighbors(x, y).count(None)
+            scored.append((2 * touching + (0.5 if meeple is None else _MEEPLE_BONUS[segments[meeple].type]), action))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        actions = self._actions_cache[cache_key] = [action for _, action in scored]
+        return actions
+
+    def _value(self, projected: Dict[str, int]) -> float:
+        p1, p2 = PLAYERS
+        counts = self._board.meeple_counts
+        return projected[p1] - projected[p2] + self.meeple_value * (counts[p1] - counts[p2])
+
+    def _evaluate(self) -> float:
+        self._counters["evaluations"] += 1
+        return min(max(self._value(self._board.project_final_scores()), self._lower), self._upper)
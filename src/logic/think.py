@@ -0,0 +1,72 @@
+import math
+import time
+from typing import Dict, Optional
+
+from .engine import Action
+
+
+# --- Anytime thinking ---
+# One select_move call as the caller sees it: a deadline, a cancellation flag and the best move
+# found so far. The caller creates the Think and hands it to the agent; the agent's search checks
+# `expired()` (or `cancelled` next to its own time limit) and reports progress with `offer` as it
+# goes (after every completed iteration, every so many playouts, ...). The caller may read `best`
+# and `depth` or call `cancel` from another thread while the search runs; these are single
+# attribute reads and writes, atomic under the GIL, so no lock is needed.
+
+class Think:
+    """Deadline (a time.perf_counter() value), cooperative cancellation and progress of one move."""
+    __slots__ = ("deadline", "started", "cancelled", "best", "depth", "source", "finished")
+
+    def __init__(self, deadline: Optional[float] = None):
+        self.deadline = math.inf if deadline is None else deadline
+        self.started = time.perf_counter()
+        self.cancelled = False
+        self.best: Optional[Action] = None
+        self.depth = 0                    # plies searched for `best`, as the agent counts them
+        self.source: Optional[str] = None  # what produced `best`: "search", "book", "endgame", ...
+        self.finished: Optional[float] = None
+
+    @classmethod
+    def budget(cls, seconds: Optional[float]) -> "Think":
+        """A think that must end `seconds` from now (None: no deadline)."""
+        return cls(None if seconds is None else time.perf_counter() + seconds)
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline; 0 once cancelled or expired."""
+        if self.cancelled: return 0.0
+        return max(self.deadline - time.perf_counter(), 0.0)
+
+    def expired(self) -> bool:
+        return self.cancelled or time.perf_counter() >= self.deadline
+
+    def limit(self, time_limit: Optional[float], start: Optional[float] = None) -> float:
+        """The earlier of the deadline and `time_limit` seconds after `start` (default now)."""
+        if time_limit is None: return self.deadline
+        return min(self.deadline, (time.perf_counter() if start is None else start) + time_limit)
+
+    def offer(self, action: Action, depth: Optional[int] = None, source: str = "search"):
+        """Publishes a better (or deeper) move; the last one offered is the best so far."""
+        self.best = action
+        if depth is not None: self.depth = depth
+        self.source = source
+
+    def cancel(self):
+        """Asks the search to stop at its next check and return its best move so far."""
+        self.cancelled = True
+
+    def finish(self, action: Action) -> Action:
+        """Records the move the agent returns (and when); returns the move."""
+        if self.best != action:
+            self.best = action
+            if self.source is None: self.source = "search"
+        self.finished = time.perf_counter()
+        return action
+
+    @property
+    def seconds(self) -> float:
+        """Time spent so far, or until the agent returned."""
+        return (self.finished if self.finished is not None else time.perf_counter()) - self.started
+
+    def report(self) -> Dict:
+        return {"seconds": round(self.seconds, 4), "depth": self.depth, "source": self.source,
+                "cancelled": self.cancelled, "finished": self.finished is not None}
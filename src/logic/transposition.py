@@ -0,0 +1,59 @@
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional
+
+# Bound types of a stored value (alpha-beta style searches); other searches can store EXACT only
+EXACT, LOWER, UPPER = range(3)
+
+class TTEntry(NamedTuple):
+    depth: int            # search depth the value was computed with; deeper is more reliable
+    value: float
+    flag: int = EXACT
+    move: Any = None      # best action found from this position, if any
+    window: Any = None    # value range the search clamped to, for values only valid inside it
+
+class TranspositionTable:
+    """Size-bounded cache of search results keyed by `Board.zobrist`.
+
+    Replacement policy: an existing entry is only overwritten by a result of equal or greater
+    depth or one computed in another `window`, and when the table is full the least recently
+    used entry is evicted. One table can be shared by several agents; entries never hold
+    references to a board.
+    """
+    def __init__(self, capacity: int = 200_000):
+        self.capacity = capacity
+        self.entries: "OrderedDict[int, TTEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: int, depth: int = 0) -> Optional[TTEntry]:
+        """Entry for key if it was searched at least `depth` deep, else None."""
+        entry = self.entries.get(key)
+        if entry is None or entry.depth < depth:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def store(self, key: int, depth: int, value: float, flag: int = EXACT, move: Any = None, window: Any = None):
+        entry = self.entries.get(key)
+        if entry is not None:
+            if depth < entry.depth and window == entry.window: return
+            self.entries.move_to_end(key)
+        elif len(self.entries) >= self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        self.entries[key] = TTEntry(depth, value, flag, move, window)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"size": len(self.entries), "capacity": self.capacity, "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0, "evictions": self.evictions}